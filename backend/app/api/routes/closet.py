@@ -39,7 +39,7 @@ async def analyze_closet(
         )
 
     try:
-        parsed = gemini_service.analyze_closet(
+        parsed = await gemini_service.analyze_closet(
             manual_clothes_text=manual_text,
             images=image_payloads,
         )
@@ -1,18 +1,27 @@
 """Authenticated user routes backed by Supabase persistence."""
 
-from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi import APIRouter, Depends, File, Header, Query, Response, UploadFile
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 
 from app.core.auth import get_current_user
 from app.core.config import Settings, get_settings
-from app.core.errors import bad_gateway, bad_request, not_found
+from app.core.errors import bad_gateway, bad_request, gone, not_found
 from app.models.schemas import (
     AuthenticatedUser,
+    ClosetItemBulkCreateRequest,
+    ClosetItemBulkCreateResponse,
+    ClosetItemBulkDeleteRequest,
+    ClosetItemBulkDeleteResponse,
+    ClosetItemBulkResult,
+    ClosetItemChanges,
     ClosetItemCreate,
     ClosetItemRecord,
     ClosetItemUpdate,
     DeleteResponse,
     GenerateOutfitsRequest,
     GenerateOutfitsResponse,
+    LogoutResponse,
     MeResponse,
     ProtectedGenerateOutfitsRequest,
     SavedOutfitCreate,
@@ -28,20 +37,64 @@ from app.services.supabase_service import (
     SupabaseNotFoundError,
     SupabaseService,
     SupabaseServiceError,
+    SyncCursorExpiredError,
     get_supabase_service,
 )
 from app.utils.file_validation import validate_and_read_files
+from app.utils.http_caching import ETAG_HEADER, etag_matches
+from app.utils.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
 
 router = APIRouter(tags=["me"])
 
 
+def clamp_page_size(limit: int | None, settings: Settings) -> int | None:
+    # Omitting `limit` keeps the original unpaginated response for existing clients.
+    if limit is None:
+        return None
+    return min(limit, settings.max_page_size)
+
+
+def parse_closet_item_fields(fields: str | None) -> list[str] | None:
+    """Split a `fields=` query value into known ClosetItemRecord field names."""
+
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in ClosetItemRecord.model_fields]
+    if not names or unknown:
+        raise bad_request(
+            f"Unknown closet item fields: {', '.join(unknown) or fields!r}. "
+            f"Choose from {', '.join(ClosetItemRecord.model_fields)}."
+        )
+    return names
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers[ETAG_HEADER] = etag
+    # Private data: let the browser keep it, but revalidate with If-None-Match every time.
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
+
+
+def describe_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
 @router.get("/me", response_model=MeResponse)
-def get_me(
+async def get_me(
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> MeResponse:
     try:
-        supabase_service.upsert_profile(
+        await supabase_service.upsert_profile(
             user_id=current_user.user_id,
             display_name=current_user.display_name,
             access_token=current_user.access_token,
@@ -55,28 +108,94 @@ def get_me(
         raise bad_gateway(str(exc)) from exc
 
 
+@router.post("/me/logout", response_model=LogoutResponse)
+async def logout(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    supabase_service: SupabaseService = Depends(get_supabase_service),
+) -> LogoutResponse:
+    if current_user.access_token:
+        supabase_service.invalidate_access_token(current_user.access_token)
+    return LogoutResponse(logged_out=True)
+
+
 @router.get("/me/closet-items", response_model=list[ClosetItemRecord])
-def list_closet_items(
+async def list_closet_items(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> list[ClosetItemRecord]:
+    page_size = clamp_page_size(limit, settings)
+    field_names = parse_closet_item_fields(fields)
+    try:
+        etag = await supabase_service.closet_items_etag(
+            user_id=current_user.user_id,
+            variant=f"{page_size}:{cursor}:{','.join(field_names or [])}",
+            access_token=current_user.access_token,
+        )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        if field_names is None:
+            page = await supabase_service.list_closet_items_page(
+                user_id=current_user.user_id,
+                limit=page_size,
+                cursor=cursor,
+                access_token=current_user.access_token,
+            )
+        else:
+            page = await supabase_service.list_closet_item_fields_page(
+                user_id=current_user.user_id,
+                fields=field_names,
+                limit=page_size,
+                cursor=cursor,
+                access_token=current_user.access_token,
+            )
+    except InvalidCursorError as exc:
+        raise bad_request(str(exc)) from exc
+    except SupabaseServiceError as exc:
+        raise bad_gateway(str(exc)) from exc
+
+    # Projected items are partial records, so they skip the full response model.
+    target = response if field_names is None else JSONResponse(page.items)
+    set_cache_headers(target, etag)
+    if page.next_cursor:
+        target.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items if field_names is None else target
+
+
+@router.get("/me/closet-items/changes", response_model=ClosetItemChanges)
+async def list_closet_item_changes(
+    since: str | None = Query(default=None),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    supabase_service: SupabaseService = Depends(get_supabase_service),
+) -> ClosetItemChanges:
     try:
-        return supabase_service.list_closet_items(
+        return await supabase_service.list_closet_item_changes(
             user_id=current_user.user_id,
+            since=since,
             access_token=current_user.access_token,
         )
+    except InvalidCursorError as exc:
+        raise bad_request(str(exc)) from exc
+    except SyncCursorExpiredError as exc:
+        raise gone(str(exc)) from exc
     except SupabaseServiceError as exc:
         raise bad_gateway(str(exc)) from exc
 
 
 @router.post("/me/closet-items", response_model=ClosetItemRecord)
-def create_closet_item(
+async def create_closet_item(
     payload: ClosetItemCreate,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> ClosetItemRecord:
     try:
-        return supabase_service.create_closet_item(
+        return await supabase_service.create_closet_item(
             user_id=current_user.user_id,
             payload=payload,
             access_token=current_user.access_token,
@@ -85,15 +204,81 @@ def create_closet_item(
         raise bad_gateway(str(exc)) from exc
 
 
+@router.post("/me/closet-items:bulk", response_model=ClosetItemBulkCreateResponse)
+async def bulk_create_closet_items(
+    payload: ClosetItemBulkCreateRequest,
+    settings: Settings = Depends(get_settings),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    supabase_service: SupabaseService = Depends(get_supabase_service),
+) -> ClosetItemBulkCreateResponse:
+    if len(payload.items) > settings.max_bulk_closet_items:
+        raise bad_request(
+            f"Too many closet items. Maximum allowed is {settings.max_bulk_closet_items}."
+        )
+
+    results: dict[int, ClosetItemBulkResult] = {}
+    valid: list[tuple[int, ClosetItemCreate]] = []
+    for index, raw_item in enumerate(payload.items):
+        try:
+            valid.append((index, ClosetItemCreate.model_validate(raw_item)))
+        except ValidationError as exc:
+            results[index] = ClosetItemBulkResult(
+                index=index,
+                created=False,
+                error=describe_validation_error(exc),
+            )
+
+    if valid:
+        try:
+            records = await supabase_service.create_closet_items(
+                user_id=current_user.user_id,
+                payloads=[item for _, item in valid],
+                access_token=current_user.access_token,
+            )
+        except SupabaseServiceError as exc:
+            raise bad_gateway(str(exc)) from exc
+        for (index, _), record in zip(valid, records):
+            results[index] = ClosetItemBulkResult(index=index, created=True, item=record)
+
+    return ClosetItemBulkCreateResponse(
+        results=[results[index] for index in range(len(payload.items))],
+        created_count=len(valid),
+        failed_count=len(payload.items) - len(valid),
+    )
+
+
+@router.post("/me/closet-items:bulk-delete", response_model=ClosetItemBulkDeleteResponse)
+async def bulk_delete_closet_items(
+    payload: ClosetItemBulkDeleteRequest,
+    settings: Settings = Depends(get_settings),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    supabase_service: SupabaseService = Depends(get_supabase_service),
+) -> ClosetItemBulkDeleteResponse:
+    if len(payload.ids) > settings.max_bulk_closet_items:
+        raise bad_request(
+            f"Too many closet items. Maximum allowed is {settings.max_bulk_closet_items}."
+        )
+
+    try:
+        deleted_ids = await supabase_service.delete_closet_items(
+            user_id=current_user.user_id,
+            item_ids=payload.ids,
+            access_token=current_user.access_token,
+        )
+    except SupabaseServiceError as exc:
+        raise bad_gateway(str(exc)) from exc
+    return ClosetItemBulkDeleteResponse(deleted_ids=deleted_ids)
+
+
 @router.patch("/me/closet-items/{item_id}", response_model=ClosetItemRecord)
-def update_closet_item(
+async def update_closet_item(
     item_id: str,
     payload: ClosetItemUpdate,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> ClosetItemRecord:
     try:
-        return supabase_service.update_closet_item(
+        return await supabase_service.update_closet_item(
             user_id=current_user.user_id,
             item_id=item_id,
             payload=payload,
@@ -108,13 +293,13 @@ def update_closet_item(
 
 
 @router.delete("/me/closet-items/{item_id}", response_model=DeleteResponse)
-def delete_closet_item(
+async def delete_closet_item(
     item_id: str,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> DeleteResponse:
     try:
-        supabase_service.delete_closet_item(
+        await supabase_service.delete_closet_item(
             user_id=current_user.user_id,
             item_id=item_id,
             access_token=current_user.access_token,
@@ -141,7 +326,7 @@ async def upload_closet_item_image(
     )
     payload = payloads[0]
     try:
-        return supabase_service.set_closet_item_image(
+        return await supabase_service.set_closet_item_image(
             user_id=current_user.user_id,
             item_id=item_id,
             content_type=payload.content_type,
@@ -155,13 +340,13 @@ async def upload_closet_item_image(
 
 
 @router.delete("/me/closet-items/{item_id}/image", response_model=ClosetItemRecord)
-def delete_closet_item_image(
+async def delete_closet_item_image(
     item_id: str,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> ClosetItemRecord:
     try:
-        return supabase_service.clear_closet_item_image(
+        return await supabase_service.clear_closet_item_image(
             user_id=current_user.user_id,
             item_id=item_id,
             access_token=current_user.access_token,
@@ -173,27 +358,50 @@ def delete_closet_item_image(
 
 
 @router.get("/me/saved-outfits", response_model=list[SavedOutfitRecord])
-def list_saved_outfits(
+async def list_saved_outfits(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> list[SavedOutfitRecord]:
+    page_size = clamp_page_size(limit, settings)
     try:
-        return supabase_service.list_saved_outfits(
+        etag = await supabase_service.saved_outfits_etag(
             user_id=current_user.user_id,
+            variant=f"{page_size}:{cursor}",
             access_token=current_user.access_token,
         )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        page = await supabase_service.list_saved_outfits_page(
+            user_id=current_user.user_id,
+            limit=page_size,
+            cursor=cursor,
+            access_token=current_user.access_token,
+        )
+    except InvalidCursorError as exc:
+        raise bad_request(str(exc)) from exc
     except SupabaseServiceError as exc:
         raise bad_gateway(str(exc)) from exc
 
+    set_cache_headers(response, etag)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
 
 @router.post("/me/saved-outfits", response_model=SavedOutfitRecord)
-def create_saved_outfit(
+async def create_saved_outfit(
     payload: SavedOutfitCreate,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> SavedOutfitRecord:
     try:
-        return supabase_service.create_saved_outfit(
+        return await supabase_service.create_saved_outfit(
             user_id=current_user.user_id,
             payload=payload,
             access_token=current_user.access_token,
@@ -203,13 +411,13 @@ def create_saved_outfit(
 
 
 @router.delete("/me/saved-outfits/{saved_outfit_id}", response_model=DeleteResponse)
-def delete_saved_outfit(
+async def delete_saved_outfit(
     saved_outfit_id: str,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> DeleteResponse:
     try:
-        supabase_service.delete_saved_outfit(
+        await supabase_service.delete_saved_outfit(
             user_id=current_user.user_id,
             saved_outfit_id=saved_outfit_id,
             access_token=current_user.access_token,
@@ -222,26 +430,25 @@ def delete_saved_outfit(
 
 
 @router.post("/me/generate-outfits", response_model=GenerateOutfitsResponse)
-def generate_outfits_from_saved_closet(
+async def generate_outfits_from_saved_closet(
     payload: ProtectedGenerateOutfitsRequest,
     current_user: AuthenticatedUser = Depends(get_current_user),
     supabase_service: SupabaseService = Depends(get_supabase_service),
     gemini_service: GeminiService = Depends(get_gemini_service),
 ) -> GenerateOutfitsResponse:
     try:
-        closet_records = supabase_service.list_closet_items(
+        closet_items = await supabase_service.list_generation_closet_items(
             user_id=current_user.user_id,
             access_token=current_user.access_token,
         )
     except SupabaseServiceError as exc:
         raise bad_gateway(str(exc)) from exc
 
-    closet_items = SupabaseService.to_generation_closet_items(closet_records)
     if not closet_items:
         raise bad_request("Add at least one closet item before generating outfits.")
 
     try:
-        generated = gemini_service.generate_outfits(
+        generated = await gemini_service.generate_outfits(
             GenerateOutfitsRequest(
                 closet_items=closet_items,
                 occasion=payload.occasion,
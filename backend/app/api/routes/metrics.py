@@ -0,0 +1,19 @@
+"""Process-local cache metrics route."""
+
+from fastapi import APIRouter, Request
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def cache_metrics(request: Request) -> dict[str, dict[str, dict[str, float | int]]]:
+    caches: dict[str, dict[str, float | int]] = {}
+
+    supabase_service = getattr(request.app.state, "supabase_service", None)
+    if supabase_service is not None:
+        caches.update(supabase_service.cache_stats())
+    gemini_service = getattr(request.app.state, "gemini_service", None)
+    if gemini_service is not None:
+        caches.update(gemini_service.cache_stats())
+
+    return {"caches": caches}
@@ -20,7 +20,7 @@ async def generate_outfits(
     gemini_service: GeminiService = Depends(get_gemini_service),
 ) -> GenerateOutfitsResponse:
     try:
-        generated = gemini_service.generate_outfits(payload)
+        generated = await gemini_service.generate_outfits(payload)
     except GeminiResponseFormatError as exc:
         raise bad_gateway(
             "Gemini returned invalid JSON after retry. Please retry your request."
@@ -12,7 +12,7 @@ from app.services.supabase_service import (
 )
 
 
-def get_current_user(
+async def get_current_user(
     authorization: str | None = Header(default=None),
     supabase_service: SupabaseService = Depends(get_supabase_service),
 ) -> AuthenticatedUser:
@@ -24,7 +24,7 @@ def get_current_user(
         raise unauthorized("Authorization header must be Bearer <token>.")
 
     try:
-        user = supabase_service.validate_access_token(token)
+        user = await supabase_service.validate_access_token(token)
         return user.model_copy(update={"access_token": token})
     except SupabaseAuthError as exc:
         raise unauthorized(str(exc)) from exc
@@ -1,6 +1,7 @@
 """Application settings and environment loading."""
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,8 +14,11 @@ class Settings(BaseSettings):
     gemini_api_key: str | None = Field(default=None, alias="GEMINI_API_KEY")
     gemini_model: str = Field(default="gemini-2.0-flash", alias="GEMINI_MODEL")
     gemini_mock_mode: bool = Field(default=True, alias="GEMINI_MOCK_MODE")
+    gemini_analyze_concurrency: int = Field(default=4, alias="GEMINI_ANALYZE_CONCURRENCY")
     max_upload_mb: int = Field(default=8, alias="MAX_UPLOAD_MB")
     max_upload_files: int = Field(default=8, alias="MAX_UPLOAD_FILES")
+    max_page_size: int = Field(default=100, alias="MAX_PAGE_SIZE")
+    max_bulk_closet_items: int = Field(default=100, alias="MAX_BULK_CLOSET_ITEMS")
     allowed_origins: str = Field(
         default="http://localhost:5173,http://localhost:5174,http://127.0.0.1:5173,http://127.0.0.1:5174",
         alias="ALLOWED_ORIGINS",
@@ -23,10 +27,120 @@ class Settings(BaseSettings):
     supabase_publishable_key: str | None = Field(default=None, alias="SUPABASE_PUBLISHABLE_KEY")
     supabase_service_role_key: str | None = Field(default=None, alias="SUPABASE_SERVICE_ROLE_KEY")
     supabase_db_url: str | None = Field(default=None, alias="SUPABASE_DB_URL")
+    supabase_data_backend: Literal["rest", "postgres"] = Field(
+        default="rest",
+        alias="SUPABASE_DATA_BACKEND",
+    )
+    supabase_db_pool_min_size: int = Field(default=1, alias="SUPABASE_DB_POOL_MIN_SIZE")
+    supabase_db_pool_max_size: int = Field(default=10, alias="SUPABASE_DB_POOL_MAX_SIZE")
+    supabase_db_statement_cache_size: int = Field(
+        default=100,
+        alias="SUPABASE_DB_STATEMENT_CACHE_SIZE",
+    )
+    supabase_db_command_timeout_seconds: float = Field(
+        default=30.0,
+        alias="SUPABASE_DB_COMMAND_TIMEOUT_SECONDS",
+    )
     supabase_storage_bucket: str = Field(
         default="closet-item-images",
         alias="SUPABASE_STORAGE_BUCKET",
     )
+    supabase_sign_batch_size: int = Field(default=100, alias="SUPABASE_SIGN_BATCH_SIZE")
+    supabase_signed_url_expires_seconds: int = Field(
+        default=3600,
+        alias="SUPABASE_SIGNED_URL_EXPIRES_SECONDS",
+    )
+    supabase_signed_url_refresh_margin_seconds: int = Field(
+        default=300,
+        alias="SUPABASE_SIGNED_URL_REFRESH_MARGIN_SECONDS",
+    )
+    supabase_signed_url_cache_max_entries: int = Field(
+        default=10000,
+        alias="SUPABASE_SIGNED_URL_CACHE_MAX_ENTRIES",
+    )
+    supabase_http_timeout_seconds: float = Field(
+        default=30.0,
+        alias="SUPABASE_HTTP_TIMEOUT_SECONDS",
+    )
+    supabase_http_max_connections: int = Field(
+        default=100,
+        alias="SUPABASE_HTTP_MAX_CONNECTIONS",
+    )
+    supabase_http_max_keepalive_connections: int = Field(
+        default=20,
+        alias="SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+    )
+    supabase_http_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        alias="SUPABASE_HTTP_KEEPALIVE_EXPIRY_SECONDS",
+    )
+    supabase_http2: bool = Field(default=False, alias="SUPABASE_HTTP2")
+    supabase_jwt_local_verification: bool = Field(
+        default=True,
+        alias="SUPABASE_JWT_LOCAL_VERIFICATION",
+    )
+    supabase_jwt_remote_fallback: bool = Field(
+        default=True,
+        alias="SUPABASE_JWT_REMOTE_FALLBACK",
+    )
+    supabase_jwt_secret: str | None = Field(default=None, alias="SUPABASE_JWT_SECRET")
+    supabase_jwt_audience: str = Field(default="authenticated", alias="SUPABASE_JWT_AUDIENCE")
+    supabase_jwt_issuer: str | None = Field(default=None, alias="SUPABASE_JWT_ISSUER")
+    supabase_jwks_refresh_seconds: float = Field(
+        default=600.0,
+        alias="SUPABASE_JWKS_REFRESH_SECONDS",
+    )
+    supabase_auth_cache_ttl_seconds: float = Field(
+        default=60.0,
+        alias="SUPABASE_AUTH_CACHE_TTL_SECONDS",
+    )
+    supabase_auth_cache_max_entries: int = Field(
+        default=1024,
+        alias="SUPABASE_AUTH_CACHE_MAX_ENTRIES",
+    )
+    cache_backend: Literal["memory", "sqlite"] = Field(default="memory", alias="CACHE_BACKEND")
+    cache_sqlite_path: str = Field(default=".cache/closet-planner.sqlite3", alias="CACHE_SQLITE_PATH")
+    closet_cache_ttl_seconds: float = Field(default=300.0, alias="CLOSET_CACHE_TTL_SECONDS")
+    closet_cache_max_entries: int = Field(default=1024, alias="CLOSET_CACHE_MAX_ENTRIES")
+    profile_cache_ttl_seconds: float = Field(default=3600.0, alias="PROFILE_CACHE_TTL_SECONDS")
+    profile_cache_max_entries: int = Field(default=10000, alias="PROFILE_CACHE_MAX_ENTRIES")
+    gemini_response_cache_ttl_seconds: float = Field(
+        default=86400.0,
+        alias="GEMINI_RESPONSE_CACHE_TTL_SECONDS",
+    )
+    gemini_response_cache_max_entries: int = Field(
+        default=512,
+        alias="GEMINI_RESPONSE_CACHE_MAX_ENTRIES",
+    )
+    gemini_image_cache_ttl_seconds: float = Field(
+        default=604800.0,
+        alias="GEMINI_IMAGE_CACHE_TTL_SECONDS",
+    )
+    gemini_image_cache_max_entries: int = Field(
+        default=2048,
+        alias="GEMINI_IMAGE_CACHE_MAX_ENTRIES",
+    )
+    sync_safety_lag_seconds: float = Field(default=5.0, alias="SYNC_SAFETY_LAG_SECONDS")
+    sync_tombstone_retention_days: float = Field(
+        default=30.0,
+        alias="SYNC_TOMBSTONE_RETENTION_DAYS",
+    )
+    sync_tombstone_purge_interval_seconds: float = Field(
+        default=3600.0,
+        alias="SYNC_TOMBSTONE_PURGE_INTERVAL_SECONDS",
+    )
+    storage_cleanup_queue_enabled: bool = Field(default=True, alias="STORAGE_CLEANUP_QUEUE")
+    storage_cleanup_batch_size: int = Field(default=100, alias="STORAGE_CLEANUP_BATCH_SIZE")
+    storage_cleanup_poll_seconds: float = Field(default=5.0, alias="STORAGE_CLEANUP_POLL_SECONDS")
+    storage_cleanup_base_backoff_seconds: int = Field(
+        default=30,
+        alias="STORAGE_CLEANUP_BASE_BACKOFF_SECONDS",
+    )
+    storage_cleanup_max_backoff_seconds: int = Field(
+        default=3600,
+        alias="STORAGE_CLEANUP_MAX_BACKOFF_SECONDS",
+    )
+    storage_cleanup_max_attempts: int = Field(default=10, alias="STORAGE_CLEANUP_MAX_ATTEMPTS")
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -15,6 +15,10 @@ def not_found(detail: str) -> HTTPException:
     return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
 
 
+def gone(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_410_GONE, detail=detail)
+
+
 def unsupported_media_type(detail: str) -> HTTPException:
     return HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=detail)
 
@@ -0,0 +1,241 @@
+"""Find and delete closet images that no `closet_items` row references.
+
+Walks the bucket one user folder at a time (`{user_id}/{item_id}/<file>`), pages through
+everything under it by name (one call per page, not per item folder), loads that user's
+referenced `image_path`s in pages, and diffs the two sets in memory, so memory stays
+bounded by the largest closet rather than the whole bucket.
+
+    python -m app.jobs.reconcile_storage --dry-run
+    python -m app.jobs.reconcile_storage --min-age-hours 24 --max-deletes-per-second 50
+
+Requires SUPABASE_SERVICE_ROLE_KEY: with a user token RLS would hide other users' rows
+and every object would look orphaned.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import Settings, get_settings
+from app.services.supabase_service import SupabaseService, SupabaseServiceError
+
+logger = logging.getLogger("app.jobs.reconcile_storage")
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    path: str
+    updated_at: datetime | None
+
+
+@dataclass
+class ReconcileStats:
+    users: int = 0
+    objects_scanned: int = 0
+    orphans_found: int = 0
+    orphans_deleted: int = 0
+
+
+def find_orphans(
+    objects: Iterable[StoredObject],
+    referenced_paths: set[str],
+    *,
+    older_than: datetime,
+) -> list[StoredObject]:
+    """Objects no row points at, skipping recent ones that may belong to an in-flight upload."""
+
+    return [
+        stored
+        for stored in objects
+        if stored.path not in referenced_paths
+        and stored.updated_at is not None
+        and stored.updated_at < older_than
+    ]
+
+
+class StorageReconciler:
+    def __init__(
+        self,
+        service: SupabaseService,
+        *,
+        page_size: int = 1000,
+        delete_batch_size: int = 100,
+        min_age: timedelta = timedelta(hours=24),
+        max_deletes_per_second: float | None = None,
+        dry_run: bool = False,
+    ):
+        self.service = service
+        self.page_size = page_size
+        self.delete_batch_size = delete_batch_size
+        self.min_age = min_age
+        self.max_deletes_per_second = max_deletes_per_second
+        self.dry_run = dry_run
+        self.stats = ReconcileStats()
+
+    async def run(self) -> ReconcileStats:
+        if not self.service.service_role_key:
+            raise SupabaseServiceError("Storage reconciliation requires SUPABASE_SERVICE_ROLE_KEY.")
+
+        older_than = datetime.now(timezone.utc) - self.min_age
+        # Collect user folders up front: deleting a user's last object removes the folder,
+        # which would shift offset-based paging of the root listing and skip a user.
+        user_ids = [
+            entry["name"]
+            async for entry in self._list_folder("")
+            if entry.get("id") is None
+        ]
+        logger.info("found %d user folders in %s", len(user_ids), self.service.storage_bucket)
+
+        for user_id in user_ids:
+            objects = [stored async for stored in self._iter_user_objects(user_id)]
+            referenced = await self._referenced_paths(user_id)
+            orphans = find_orphans(objects, referenced, older_than=older_than)
+
+            self.stats.users += 1
+            self.stats.objects_scanned += len(objects)
+            self.stats.orphans_found += len(orphans)
+            await self._delete([orphan.path for orphan in orphans])
+            logger.info(
+                "user %s: %d objects, %d orphans (total: %d users, %d scanned, %d orphans, %d deleted)",
+                user_id,
+                len(objects),
+                len(orphans),
+                self.stats.users,
+                self.stats.objects_scanned,
+                self.stats.orphans_found,
+                self.stats.orphans_deleted,
+            )
+        return self.stats
+
+    async def _list_folder(self, prefix: str) -> AsyncIterator[dict]:
+        offset = 0
+        while True:
+            entries = await self.service.list_storage_objects(
+                prefix=prefix,
+                limit=self.page_size,
+                offset=offset,
+            )
+            for entry in entries:
+                yield entry
+            if len(entries) < self.page_size:
+                return
+            offset += len(entries)
+
+    async def _iter_user_objects(self, user_id: str) -> AsyncIterator[StoredObject]:
+        after: str | None = None
+        while True:
+            rows = await self.service.list_storage_object_page(
+                prefix=f"{user_id}/",
+                limit=self.page_size,
+                after=after,
+            )
+            for row in rows:
+                yield self._stored_object(row["name"], row)
+            if len(rows) < self.page_size:
+                return
+            after = rows[-1]["name"]
+
+    @staticmethod
+    def _stored_object(path: str, entry: dict) -> StoredObject:
+        timestamp = entry.get("updated_at") or entry.get("created_at")
+        return StoredObject(
+            path=path,
+            updated_at=datetime.fromisoformat(timestamp.replace("Z", "+00:00")) if timestamp else None,
+        )
+
+    async def _referenced_paths(self, user_id: str) -> set[str]:
+        referenced: set[str] = set()
+        last_id: str | None = None
+        while True:
+            params = {
+                "select": "id,image_path",
+                "user_id": f"eq.{user_id}",
+                "image_path": "not.is.null",
+                "order": "id.asc",
+                "limit": str(self.page_size),
+            }
+            if last_id is not None:
+                params["id"] = f"gt.{last_id}"
+            rows = await self.service.rest.request("GET", "closet_items", params=params) or []
+            referenced.update(row["image_path"] for row in rows)
+            if len(rows) < self.page_size:
+                return referenced
+            last_id = rows[-1]["id"]
+
+    async def _delete(self, paths: list[str]) -> None:
+        for start in range(0, len(paths), self.delete_batch_size):
+            batch = paths[start : start + self.delete_batch_size]
+            if self.dry_run:
+                for path in batch:
+                    logger.info("[dry-run] would delete %s", path)
+                continue
+
+            started = time.monotonic()
+            await self.service.delete_storage_objects(paths=batch)
+            self.stats.orphans_deleted += len(batch)
+            if self.max_deletes_per_second:
+                # Pace batches so the whole run stays under the requested delete rate.
+                remaining = len(batch) / self.max_deletes_per_second - (time.monotonic() - started)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting.")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows/objects per listing page.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Objects per bulk delete.")
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=24.0,
+        help="Only delete objects last written at least this long ago.",
+    )
+    parser.add_argument(
+        "--max-deletes-per-second",
+        type=float,
+        default=None,
+        help="Upper bound on the delete rate (default: unlimited).",
+    )
+    return parser.parse_args(argv)
+
+
+async def reconcile(args: argparse.Namespace, settings: Settings) -> ReconcileStats:
+    service = SupabaseService(settings)
+    try:
+        reconciler = StorageReconciler(
+            service,
+            page_size=args.page_size,
+            delete_batch_size=args.batch_size,
+            min_age=timedelta(hours=args.min_age_hours),
+            max_deletes_per_second=args.max_deletes_per_second,
+            dry_run=args.dry_run,
+        )
+        return await reconciler.run()
+    finally:
+        await service.aclose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    stats = asyncio.run(reconcile(args, get_settings()))
+    logger.info(
+        "done: %d users, %d objects scanned, %d orphans found, %d deleted%s",
+        stats.users,
+        stats.objects_scanned,
+        stats.orphans_found,
+        stats.orphans_deleted,
+        " (dry run)" if args.dry_run else "",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""Background worker that drains `storage_cleanup_queue` into Storage bulk removals.
+
+Rows are queued by a `closet_items` trigger whenever an item stops referencing an
+object. Claiming a batch already schedules its retry with exponential backoff, so a
+failed removal is simply left in the queue and picked up again later. Claiming also
+drops entries whose path a row references again, and entries that reach
+STORAGE_CLEANUP_MAX_ATTEMPTS stay behind as dead letters.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+
+from app.core.config import Settings
+from app.services.repository import Row, in_filter
+from app.services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class StorageCleanupWorker:
+    def __init__(self, service: SupabaseService, settings: Settings):
+        self.service = service
+        self.settings = settings
+
+    async def claim_batch(self) -> list[Row]:
+        rows = await self.service.rest.request(
+            "POST",
+            "rpc/claim_storage_cleanup_batch",
+            json={
+                "p_limit": self.settings.storage_cleanup_batch_size,
+                "p_base_backoff_seconds": self.settings.storage_cleanup_base_backoff_seconds,
+                "p_max_backoff_seconds": self.settings.storage_cleanup_max_backoff_seconds,
+                "p_max_attempts": self.settings.storage_cleanup_max_attempts,
+            },
+        )
+        return rows or []
+
+    async def complete(self, entry_ids: list[int]) -> None:
+        await self.service.rest.request(
+            "DELETE",
+            "storage_cleanup_queue",
+            params={"id": in_filter([str(entry_id) for entry_id in entry_ids])},
+        )
+
+    async def drain_once(self) -> int:
+        """Claim one batch, remove its objects bucket by bucket, and return the batch size."""
+
+        entries = await self.claim_batch()
+        by_bucket: dict[str, list[Row]] = defaultdict(list)
+        for entry in entries:
+            # Entries queued by the closet_items trigger leave the bucket to the API setting.
+            by_bucket[entry.get("bucket_id") or self.service.storage_bucket].append(entry)
+
+        for bucket, bucket_entries in by_bucket.items():
+            try:
+                await self.service.delete_storage_objects(
+                    paths=[entry["object_path"] for entry in bucket_entries],
+                    bucket=bucket,
+                )
+            except Exception:
+                # Leave the entries queued; their claim already pushed the next attempt out.
+                logger.warning(
+                    "Storage cleanup of %d objects in %s failed; will retry.",
+                    len(bucket_entries),
+                    bucket,
+                    exc_info=True,
+                )
+                self._report_exhausted(bucket, bucket_entries)
+                continue
+            await self.complete([entry["id"] for entry in bucket_entries])
+        return len(entries)
+
+    def _report_exhausted(self, bucket: str, entries: list[Row]) -> None:
+        # Entries at the attempt limit are never claimed again and stay in the queue as
+        # dead letters, so say so loudly once instead of retrying silently forever.
+        exhausted = [
+            entry["object_path"]
+            for entry in entries
+            if entry.get("attempts", 0) >= self.settings.storage_cleanup_max_attempts
+        ]
+        if exhausted:
+            logger.error(
+                "Giving up on %d objects in %s after %d attempts; left in "
+                "storage_cleanup_queue for manual cleanup: %s",
+                len(exhausted),
+                bucket,
+                self.settings.storage_cleanup_max_attempts,
+                exhausted,
+            )
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                claimed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Storage cleanup queue poll failed.", exc_info=True)
+                claimed = 0
+            # A full batch suggests a backlog, so keep draining without waiting.
+            if claimed < self.settings.storage_cleanup_batch_size:
+                await asyncio.sleep(self.settings.storage_cleanup_poll_seconds)
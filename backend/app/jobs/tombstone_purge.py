@@ -0,0 +1,45 @@
+"""Background worker that drops closet item tombstones past the sync retention window.
+
+Delta sync answers cursors older than SYNC_TOMBSTONE_RETENTION_DAYS with 410, so
+tombstones older than that are never read again and only grow the table.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.core.config import Settings
+from app.services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class TombstonePurgeWorker:
+    def __init__(self, service: SupabaseService, settings: Settings):
+        self.service = service
+        self.settings = settings
+
+    async def purge_once(self) -> int:
+        """Delete expired tombstones for every user and return how many were removed."""
+
+        purged = await self.service.rest.request(
+            "POST",
+            "rpc/purge_closet_item_deletions",
+            json={
+                "p_retention_seconds": int(self.settings.sync_tombstone_retention_days * 86400),
+            },
+        )
+        return int(purged or 0)
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                purged = await self.purge_once()
+                if purged:
+                    logger.info("Purged %d expired closet item tombstones.", purged)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Closet item tombstone purge failed.", exc_info=True)
+            await asyncio.sleep(self.settings.sync_tombstone_purge_interval_seconds)
@@ -1,16 +1,69 @@
 """FastAPI application entrypoint."""
 
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes.closet import router as closet_router
 from app.api.routes.health import router as health_router
 from app.api.routes.me import router as me_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.outfits import router as outfits_router
 from app.core.config import get_settings
+from app.jobs.storage_cleanup import StorageCleanupWorker
+from app.jobs.tombstone_purge import TombstonePurgeWorker
+from app.services.supabase_service import SupabaseService, build_supabase_http_client
+from app.utils.http_caching import ETAG_HEADER
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 settings = get_settings()
-app = FastAPI(title="Closet Planner AI API", version="0.1.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # One pooled client per process so every Supabase call reuses warm connections.
+    app.state.supabase_http_client = build_supabase_http_client(settings)
+    background_tasks: list[asyncio.Task] = []
+
+    if settings.supabase_url and settings.supabase_publishable_key:
+        service = SupabaseService(settings, client=app.state.supabase_http_client)
+        app.state.supabase_service = service
+        if settings.supabase_jwt_local_verification and service.token_verifier.available:
+            background_tasks.append(
+                asyncio.create_task(service.token_verifier.run_refresh_loop())
+            )
+        if service.durable_storage_cleanup:
+            worker = StorageCleanupWorker(service, settings)
+            background_tasks.append(asyncio.create_task(worker.run_forever()))
+        if service.service_role_key:
+            # The purge RPC is service-role only; without the key tombstones are kept.
+            purger = TombstonePurgeWorker(service, settings)
+            background_tasks.append(asyncio.create_task(purger.run_forever()))
+
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        # Also closes the Postgres pool when SUPABASE_DATA_BACKEND=postgres.
+        service = getattr(app.state, "supabase_service", None)
+        if service is not None:
+            await service.aclose()
+        app.state.supabase_service = None
+        gemini_service = getattr(app.state, "gemini_service", None)
+        if gemini_service is not None:
+            gemini_service.close()
+        app.state.gemini_service = None
+        await app.state.supabase_http_client.aclose()
+
+
+app = FastAPI(title="Closet Planner AI API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,9 +71,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
 app.include_router(health_router, prefix=settings.api_prefix)
 app.include_router(closet_router, prefix=settings.api_prefix)
 app.include_router(outfits_router, prefix=settings.api_prefix)
 app.include_router(me_router, prefix=settings.api_prefix)
+app.include_router(metrics_router, prefix=settings.api_prefix)
@@ -2,9 +2,9 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import Literal
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, create_model, model_validator
 
 
 class ClothingCategory(str, Enum):
@@ -119,6 +119,10 @@ class MeResponse(BaseModel):
     display_name: str | None = None
 
 
+class LogoutResponse(BaseModel):
+    logged_out: bool
+
+
 class ClosetItemCreate(BaseModel):
     name: str = Field(min_length=1)
     category: ClothingCategory
@@ -162,6 +166,49 @@ class ClosetItemRecord(BaseModel):
     updated_at: datetime
 
 
+# `GET /me/closet-items?fields=...` items: the ClosetItemRecord fields, all optional, so a
+# projected row validates (and serialises) exactly like the full record.
+ClosetItemFields = create_model(
+    "ClosetItemFields",
+    **{
+        name: (field.annotation | None, None)
+        for name, field in ClosetItemRecord.model_fields.items()
+    },
+)
+
+
+class ClosetItemChanges(BaseModel):
+    items: list[ClosetItemRecord]
+    deleted_ids: list[str] = Field(default_factory=list)
+    cursor: str
+
+
+class ClosetItemBulkCreateRequest(BaseModel):
+    # Entries are validated one by one so a bad item is reported instead of failing the batch.
+    items: list[dict[str, Any]] = Field(min_length=1)
+
+
+class ClosetItemBulkResult(BaseModel):
+    index: int
+    created: bool
+    item: ClosetItemRecord | None = None
+    error: str | None = None
+
+
+class ClosetItemBulkCreateResponse(BaseModel):
+    results: list[ClosetItemBulkResult]
+    created_count: int
+    failed_count: int
+
+
+class ClosetItemBulkDeleteRequest(BaseModel):
+    ids: list[str] = Field(min_length=1)
+
+
+class ClosetItemBulkDeleteResponse(BaseModel):
+    deleted_ids: list[str]
+
+
 class SavedOutfitCreate(BaseModel):
     title: str | None = None
     occasion: str = Field(min_length=1)
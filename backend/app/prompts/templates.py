@@ -5,6 +5,10 @@ import json
 from app.models.schemas import ClosetItem, GenerateOutfitsRequest
 
 
+# Part of the per-image analysis cache key: bump it whenever ANALYZE_CLOSET_PROMPT or
+# build_analyze_closet_prompt changes.
+ANALYZE_CLOSET_PROMPT_VERSION = "1"
+
 ANALYZE_CLOSET_PROMPT = """You are a wardrobe parser.
 Return ONLY a JSON object that matches the response schema exactly.
 Do not output markdown, code fences, commentary, or extra keys.
@@ -18,6 +22,10 @@ Hard constraints:
 """
 
 
+# Part of the generate_outfits response cache key: bump it whenever the prompt text or the
+# way build_generate_outfits_prompt renders a request changes.
+GENERATE_OUTFITS_PROMPT_VERSION = "1"
+
 GENERATE_OUTFITS_PROMPT = """You are an outfit planner.
 Return ONLY a JSON object that matches the response schema exactly.
 Do not output markdown, code fences, commentary, or extra keys.
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import re
 from collections import defaultdict
+from collections.abc import Coroutine, Iterable
 from typing import Any, TypeVar
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from pydantic import BaseModel, ValidationError
 
 from app.core.config import Settings, get_settings
@@ -22,8 +25,15 @@ from app.models.schemas import (
     OutfitSuggestion,
     Season,
 )
-from app.prompts.templates import build_analyze_closet_prompt, build_generate_outfits_prompt
+from app.prompts.templates import (
+    ANALYZE_CLOSET_PROMPT_VERSION,
+    GENERATE_OUTFITS_PROMPT_VERSION,
+    build_analyze_closet_prompt,
+    build_generate_outfits_prompt,
+)
+from app.utils.cache import SQLiteTTLCache, TieredTTLCache, TTLCache, build_cache
 from app.utils.file_validation import ImagePayload
+from app.utils.single_flight import SingleFlight
 
 try:
     from google import genai
@@ -60,7 +70,56 @@ class GeminiService:
                 )
             self._client = genai.Client(api_key=settings.gemini_api_key)
 
-    def analyze_closet(
+        # Generation runs at temperature 0, so the answer is a function of the normalized
+        # request; validated answers are reused until the model or prompt version changes.
+        self.response_cache: (
+            TTLCache[GenerateOutfitsLLMResponse]
+            | SQLiteTTLCache[GenerateOutfitsLLMResponse]
+            | TieredTTLCache[GenerateOutfitsLLMResponse]
+        ) = build_cache(
+            settings.cache_backend,
+            namespace="generate_outfits_responses",
+            max_entries=settings.gemini_response_cache_max_entries,
+            ttl_seconds=settings.gemini_response_cache_ttl_seconds,
+            sqlite_path=settings.cache_sqlite_path,
+            dumps=lambda response: response.model_dump_json(),
+            loads=GenerateOutfitsLLMResponse.model_validate_json,
+            memory_front=True,
+        )
+        # Analyses per image (and per manual text), keyed by a SHA-256 of the content, so
+        # re-uploaded photos skip the model entirely.
+        self.analysis_cache: (
+            TTLCache[AnalyzeClosetLLMResponse]
+            | SQLiteTTLCache[AnalyzeClosetLLMResponse]
+            | TieredTTLCache[AnalyzeClosetLLMResponse]
+        ) = build_cache(
+            settings.cache_backend,
+            namespace="closet_image_analyses",
+            max_entries=settings.gemini_image_cache_max_entries,
+            ttl_seconds=settings.gemini_image_cache_ttl_seconds,
+            sqlite_path=settings.cache_sqlite_path,
+            dumps=lambda analysis: analysis.model_dump_json(),
+            loads=AnalyzeClosetLLMResponse.model_validate_json,
+            memory_front=True,
+        )
+        self._in_flight: SingleFlight[Any] = SingleFlight()
+        # Shared by every request on this (process-wide) service, so concurrent uploads
+        # together stay within GEMINI_ANALYZE_CONCURRENCY calls to Gemini; cache hits
+        # never wait for a slot.
+        self._analyze_slots = asyncio.Semaphore(max(1, settings.gemini_analyze_concurrency))
+
+    def cache_stats(self) -> dict[str, dict[str, float | int]]:
+        return {
+            "generate_outfits_responses": self.response_cache.stats(),
+            "closet_image_analyses": self.analysis_cache.stats(),
+            "gemini_requests": self._in_flight.stats(),
+        }
+
+    def close(self) -> None:
+        self.response_cache.close()
+        self.analysis_cache.close()
+
+    async def analyze_closet(
         self,
         *,
         manual_clothes_text: str | None,
@@ -69,25 +128,200 @@ class GeminiService:
         if self.settings.gemini_mock_mode:
             return self._mock_analyze_closet(manual_clothes_text=manual_clothes_text, images=images)
 
-        prompt = build_analyze_closet_prompt(manual_clothes_text)
-        return self._generate_json_with_retry(
-            prompt=prompt,
-            images=images,
-            schema_model=AnalyzeClosetLLMResponse,
+        # One analysis per distinct image plus one for the manual text, each cached by its
+        # content hash and run concurrently, so a bad answer only retries its own input.
+        # Identical photos in one upload describe the same clothes.
+        jobs: list[Coroutine[Any, Any, AnalyzeClosetLLMResponse]] = []
+        image_prompt = build_analyze_closet_prompt(None)
+        seen: set[str] = set()
+        for image in images:
+            digest = hashlib.sha256(image.data).hexdigest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            jobs.append(
+                self._analyze_cached(
+                    cache_key=self._analysis_cache_key("image", digest),
+                    prompt=image_prompt,
+                    images=[image],
+                )
+            )
+        if manual_clothes_text:
+            digest = hashlib.sha256(manual_clothes_text.encode("utf-8")).hexdigest()
+            jobs.append(
+                self._analyze_cached(
+                    cache_key=self._analysis_cache_key("text", digest),
+                    prompt=build_analyze_closet_prompt(manual_clothes_text),
+                    images=[],
+                )
+            )
+
+        # Let every analysis finish before surfacing a failure, so the ones that
+        # succeeded are cached and a retried upload only redoes the failed input.
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return self._merge_analyses(results, image_count=len(seen))
+
+    async def _analyze_cached(
+        self,
+        *,
+        cache_key: str,
+        prompt: str,
+        images: list[ImagePayload],
+    ) -> AnalyzeClosetLLMResponse:
+        cached = self.analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        async with self._analyze_slots:
+            analysis = await self._generate_json_with_retry(
+                prompt=prompt,
+                images=images,
+                schema_model=AnalyzeClosetLLMResponse,
+            )
+        self.analysis_cache.set(cache_key, analysis)
+        return analysis
+
+    def _analysis_cache_key(self, kind: str, digest: str) -> str:
+        return f"{self.settings.gemini_model}:{ANALYZE_CLOSET_PROMPT_VERSION}:{kind}:{digest}"
+
+    @staticmethod
+    def _dedupe_items(items: Iterable[ClosetItem]) -> list[ClosetItem]:
+        """Collapse items naming the same garment, keeping the first and filling its gaps."""
+
+        merged: dict[tuple[ClothingCategory, str, str], ClosetItem] = {}
+        for item in items:
+            key = (
+                item.category,
+                " ".join(re.findall(r"[a-z0-9]+", item.name.lower())),
+                item.color.strip().lower(),
+            )
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = item
+                continue
+            merged[key] = existing.model_copy(
+                update={
+                    "material": existing.material or item.material,
+                    "pattern": existing.pattern or item.pattern,
+                    "notes": existing.notes or item.notes,
+                    "seasonality": list(dict.fromkeys([*existing.seasonality, *item.seasonality])),
+                    "tags": list(dict.fromkeys([*existing.tags, *item.tags])),
+                }
+            )
+        return list(merged.values())
+
+    @classmethod
+    def _merge_analyses(
+        cls,
+        analyses: list[AnalyzeClosetLLMResponse],
+        *,
+        image_count: int,
+    ) -> AnalyzeClosetLLMResponse:
+        if len(analyses) == 1:
+            return analyses[0]
+
+        # Each analysis numbers its own items, so renumber to keep ids unique.
+        items = [
+            item.model_copy(update={"id": f"item-{idx}"})
+            for idx, item in enumerate(
+                cls._dedupe_items(item for analysis in analyses for item in analysis.items),
+                start=1,
+            )
+        ]
+        warnings = list(
+            dict.fromkeys(warning for analysis in analyses for warning in analysis.warnings)
+        )
+        sources = f"{image_count} image{'s' if image_count != 1 else ''}"
+        if len(analyses) > image_count:
+            sources += " and manual notes"
+        return AnalyzeClosetLLMResponse(
+            summary=f"Parsed {len(items)} clothing items from {sources}.",
+            items=items,
+            warnings=warnings,
         )
 
-    def generate_outfits(self, request: GenerateOutfitsRequest) -> GenerateOutfitsLLMResponse:
+    async def generate_outfits(self, request: GenerateOutfitsRequest) -> GenerateOutfitsLLMResponse:
         if self.settings.gemini_mock_mode:
             return self._mock_generate_outfits(request)
 
+        request = self._normalize_generate_request(request)
+        cache_key = self._generate_outfits_cache_key(request)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         prompt = build_generate_outfits_prompt(request)
-        return self._generate_json_with_retry(
+        generated = await self._generate_json_with_retry(
             prompt=prompt,
             images=[],
             schema_model=GenerateOutfitsLLMResponse,
         )
+        self.response_cache.set(cache_key, generated)
+        return generated
+
+    @staticmethod
+    def _normalize_generate_request(request: GenerateOutfitsRequest) -> GenerateOutfitsRequest:
+        # Closet order and surrounding whitespace do not change what the user asked for,
+        # so requests differing only in those share a prompt and a cache entry.
+        return request.model_copy(
+            update={
+                "closet_items": sorted(request.closet_items, key=lambda item: item.id),
+                "occasion": request.occasion.strip(),
+                "itinerary": request.itinerary.strip(),
+                "preferences": (request.preferences or "").strip() or None,
+            }
+        )
 
-    def _generate_json_with_retry(
+    def _generate_outfits_cache_key(self, request: GenerateOutfitsRequest) -> str:
+        canonical = json.dumps(
+            {
+                "model": self.settings.gemini_model,
+                "prompt_version": GENERATE_OUTFITS_PROMPT_VERSION,
+                "request": request.model_dump(mode="json"),
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=True,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def _generate_json_with_retry(
+        self,
+        *,
+        prompt: str,
+        images: list[ImagePayload],
+        schema_model: type[T],
+    ) -> T:
+        # Double clicks and duplicate tabs send identical requests at the same moment;
+        # they share one upstream call instead of each paying for their own.
+        return await self._in_flight.run(
+            self._flight_key(prompt=prompt, images=images, schema_model=schema_model),
+            lambda: self._generate_json_attempts(
+                prompt=prompt,
+                images=images,
+                schema_model=schema_model,
+            ),
+        )
+
+    def _flight_key(
+        self,
+        *,
+        prompt: str,
+        images: list[ImagePayload],
+        schema_model: type[BaseModel],
+    ) -> str:
+        digest = hashlib.sha256()
+        for part in (self.settings.gemini_model, schema_model.__name__, prompt):
+            digest.update(part.encode("utf-8") + b"\0")
+        for image in images:
+            digest.update(image.content_type.encode("utf-8") + b"\0")
+            digest.update(hashlib.sha256(image.data).digest())
+        return digest.hexdigest()
+
+    async def _generate_json_attempts(
         self,
         *,
         prompt: str,
@@ -97,7 +331,7 @@ class GeminiService:
         last_error: GeminiResponseFormatError | None = None
         for _ in range(2):
             try:
-                return self._generate_json_once(
+                return await self._generate_json_once(
                     prompt=prompt,
                     images=images,
                     schema_model=schema_model,
@@ -109,7 +343,7 @@ class GeminiService:
             "Gemini returned invalid structured JSON after retry."
         ) from last_error
 
-    def _generate_json_once(
+    async def _generate_json_once(
         self,
         *,
         prompt: str,
@@ -128,16 +362,22 @@ class GeminiService:
                 )
             )
 
+        request = {
+            "model": self.settings.gemini_model,
+            "contents": [types.Content(role="user", parts=user_parts)],
+            "config": types.GenerateContentConfig(
+                temperature=0,
+                response_mime_type="application/json",
+                response_schema=schema_model.model_json_schema(),
+            ),
+        }
         try:
-            response = self._client.models.generate_content(
-                model=self.settings.gemini_model,
-                contents=[types.Content(role="user", parts=user_parts)],
-                config=types.GenerateContentConfig(
-                    temperature=0,
-                    response_mime_type="application/json",
-                    response_schema=schema_model.model_json_schema(),
-                ),
-            )
+            async_client = getattr(self._client, "aio", None)
+            if async_client is not None:
+                response = await async_client.models.generate_content(**request)
+            else:
+                # SDK builds without the async client still must not block the event loop.
+                response = await asyncio.to_thread(self._client.models.generate_content, **request)
         except Exception as exc:
             raise GeminiServiceError("Gemini request failed before a response was returned.") from exc
 
@@ -474,5 +714,17 @@ class GeminiService:
         return names[:20]
 
 
-def get_gemini_service(settings: Settings = Depends(get_settings)) -> GeminiService:
-    return GeminiService(settings)
+async def get_gemini_service(
+    request: Request,
+    settings: Settings = Depends(get_settings),
+) -> GeminiService:
+    """Return the process-wide service, so its client and response cache outlive a request."""
+
+    state = request.app.state
+    service = getattr(state, "gemini_service", None)
+    if service is None:
+        # Async so it runs on the event loop: a sync dependency runs in the threadpool,
+        # where concurrent first requests could each build a service and leak one.
+        service = GeminiService(settings)
+        state.gemini_service = service
+    return service
@@ -0,0 +1,164 @@
+"""Local verification of Supabase access tokens against a cached JWKS or shared secret."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+
+try:
+    import jwt
+except Exception:  # pragma: no cover - dependency import fallback
+    jwt = None
+
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+SHARED_SECRET_ALGORITHMS = {"HS256"}
+
+# Unknown key ids trigger an on-demand JWKS refresh at most this often.
+MIN_ON_DEMAND_REFRESH_SECONDS = 30.0
+
+
+def read_unverified_expiry(access_token: str) -> float | None:
+    """Return the `exp` claim without checking the signature; only use it to shorten lifetimes."""
+
+    try:
+        payload_segment = access_token.split(".")[1]
+        padded = payload_segment + "=" * (-len(payload_segment) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(padded)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token is definitely invalid (bad signature, expired, wrong audience)."""
+
+
+class TokenVerificationUnavailable(Exception):
+    """Raised when local verification cannot decide and a remote check is needed."""
+
+
+class SupabaseJWTVerifier:
+    def __init__(self, settings: Settings, *, client: httpx.AsyncClient):
+        supabase_url = (settings.supabase_url or "").rstrip("/")
+        self.jwks_url = f"{supabase_url}/auth/v1/.well-known/jwks.json"
+        # Custom domains and proxies change `iss`; SUPABASE_JWT_ISSUER overrides the default.
+        self.issuer = settings.supabase_jwt_issuer or f"{supabase_url}/auth/v1"
+        self.audience = settings.supabase_jwt_audience
+        self.shared_secret = settings.supabase_jwt_secret or ""
+        self.refresh_seconds = settings.supabase_jwks_refresh_seconds
+        self.publishable_key = settings.supabase_publishable_key or ""
+        self._client = client
+        self._keys: dict[str, Any] = {}
+        self._keys_fetched_at: float | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def available(self) -> bool:
+        return jwt is not None
+
+    async def verify(self, access_token: str) -> dict[str, Any]:
+        """Return verified claims, or raise when the token is invalid or cannot be checked locally."""
+
+        if jwt is None:
+            raise TokenVerificationUnavailable("PyJWT is not installed.")
+
+        try:
+            header = jwt.get_unverified_header(access_token)
+        except jwt.PyJWTError as exc:
+            raise TokenVerificationError("Malformed Supabase session token.") from exc
+
+        algorithm = header.get("alg")
+        if algorithm in SHARED_SECRET_ALGORITHMS:
+            if not self.shared_secret:
+                raise TokenVerificationUnavailable("SUPABASE_JWT_SECRET is not configured.")
+            key: Any = self.shared_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = await self._signing_key(header.get("kid"))
+        else:
+            raise TokenVerificationError(f"Unsupported token algorithm: {algorithm}.")
+
+        try:
+            return jwt.decode(
+                access_token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.ExpiredSignatureError as exc:
+            raise TokenVerificationError("Supabase session token has expired.") from exc
+        except jwt.InvalidIssuerError as exc:
+            # A validly signed token from an unexpected issuer usually means a misconfigured
+            # issuer rather than a forged token, so let Supabase Auth decide.
+            raise TokenVerificationUnavailable("Unexpected Supabase token issuer.") from exc
+        except jwt.PyJWTError as exc:
+            raise TokenVerificationError("Invalid Supabase session token.") from exc
+
+    async def refresh_keys(self) -> None:
+        async with self._refresh_lock:
+            response = await self._client.get(
+                self.jwks_url,
+                headers={"apikey": self.publishable_key},
+            )
+            if response.status_code >= 400:
+                raise TokenVerificationUnavailable(
+                    f"Supabase JWKS fetch failed ({response.status_code})."
+                )
+
+            keys: dict[str, Any] = {}
+            for jwk in response.json().get("keys", []):
+                kid = jwk.get("kid")
+                if not kid:
+                    continue
+                try:
+                    keys[kid] = jwt.PyJWK(jwk)
+                except jwt.PyJWTError:
+                    logger.warning("Skipping unusable Supabase JWK %s.", kid)
+
+            self._keys = keys
+            self._keys_fetched_at = time.monotonic()
+
+    async def run_refresh_loop(self) -> None:
+        """Keep the JWKS warm so request-time verification never waits on the network."""
+
+        while True:
+            try:
+                await self.refresh_keys()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Supabase JWKS refresh failed; keeping cached keys.", exc_info=True)
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def _signing_key(self, kid: str | None) -> Any:
+        if not kid:
+            raise TokenVerificationUnavailable("Token header is missing kid.")
+
+        signing_key = self._keys.get(kid)
+        if signing_key is not None:
+            return signing_key.key
+
+        # The key may have been rotated since the last refresh; re-fetch, but not on every request.
+        fetched_at = self._keys_fetched_at
+        if fetched_at is None or time.monotonic() - fetched_at >= MIN_ON_DEMAND_REFRESH_SECONDS:
+            try:
+                await self.refresh_keys()
+            except (httpx.HTTPError, TokenVerificationUnavailable) as exc:
+                raise TokenVerificationUnavailable("Supabase JWKS is unavailable.") from exc
+            signing_key = self._keys.get(kid)
+            if signing_key is not None:
+                return signing_key.key
+
+        raise TokenVerificationUnavailable(f"No cached signing key for kid {kid}.")
@@ -0,0 +1,435 @@
+"""Direct Postgres data access over an asyncpg pool (SUPABASE_DATA_BACKEND=postgres).
+
+Every call runs in its own transaction with the caller's JWT claims and the
+`authenticated` role set locally, so the same RLS policies apply as through PostgREST.
+asyncpg prepares and caches each statement per connection; set
+SUPABASE_DB_STATEMENT_CACHE_SIZE=0 when connecting through a transaction-mode pooler.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any
+
+from app.core.config import Settings
+from app.services.repository import Row, Tombstone, select_columns
+from app.services.supabase_errors import SupabaseServiceError
+from app.utils.pagination import decode_cursor
+
+try:
+    import asyncpg
+except Exception:  # pragma: no cover - dependency import fallback
+    asyncpg = None
+
+
+# Columns callers may write; table and column names are never taken from requests.
+WRITABLE_COLUMNS = {
+    "closet_items": {
+        "user_id",
+        "name",
+        "category",
+        "color",
+        "material",
+        "pattern",
+        "formality",
+        "seasonality",
+        "tags",
+        "notes",
+        "image_path",
+        "image_mime_type",
+    },
+    "saved_outfits": {
+        "user_id",
+        "title",
+        "occasion",
+        "itinerary",
+        "outfit_snapshot",
+        "global_tips",
+    },
+}
+VERSION_COLUMNS = {
+    ("closet_items", "updated_at"),
+    ("saved_outfits", "created_at"),
+}
+
+SET_REQUEST_CONTEXT_SQL = (
+    "select set_config('request.jwt.claims', $1, true), set_config('role', 'authenticated', true)"
+)
+
+
+def keyset_query(
+    table: str,
+    *,
+    user_id: str,
+    cursor: str | None,
+    limit: int | None,
+    columns: Sequence[str] | None = None,
+) -> tuple[str, list[Any]]:
+    """SQL for the page after `cursor`, newest first, fetching one extra row to detect more."""
+
+    query = f"select {select_columns(columns)} from public.{table} where user_id = $1"
+    args: list[Any] = [user_id]
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        args.extend([datetime.fromisoformat(created_at), row_id])
+        query += " and (created_at, id) < ($2, $3)"
+    query += " order by created_at desc, id desc"
+    if limit is not None:
+        args.append(limit + 1)
+        query += f" limit ${len(args)}"
+    return query, args
+
+
+def insert_query(table: str, values: Row) -> tuple[str, list[Any]]:
+    columns = _checked_columns(table, values)
+    placeholders = ", ".join(f"${index}" for index in range(1, len(columns) + 1))
+    query = (
+        f"insert into public.{table} ({', '.join(columns)}) "
+        f"values ({placeholders}) returning *"
+    )
+    return query, [values[column] for column in columns]
+
+
+def bulk_insert_query(table: str, values: list[Row]) -> tuple[str, list[Any]]:
+    """One INSERT for many rows, expanding a jsonb array the way PostgREST does.
+
+    COPY would be faster still, but Postgres rejects COPY FROM on tables with RLS enabled.
+    """
+
+    columns = sorted({column for row in values for column in _checked_columns(table, row)})
+    column_list = ", ".join(columns)
+    query = (
+        f"insert into public.{table} ({column_list}) "
+        f"select {column_list} from jsonb_populate_recordset(null::public.{table}, $1::jsonb) "
+        "returning *"
+    )
+    return query, [values]
+
+
+def update_query(table: str, *, row_id: str, user_id: str, values: Row) -> tuple[str, list[Any]]:
+    columns = _checked_columns(table, values)
+    assignments = ", ".join(f"{column} = ${index}" for index, column in enumerate(columns, start=3))
+    query = f"update public.{table} set {assignments} where id = $1 and user_id = $2 returning *"
+    return query, [row_id, user_id, *(values[column] for column in columns)]
+
+
+def _checked_columns(table: str, values: Row) -> list[str]:
+    columns = sorted(values)
+    unknown = set(columns) - WRITABLE_COLUMNS[table]
+    if unknown:
+        raise SupabaseServiceError(f"Unknown {table} columns: {', '.join(sorted(unknown))}.")
+    return columns
+
+
+def _record_to_row(record: Any) -> Row:
+    # PostgREST returns uuids as strings; match it so records validate identically.
+    return {
+        key: str(value) if isinstance(value, uuid.UUID) else value
+        for key, value in record.items()
+    }
+
+
+async def _init_connection(connection: Any) -> None:
+    await connection.set_type_codec(
+        "jsonb",
+        encoder=json.dumps,
+        decoder=json.loads,
+        schema="pg_catalog",
+    )
+
+
+class PostgresRepository:
+    def __init__(self, settings: Settings):
+        if asyncpg is None:
+            raise SupabaseServiceError(
+                "SUPABASE_DATA_BACKEND=postgres requires the asyncpg package."
+            )
+        if not settings.supabase_db_url:
+            raise SupabaseServiceError(
+                "SUPABASE_DB_URL is required when SUPABASE_DATA_BACKEND=postgres."
+            )
+
+        self.settings = settings
+        self._pool: Any = None
+        self._pool_lock = asyncio.Lock()
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _get_pool(self) -> Any:
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        dsn=self.settings.supabase_db_url,
+                        min_size=self.settings.supabase_db_pool_min_size,
+                        max_size=self.settings.supabase_db_pool_max_size,
+                        statement_cache_size=self.settings.supabase_db_statement_cache_size,
+                        command_timeout=self.settings.supabase_db_command_timeout_seconds,
+                        init=_init_connection,
+                    )
+        return self._pool
+
+    @asynccontextmanager
+    async def _transaction(
+        self,
+        user_id: str,
+        *,
+        readonly: bool = False,
+        isolation: str = "read_committed",
+    ) -> AsyncIterator[Any]:
+        """Yield a connection inside a transaction scoped to `user_id` for RLS."""
+
+        claims = json.dumps({"sub": user_id, "role": "authenticated"})
+        try:
+            pool = await self._get_pool()
+            async with pool.acquire() as connection:
+                async with connection.transaction(isolation=isolation, readonly=readonly):
+                    await connection.execute(SET_REQUEST_CONTEXT_SQL, claims)
+                    yield connection
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as exc:
+            raise SupabaseServiceError(f"Supabase Postgres query failed: {exc}") from exc
+
+    async def _fetch(self, user_id: str, query: str, *args: Any) -> list[Row]:
+        async with self._transaction(user_id) as connection:
+            records = await connection.fetch(query, *args)
+        return [_record_to_row(record) for record in records]
+
+    async def _fetch_one(self, user_id: str, query: str, *args: Any) -> Row | None:
+        rows = await self._fetch(user_id, query, *args)
+        return rows[0] if rows else None
+
+    async def upsert_profile(
+        self,
+        *,
+        user_id: str,
+        display_name: str | None,
+        access_token: str | None = None,
+    ) -> None:
+        async with self._transaction(user_id) as connection:
+            await connection.execute(
+                "insert into public.profiles (user_id, display_name) values ($1, $2) "
+                "on conflict (user_id) do update set display_name = excluded.display_name",
+                user_id,
+                display_name,
+            )
+
+    async def list_closet_items(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        columns: Sequence[str] | None = None,
+        access_token: str | None = None,
+    ) -> list[Row]:
+        query, args = keyset_query(
+            "closet_items",
+            user_id=user_id,
+            cursor=cursor,
+            limit=limit,
+            columns=columns,
+        )
+        return await self._fetch(user_id, query, *args)
+
+    async def list_closet_item_changes(
+        self,
+        *,
+        user_id: str,
+        since: datetime | None,
+        access_token: str | None = None,
+    ) -> tuple[list[Row], list[Tombstone], datetime]:
+        # One snapshot for both reads, so no update or delete can slip between them.
+        async with self._transaction(
+            user_id,
+            readonly=True,
+            isolation="repeatable_read",
+        ) as connection:
+            if since is None:
+                records = await connection.fetch(
+                    "select * from public.closet_items where user_id = $1 order by updated_at asc",
+                    user_id,
+                )
+                tombstones = []
+            else:
+                records = await connection.fetch(
+                    "select * from public.closet_items where user_id = $1 and updated_at > $2 "
+                    "order by updated_at asc",
+                    user_id,
+                    since,
+                )
+                tombstones = await connection.fetch(
+                    "select item_id, deleted_at from public.closet_item_deletions "
+                    "where user_id = $1 and deleted_at > $2 order by deleted_at asc",
+                    user_id,
+                    since,
+                )
+            server_time = await connection.fetchval("select now()")
+        return (
+            [_record_to_row(record) for record in records],
+            [(str(record["item_id"]), record["deleted_at"]) for record in tombstones],
+            server_time,
+        )
+
+    async def collection_version(
+        self,
+        table: str,
+        column: str,
+        *,
+        user_id: str,
+        access_token: str | None = None,
+    ) -> tuple[int, str | None]:
+        if (table, column) not in VERSION_COLUMNS:
+            raise SupabaseServiceError(f"Unsupported collection version column {table}.{column}.")
+
+        row = await self._fetch_one(
+            user_id,
+            f"select count(*) as total, max({column}) as latest from public.{table} where user_id = $1",
+            user_id,
+        )
+        latest = row["latest"] if row else None
+        return (row["total"] if row else 0), (latest.isoformat() if latest else None)
+
+    async def get_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        return await self._fetch_one(
+            user_id,
+            "select * from public.closet_items where id = $1 and user_id = $2",
+            item_id,
+            user_id,
+        )
+
+    async def insert_closet_item(
+        self,
+        *,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row:
+        query, args = insert_query("closet_items", values)
+        return await self._fetch_one(values["user_id"], query, *args)
+
+    async def insert_closet_items(
+        self,
+        *,
+        values: list[Row],
+        access_token: str | None = None,
+    ) -> list[Row]:
+        if not values:
+            return []
+        query, args = bulk_insert_query("closet_items", values)
+        return await self._fetch(values[0]["user_id"], query, *args)
+
+    async def update_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row | None:
+        query, args = update_query("closet_items", row_id=item_id, user_id=user_id, values=values)
+        return await self._fetch_one(user_id, query, *args)
+
+    async def replace_closet_item_image(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        image_path: str | None,
+        image_mime_type: str | None,
+        access_token: str | None = None,
+    ) -> tuple[str | None, Row] | None:
+        # The row lock in the subquery makes the old path read and the swap one atomic step.
+        row = await self._fetch_one(
+            user_id,
+            "update public.closet_items as item "
+            "set image_path = $3, image_mime_type = $4 "
+            "from (select id, image_path from public.closet_items "
+            "where id = $1 and user_id = $2 for update) as previous "
+            "where item.id = previous.id "
+            "returning previous.image_path as old_image_path, item.*",
+            item_id,
+            user_id,
+            image_path,
+            image_mime_type,
+        )
+        if row is None:
+            return None
+        old_image_path = row.pop("old_image_path")
+        return old_image_path, row
+
+    async def delete_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        return await self._fetch_one(
+            user_id,
+            "delete from public.closet_items where id = $1 and user_id = $2 "
+            "returning id, image_path",
+            item_id,
+            user_id,
+        )
+
+    async def delete_closet_items(
+        self,
+        *,
+        user_id: str,
+        item_ids: list[str],
+        access_token: str | None = None,
+    ) -> list[Row]:
+        return await self._fetch(
+            user_id,
+            "delete from public.closet_items where user_id = $1 and id = any($2::uuid[]) "
+            "returning id, image_path",
+            user_id,
+            item_ids,
+        )
+
+    async def list_saved_outfits(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> list[Row]:
+        query, args = keyset_query("saved_outfits", user_id=user_id, cursor=cursor, limit=limit)
+        return await self._fetch(user_id, query, *args)
+
+    async def insert_saved_outfit(
+        self,
+        *,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row:
+        query, args = insert_query("saved_outfits", values)
+        return await self._fetch_one(values["user_id"], query, *args)
+
+    async def delete_saved_outfit(
+        self,
+        *,
+        user_id: str,
+        saved_outfit_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        return await self._fetch_one(
+            user_id,
+            "delete from public.saved_outfits where id = $1 and user_id = $2 returning id",
+            saved_outfit_id,
+            user_id,
+        )
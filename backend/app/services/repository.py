@@ -0,0 +1,542 @@
+"""Row-level data access for closet items, saved outfits, and profiles.
+
+`SupabaseService` owns auth, storage, and record validation; repositories only move
+rows. The default repository talks to PostgREST over the shared HTTP client, and
+`app.services.postgres_repository` offers a direct Postgres pool with the same rows.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from datetime import datetime
+from typing import Any, Protocol
+
+import httpx
+
+from app.services.supabase_errors import SupabaseServiceError
+from app.utils.pagination import keyset_params
+
+Row = dict[str, Any]
+# A result set as decoded rows, or as the raw JSON array body that PostgREST returned.
+RowsPayload = bytes | list[Row]
+Tombstone = tuple[str, datetime]
+
+# Every readable closet_items column; projections are always checked against this list.
+CLOSET_ITEM_COLUMNS = (
+    "id",
+    "user_id",
+    "name",
+    "category",
+    "color",
+    "material",
+    "pattern",
+    "formality",
+    "seasonality",
+    "tags",
+    "notes",
+    "image_path",
+    "image_mime_type",
+    "created_at",
+    "updated_at",
+)
+
+
+def select_columns(columns: Sequence[str] | None) -> str:
+    """Column list for a projection, or `*` when the caller needs whole rows."""
+
+    if not columns:
+        return "*"
+    unknown = set(columns) - set(CLOSET_ITEM_COLUMNS)
+    if unknown:
+        raise SupabaseServiceError(f"Unknown closet_items columns: {', '.join(sorted(unknown))}.")
+    return ",".join(columns)
+
+
+def in_filter(values: list[str]) -> str:
+    """PostgREST `in.(...)` filter with every value quoted, so commas or parens stay literal."""
+
+    quoted = ",".join(
+        '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values
+    )
+    return f"in.({quoted})"
+
+
+class DataRepository(Protocol):
+    async def aclose(self) -> None: ...
+
+    async def upsert_profile(
+        self,
+        *,
+        user_id: str,
+        display_name: str | None,
+        access_token: str | None = None,
+    ) -> None: ...
+
+    async def list_closet_items(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        columns: Sequence[str] | None = None,
+        access_token: str | None = None,
+    ) -> RowsPayload:
+        """Newest-first rows after `cursor`, fetching `limit + 1` so callers can detect more.
+
+        `columns` projects each row onto those closet_items columns; None selects all.
+        """
+        ...
+
+    async def list_closet_item_changes(
+        self,
+        *,
+        user_id: str,
+        since: datetime | None,
+        access_token: str | None = None,
+    ) -> tuple[list[Row], list[Tombstone], datetime]:
+        """Rows and tombstones after `since` from one snapshot, plus the database's `now()`.
+
+        With `since=None`, every row and no tombstones.
+        """
+        ...
+
+    async def collection_version(
+        self,
+        table: str,
+        column: str,
+        *,
+        user_id: str,
+        access_token: str | None = None,
+    ) -> tuple[int, str | None]: ...
+
+    async def get_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        access_token: str | None = None,
+    ) -> Row | None: ...
+
+    async def insert_closet_item(
+        self,
+        *,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row: ...
+
+    async def insert_closet_items(
+        self,
+        *,
+        values: list[Row],
+        access_token: str | None = None,
+    ) -> list[Row]:
+        """Insert every row in one statement; returned rows follow the input order."""
+        ...
+
+    async def update_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row | None: ...
+
+    async def replace_closet_item_image(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        image_path: str | None,
+        image_mime_type: str | None,
+        access_token: str | None = None,
+    ) -> tuple[str | None, Row] | None:
+        """Atomically swap the image columns; returns the previous path and the updated row."""
+        ...
+
+    async def delete_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        """Delete and return the row's `id` and `image_path`, or None when nothing matched."""
+        ...
+
+    async def delete_closet_items(
+        self,
+        *,
+        user_id: str,
+        item_ids: list[str],
+        access_token: str | None = None,
+    ) -> list[Row]: ...
+
+    async def list_saved_outfits(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> list[Row]: ...
+
+    async def insert_saved_outfit(
+        self,
+        *,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row: ...
+
+    async def delete_saved_outfit(
+        self,
+        *,
+        user_id: str,
+        saved_outfit_id: str,
+        access_token: str | None = None,
+    ) -> Row | None: ...
+
+
+class PostgrestRepository:
+    def __init__(
+        self,
+        *,
+        supabase_url: str,
+        client: httpx.AsyncClient,
+        data_headers: Callable[..., dict[str, str]],
+    ):
+        self.supabase_url = supabase_url
+        self._client = client
+        self._data_headers = data_headers
+
+    async def aclose(self) -> None:
+        # The HTTP client belongs to the service (or the app lifespan), not the repository.
+        return None
+
+    async def upsert_profile(
+        self,
+        *,
+        user_id: str,
+        display_name: str | None,
+        access_token: str | None = None,
+    ) -> None:
+        await self.request(
+            "POST",
+            "profiles",
+            params={"on_conflict": "user_id"},
+            json={"user_id": user_id, "display_name": display_name},
+            headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+            access_token=access_token,
+        )
+
+    async def list_closet_items(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        columns: Sequence[str] | None = None,
+        access_token: str | None = None,
+    ) -> RowsPayload:
+        # Hand back the undecoded body so the service can validate it straight from bytes.
+        response = await self.send(
+            "GET",
+            "closet_items",
+            params={
+                "select": select_columns(columns),
+                "user_id": f"eq.{user_id}",
+                **keyset_params(cursor, limit),
+            },
+            access_token=access_token,
+        )
+        return response.content or b"[]"
+
+    async def list_closet_item_changes(
+        self,
+        *,
+        user_id: str,
+        since: datetime | None,
+        access_token: str | None = None,
+    ) -> tuple[list[Row], list[Tombstone], datetime]:
+        result = await self.request(
+            "POST",
+            "rpc/closet_item_changes",
+            json={"p_user_id": user_id, "p_since": since.isoformat() if since else None},
+            access_token=access_token,
+        )
+        return (
+            result["items"],
+            [
+                (str(row["item_id"]), datetime.fromisoformat(row["deleted_at"]))
+                for row in result["deletions"]
+            ],
+            datetime.fromisoformat(result["server_time"]),
+        )
+
+    async def collection_version(
+        self,
+        table: str,
+        column: str,
+        *,
+        user_id: str,
+        access_token: str | None = None,
+    ) -> tuple[int, str | None]:
+        """Row count and newest `column` value for a user's rows, via one single-row query."""
+
+        response = await self.send(
+            "GET",
+            table,
+            params={
+                "select": column,
+                "user_id": f"eq.{user_id}",
+                "order": f"{column}.desc",
+                "limit": "1",
+            },
+            headers={"Prefer": "count=exact"},
+            access_token=access_token,
+        )
+        # Content-Range looks like "0-0/42" (or "*/0" for no rows).
+        total = response.headers.get("content-range", "*/0").rpartition("/")[2]
+        rows = response.json() if response.text else []
+        latest = rows[0][column] if rows else None
+        return (int(total) if total.isdigit() else 0), latest
+
+    async def get_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        rows = await self.request(
+            "GET",
+            "closet_items",
+            params={
+                "select": "*",
+                "id": f"eq.{item_id}",
+                "user_id": f"eq.{user_id}",
+                "limit": "1",
+            },
+            access_token=access_token,
+        )
+        return rows[0] if rows else None
+
+    async def insert_closet_item(
+        self,
+        *,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row:
+        rows = await self.request(
+            "POST",
+            "closet_items",
+            json=values,
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows[0]
+
+    async def insert_closet_items(
+        self,
+        *,
+        values: list[Row],
+        access_token: str | None = None,
+    ) -> list[Row]:
+        rows = await self.request(
+            "POST",
+            "closet_items",
+            json=values,
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows or []
+
+    async def update_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row | None:
+        rows = await self.request(
+            "PATCH",
+            "closet_items",
+            params={
+                "id": f"eq.{item_id}",
+                "user_id": f"eq.{user_id}",
+                "select": "*",
+            },
+            json=values,
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows[0] if rows else None
+
+    async def replace_closet_item_image(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        image_path: str | None,
+        image_mime_type: str | None,
+        access_token: str | None = None,
+    ) -> tuple[str | None, Row] | None:
+        result = await self.request(
+            "POST",
+            "rpc/replace_closet_item_image",
+            json={
+                "p_item_id": item_id,
+                "p_user_id": user_id,
+                "p_image_path": image_path,
+                "p_image_mime_type": image_mime_type,
+            },
+            access_token=access_token,
+        )
+        if not result:
+            return None
+        return result.get("old_image_path"), result["item"]
+
+    async def delete_closet_item(
+        self,
+        *,
+        user_id: str,
+        item_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        rows = await self.request(
+            "DELETE",
+            "closet_items",
+            params={
+                "id": f"eq.{item_id}",
+                "user_id": f"eq.{user_id}",
+                "select": "id,image_path",
+            },
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows[0] if rows else None
+
+    async def delete_closet_items(
+        self,
+        *,
+        user_id: str,
+        item_ids: list[str],
+        access_token: str | None = None,
+    ) -> list[Row]:
+        rows = await self.request(
+            "DELETE",
+            "closet_items",
+            params={
+                "id": in_filter(item_ids),
+                "user_id": f"eq.{user_id}",
+                "select": "id,image_path",
+            },
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows or []
+
+    async def list_saved_outfits(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> list[Row]:
+        rows = await self.request(
+            "GET",
+            "saved_outfits",
+            params={
+                "select": "*",
+                "user_id": f"eq.{user_id}",
+                **keyset_params(cursor, limit),
+            },
+            access_token=access_token,
+        )
+        return rows or []
+
+    async def insert_saved_outfit(
+        self,
+        *,
+        values: Row,
+        access_token: str | None = None,
+    ) -> Row:
+        rows = await self.request(
+            "POST",
+            "saved_outfits",
+            json=values,
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows[0]
+
+    async def delete_saved_outfit(
+        self,
+        *,
+        user_id: str,
+        saved_outfit_id: str,
+        access_token: str | None = None,
+    ) -> Row | None:
+        rows = await self.request(
+            "DELETE",
+            "saved_outfits",
+            params={
+                "id": f"eq.{saved_outfit_id}",
+                "user_id": f"eq.{user_id}",
+                "select": "id",
+            },
+            headers={"Prefer": "return=representation"},
+            access_token=access_token,
+        )
+        return rows[0] if rows else None
+
+    async def request(
+        self,
+        method: str,
+        table: str,
+        *,
+        params: dict[str, str] | None = None,
+        json: dict | list | None = None,
+        headers: dict[str, str] | None = None,
+        access_token: str | None = None,
+    ):
+        response = await self.send(
+            method,
+            table,
+            params=params,
+            json=json,
+            headers=headers,
+            access_token=access_token,
+        )
+        if not response.text:
+            return None
+        return response.json()
+
+    async def send(
+        self,
+        method: str,
+        table: str,
+        *,
+        params: dict[str, str] | None = None,
+        json: dict | list | None = None,
+        headers: dict[str, str] | None = None,
+        access_token: str | None = None,
+    ) -> httpx.Response:
+        request_headers = dict(self._data_headers(access_token=access_token))
+        if headers:
+            request_headers.update(headers)
+
+        response = await self._client.request(
+            method,
+            f"{self.supabase_url}/rest/v1/{table}",
+            params=params,
+            json=json,
+            headers=request_headers,
+        )
+        if response.status_code >= 400:
+            raise SupabaseServiceError(
+                f"Supabase REST request failed ({response.status_code}): {response.text}"
+            )
+        return response
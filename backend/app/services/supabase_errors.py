@@ -0,0 +1,17 @@
+"""Exceptions raised by the Supabase service layer and its data repositories."""
+
+
+class SupabaseServiceError(Exception):
+    """Base exception for Supabase integration errors."""
+
+
+class SupabaseAuthError(SupabaseServiceError):
+    """Raised when user auth verification fails."""
+
+
+class SupabaseNotFoundError(SupabaseServiceError):
+    """Raised when expected rows are missing."""
+
+
+class SyncCursorExpiredError(SupabaseServiceError):
+    """Raised when a sync cursor predates the tombstone retention window."""
@@ -2,38 +2,120 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import importlib.util
+import logging
 import mimetypes
+import time
+import uuid
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any, TypeVar
 from urllib.parse import quote
 
 import httpx
-from fastapi import Depends
+from fastapi import Depends, Request
+from pydantic import TypeAdapter
 
 from app.core.config import Settings, get_settings
 from app.models.schemas import (
     AuthenticatedUser,
     ClosetItem,
+    ClosetItemChanges,
     ClosetItemCreate,
+    ClosetItemFields,
     ClosetItemRecord,
     ClosetItemUpdate,
     SavedOutfitCreate,
     SavedOutfitRecord,
 )
+from app.services.jwt_verifier import (
+    SupabaseJWTVerifier,
+    TokenVerificationError,
+    TokenVerificationUnavailable,
+    read_unverified_expiry,
+)
+from app.services.postgres_repository import PostgresRepository
+from app.services.repository import (
+    CLOSET_ITEM_COLUMNS,
+    DataRepository,
+    PostgrestRepository,
+    RowsPayload,
+    in_filter,
+)
+from app.services.supabase_errors import (
+    SupabaseAuthError,
+    SupabaseNotFoundError,
+    SupabaseServiceError,
+    SyncCursorExpiredError,
+)
+from app.utils.cache import SQLiteTTLCache, TTLCache, build_cache
+from app.utils.http_caching import build_etag
+from app.utils.pagination import (
+    Page,
+    decode_sync_cursor,
+    encode_cursor,
+    encode_sync_cursor,
+)
+
+logger = logging.getLogger(__name__)
+
+PagedRecord = TypeVar("PagedRecord", ClosetItemRecord, ClosetItemFields, SavedOutfitRecord)
+ModelT = TypeVar("ModelT", ClosetItem, ClosetItemRecord, ClosetItemFields)
+SignableRecord = TypeVar("SignableRecord", ClosetItemRecord, ClosetItemFields)
+
+# Whole result sets are validated in one pydantic-core call; REST bodies go straight from
+# bytes to models without a json.loads pass. DB check constraints already guarantee the
+# enums and non-null arrays, so rows need no per-row normalisation first.
+CLOSET_ITEM_RECORDS_ADAPTER = TypeAdapter(list[ClosetItemRecord])
+CLOSET_ITEM_FIELDS_ADAPTER = TypeAdapter(list[ClosetItemFields])
+GENERATION_CLOSET_ADAPTER = TypeAdapter(list[ClosetItem])
+# Outfit generation only reads the ClosetItem columns.
+GENERATION_CLOSET_COLUMNS = tuple(ClosetItem.model_fields)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
 
 
-class SupabaseServiceError(Exception):
-    """Base exception for Supabase integration errors."""
+def _validate_rows(adapter: TypeAdapter[list[ModelT]], rows: RowsPayload) -> list[ModelT]:
+    if isinstance(rows, bytes):
+        return adapter.validate_json(rows)
+    return adapter.validate_python(rows)
 
 
-class SupabaseAuthError(SupabaseServiceError):
-    """Raised when user auth verification fails."""
+def build_supabase_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Build the pooled HTTP client shared by every Supabase call in the process."""
 
+    if settings.supabase_http2 and importlib.util.find_spec("h2") is None:
+        raise SupabaseServiceError(
+            "SUPABASE_HTTP2=true requires the h2 package. Install httpx[http2] first."
+        )
 
-class SupabaseNotFoundError(SupabaseServiceError):
-    """Raised when expected rows are missing."""
+    return httpx.AsyncClient(
+        timeout=settings.supabase_http_timeout_seconds,
+        limits=httpx.Limits(
+            max_connections=settings.supabase_http_max_connections,
+            max_keepalive_connections=settings.supabase_http_max_keepalive_connections,
+            keepalive_expiry=settings.supabase_http_keepalive_expiry_seconds,
+        ),
+        http2=settings.supabase_http2,
+    )
 
 
 class SupabaseService:
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        client: httpx.AsyncClient | None = None,
+        repository: DataRepository | None = None,
+    ):
         self.settings = settings
         self.supabase_url = (settings.supabase_url or "").rstrip("/")
         self.publishable_key = settings.supabase_publishable_key or ""
@@ -47,7 +129,92 @@ class SupabaseService:
                 "SUPABASE_PUBLISHABLE_KEY is required for authenticated APIs."
             )
 
-        self._client = httpx.Client(timeout=30)
+        # A shared client is owned by the app lifespan; a private one is owned by this service.
+        self._owns_client = client is None
+        self._client = client if client is not None else build_supabase_http_client(settings)
+        self.token_verifier = SupabaseJWTVerifier(settings, client=self._client)
+        self.access_token_cache: TTLCache[AuthenticatedUser] = TTLCache(
+            max_entries=settings.supabase_auth_cache_max_entries,
+            ttl_seconds=settings.supabase_auth_cache_ttl_seconds,
+        )
+        # Reusing a signed URL until shortly before it expires keeps image URLs stable for
+        # browser and CDN caching; entries are dropped whenever an item's image changes.
+        self.signed_url_cache: TTLCache[str] = TTLCache(
+            max_entries=settings.supabase_signed_url_cache_max_entries,
+            ttl_seconds=max(
+                0.0,
+                settings.supabase_signed_url_expires_seconds
+                - settings.supabase_signed_url_refresh_margin_seconds,
+            ),
+        )
+        # Outfit generation reads the whole closet but none of the image fields, so keep the
+        # unsigned generation view per user; every closet write drops the user's entry.
+        self.closet_cache: TTLCache[list[ClosetItem]] | SQLiteTTLCache[list[ClosetItem]]
+        self.closet_cache = build_cache(
+            settings.cache_backend,
+            namespace="closet_items",
+            max_entries=settings.closet_cache_max_entries,
+            ttl_seconds=settings.closet_cache_ttl_seconds,
+            sqlite_path=settings.cache_sqlite_path,
+            dumps=lambda items: GENERATION_CLOSET_ADAPTER.dump_json(items).decode("utf-8"),
+            loads=GENERATION_CLOSET_ADAPTER.validate_json,
+        )
+        # The last display name written per user, so GET /me only upserts when it changes.
+        self.profile_cache: TTLCache[dict] | SQLiteTTLCache[dict] = build_cache(
+            settings.cache_backend,
+            namespace="profiles",
+            max_entries=settings.profile_cache_max_entries,
+            ttl_seconds=settings.profile_cache_ttl_seconds,
+            sqlite_path=settings.cache_sqlite_path,
+        )
+        # Wall-clock time of each user's last closet write, kept in the same backend as the
+        # closet cache so a read that started before a write in any worker cannot put the
+        # old closet back.
+        self._closet_written_at: TTLCache[float] | SQLiteTTLCache[float] = build_cache(
+            settings.cache_backend,
+            namespace="closet_written_at",
+            max_entries=settings.closet_cache_max_entries,
+            ttl_seconds=60.0,
+            sqlite_path=settings.cache_sqlite_path,
+        )
+        # Auth and Storage always go over HTTP; table rows can use a direct Postgres pool.
+        self.rest = PostgrestRepository(
+            supabase_url=self.supabase_url,
+            client=self._client,
+            data_headers=self._data_headers,
+        )
+        if repository is not None:
+            self.repository: DataRepository = repository
+        elif settings.supabase_data_backend == "postgres":
+            self.repository = PostgresRepository(settings)
+        else:
+            self.repository = self.rest
+        self._cleanup_tasks: set[asyncio.Task] = set()
+
+    @property
+    def durable_storage_cleanup(self) -> bool:
+        """Whether the storage_cleanup_queue worker, rather than this process, removes old objects."""
+
+        return self.settings.storage_cleanup_queue_enabled and bool(self.service_role_key)
+
+    def cache_stats(self) -> dict[str, dict[str, float | int]]:
+        return {
+            "access_tokens": self.access_token_cache.stats(),
+            "signed_urls": self.signed_url_cache.stats(),
+            "closet_items": self.closet_cache.stats(),
+            "profiles": self.profile_cache.stats(),
+        }
+
+    async def aclose(self) -> None:
+        # Let in-flight storage cleanups finish before their client goes away.
+        if self._cleanup_tasks:
+            await asyncio.gather(*self._cleanup_tasks, return_exceptions=True)
+        await self.repository.aclose()
+        self.closet_cache.close()
+        self._closet_written_at.close()
+        self.profile_cache.close()
+        if self._owns_client:
+            await self._client.aclose()
 
     def _data_headers(self, *, access_token: str | None = None) -> dict[str, str]:
         if self.service_role_key:
@@ -64,8 +231,46 @@ class SupabaseService:
             "No data-access auth available. Set SUPABASE_SERVICE_ROLE_KEY or provide user access token."
         )
 
-    def validate_access_token(self, access_token: str) -> AuthenticatedUser:
-        response = self._client.get(
+    async def validate_access_token(self, access_token: str) -> AuthenticatedUser:
+        cache_key = self._access_token_cache_key(access_token)
+        cached = self.access_token_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        user = await self._verify_access_token(access_token)
+        # Never serve a cached user past the token's own expiry.
+        self.access_token_cache.set(
+            cache_key,
+            user,
+            expires_at=read_unverified_expiry(access_token),
+        )
+        return user
+
+    def invalidate_access_token(self, access_token: str) -> None:
+        self.access_token_cache.pop(self._access_token_cache_key(access_token))
+
+    @staticmethod
+    def _access_token_cache_key(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+    async def _verify_access_token(self, access_token: str) -> AuthenticatedUser:
+        if self.settings.supabase_jwt_local_verification:
+            try:
+                claims = await self.token_verifier.verify(access_token)
+            except TokenVerificationError as exc:
+                raise SupabaseAuthError(str(exc)) from exc
+            except TokenVerificationUnavailable as exc:
+                if not self.settings.supabase_jwt_remote_fallback:
+                    raise SupabaseAuthError(
+                        f"Supabase session token could not be verified locally: {exc}"
+                    ) from exc
+            else:
+                return self._user_from_payload(claims.get("sub"), claims)
+
+        return await self._fetch_remote_user(access_token)
+
+    async def _fetch_remote_user(self, access_token: str) -> AuthenticatedUser:
+        response = await self._client.get(
             f"{self.supabase_url}/auth/v1/user",
             headers={
                 "apikey": self.publishable_key,
@@ -76,7 +281,11 @@ class SupabaseService:
             raise SupabaseAuthError("Invalid or expired Supabase session token.")
 
         payload = response.json()
-        user_id = payload.get("id")
+        return self._user_from_payload(payload.get("id"), payload)
+
+    @staticmethod
+    def _user_from_payload(user_id: str | None, payload: dict) -> AuthenticatedUser:
+        # `/auth/v1/user` responses and access token claims share email and user_metadata.
         if not user_id:
             raise SupabaseAuthError("Supabase user payload was missing id.")
 
@@ -88,78 +297,257 @@ class SupabaseService:
             display_name=display_name,
         )
 
-    def upsert_profile(
+    async def upsert_profile(
         self,
         *,
         user_id: str,
         display_name: str | None,
         access_token: str | None = None,
     ) -> None:
-        payload = {
-            "user_id": user_id,
-            "display_name": display_name,
-        }
-        self._request_rest(
-            "POST",
-            "profiles",
-            params={"on_conflict": "user_id"},
-            json=payload,
-            headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+        """Upsert the profile unless this exact display name was written recently."""
+
+        written = {"display_name": display_name}
+        if self.profile_cache.get(user_id) == written:
+            return
+        await self.repository.upsert_profile(
+            user_id=user_id,
+            display_name=display_name,
             access_token=access_token,
         )
+        self.profile_cache.set(user_id, written)
 
-    def list_closet_items(
+    async def list_closet_items(
         self,
         *,
         user_id: str,
         access_token: str | None = None,
     ) -> list[ClosetItemRecord]:
-        rows = self._request_rest(
-            "GET",
+        page = await self.list_closet_items_page(user_id=user_id, access_token=access_token)
+        return page.items
+
+    async def list_generation_closet_items(
+        self,
+        *,
+        user_id: str,
+        access_token: str | None = None,
+    ) -> list[ClosetItem]:
+        """The user's closet as outfit-generation inputs: cached per user and never signed."""
+
+        cached = self.closet_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        started_at = time.time()
+        rows = await self.repository.list_closet_items(
+            user_id=user_id,
+            columns=GENERATION_CLOSET_COLUMNS,
+            access_token=access_token,
+        )
+        items = _validate_rows(GENERATION_CLOSET_ADAPTER, rows)
+        if not self._closet_written_since(user_id, started_at):
+            self.closet_cache.set(user_id, items)
+            # Another worker may have written between the check and the set; its pop
+            # could have run before our set, so check again and undo.
+            if self._closet_written_since(user_id, started_at):
+                self.closet_cache.pop(user_id)
+        return items
+
+    def _closet_written_since(self, user_id: str, started_at: float) -> bool:
+        written_at = self._closet_written_at.get(user_id)
+        return written_at is not None and written_at >= started_at
+
+    def invalidate_closet_cache(self, user_id: str) -> None:
+        self._closet_written_at.set(user_id, time.time())
+        self.closet_cache.pop(user_id)
+
+    async def list_closet_items_page(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> Page[ClosetItemRecord]:
+        rows = await self.repository.list_closet_items(
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+            access_token=access_token,
+        )
+        records = _validate_rows(CLOSET_ITEM_RECORDS_ADAPTER, rows)
+        page = self._to_page(records, limit)
+        # Only the rows actually returned are signed.
+        page.items = await self._attach_signed_urls(page.items, access_token=access_token)
+        return page
+
+    async def list_closet_item_fields_page(
+        self,
+        *,
+        user_id: str,
+        fields: Sequence[str],
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> Page[dict[str, Any]]:
+        """A closet page whose items only carry `fields`, as JSON-ready dicts."""
+
+        # The keyset cursor needs id and created_at; image_url is signed from image_path.
+        requested = [*fields, "image_path"] if "image_url" in fields else list(fields)
+        columns = list(dict.fromkeys(["id", "created_at", *requested]))
+        columns = [column for column in columns if column in CLOSET_ITEM_COLUMNS]
+
+        rows = await self.repository.list_closet_items(
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+            columns=columns,
+            access_token=access_token,
+        )
+        records = self._to_page(_validate_rows(CLOSET_ITEM_FIELDS_ADAPTER, rows), limit)
+        if "image_url" in fields:
+            await self._attach_signed_urls(records.items, access_token=access_token)
+        return Page(
+            items=[item.model_dump(mode="json", include=set(fields)) for item in records.items],
+            next_cursor=records.next_cursor,
+        )
+
+    async def closet_items_etag(
+        self,
+        *,
+        user_id: str,
+        variant: str = "",
+        access_token: str | None = None,
+    ) -> str:
+        count, latest = await self.repository.collection_version(
             "closet_items",
-            params={
-                "select": "*",
-                "user_id": f"eq.{user_id}",
-                "order": "created_at.desc",
-            },
+            "updated_at",
+            user_id=user_id,
+            access_token=access_token,
+        )
+        # Rotate at least once per refresh margin so a 304 never keeps a client on
+        # signed image URLs that are about to expire.
+        signing_epoch = int(time.time() // max(1, self.settings.supabase_signed_url_refresh_margin_seconds))
+        return build_etag("closet_items", user_id, count, latest, signing_epoch, variant)
+
+    async def saved_outfits_etag(
+        self,
+        *,
+        user_id: str,
+        variant: str = "",
+        access_token: str | None = None,
+    ) -> str:
+        # Saved outfits are insert/delete only, so created_at plus count tracks every change.
+        count, latest = await self.repository.collection_version(
+            "saved_outfits",
+            "created_at",
+            user_id=user_id,
+            access_token=access_token,
+        )
+        return build_etag("saved_outfits", user_id, count, latest, variant)
+
+    async def list_closet_item_changes(
+        self,
+        *,
+        user_id: str,
+        since: str | None = None,
+        access_token: str | None = None,
+    ) -> ClosetItemChanges:
+        """Return items updated and ids deleted after the `since` sync cursor.
+
+        Without `since` this is a full listing with no tombstones. Tombstones are only kept
+        for SYNC_TOMBSTONE_RETENTION_DAYS, so an older cursor raises SyncCursorExpiredError.
+        """
+
+        since_at = decode_sync_cursor(since) if since else None
+        rows, tombstones, server_time = await self.repository.list_closet_item_changes(
+            user_id=user_id,
+            since=since_at,
             access_token=access_token,
         )
-        records = [self._row_to_closet_item_record(row) for row in (rows or [])]
-        return self._attach_signed_urls(records, access_token=access_token)
+        retention = timedelta(days=self.settings.sync_tombstone_retention_days)
+        if since_at is not None and since_at < server_time - retention:
+            raise SyncCursorExpiredError(
+                "Sync cursor is older than the deletion history; resync without since."
+            )
+
+        records = _validate_rows(CLOSET_ITEM_RECORDS_ADAPTER, rows)
 
-    def get_closet_item(
+        # `updated_at` is stamped when a write starts, not when it commits, so a slow
+        # transaction can become visible with a timestamp older than rows already sent.
+        # Holding the cursor a safety lag behind the database clock re-sends recent
+        # changes (clients apply them idempotently) instead of skipping late commits.
+        # It still advances when nothing changed, so idle clients do not expire.
+        horizon = server_time - timedelta(seconds=self.settings.sync_safety_lag_seconds)
+        cursor_at = horizon if since_at is None else max(since_at, horizon)
+
+        return ClosetItemChanges(
+            items=await self._attach_signed_urls(records, access_token=access_token),
+            deleted_ids=[item_id for item_id, _ in tombstones],
+            cursor=encode_sync_cursor(cursor_at),
+        )
+
+    async def get_closet_item(
         self,
         *,
         user_id: str,
         item_id: str,
         access_token: str | None = None,
     ) -> ClosetItemRecord:
-        rows = self._request_rest(
-            "GET",
-            "closet_items",
-            params={
-                "select": "*",
-                "id": f"eq.{item_id}",
-                "user_id": f"eq.{user_id}",
-                "limit": "1",
-            },
+        row = await self.repository.get_closet_item(
+            user_id=user_id,
+            item_id=item_id,
             access_token=access_token,
         )
-        if not rows:
+        if row is None:
             raise SupabaseNotFoundError("Closet item not found.")
-        return self._attach_signed_urls(
-            [self._row_to_closet_item_record(rows[0])],
+        return await self._sign_closet_item(
+            self._row_to_closet_item_record(row),
             access_token=access_token,
-        )[0]
+        )
 
-    def create_closet_item(
+    async def create_closet_item(
         self,
         *,
         user_id: str,
         payload: ClosetItemCreate,
         access_token: str | None = None,
     ) -> ClosetItemRecord:
-        insert_payload = {
+        row = await self.repository.insert_closet_item(
+            values=self._closet_item_insert_values(user_id, payload),
+            access_token=access_token,
+        )
+        self.invalidate_closet_cache(user_id)
+        return await self._sign_closet_item(
+            self._row_to_closet_item_record(row),
+            access_token=access_token,
+        )
+
+    async def create_closet_items(
+        self,
+        *,
+        user_id: str,
+        payloads: list[ClosetItemCreate],
+        access_token: str | None = None,
+    ) -> list[ClosetItemRecord]:
+        """Insert many items with one array insert; records follow the order of `payloads`."""
+
+        if not payloads:
+            return []
+        rows = await self.repository.insert_closet_items(
+            values=[self._closet_item_insert_values(user_id, payload) for payload in payloads],
+            access_token=access_token,
+        )
+        self.invalidate_closet_cache(user_id)
+        if len(rows) != len(payloads):
+            raise SupabaseServiceError(
+                f"Bulk insert returned {len(rows)} rows for {len(payloads)} closet items."
+            )
+        # New items have no images yet, so there is nothing to sign.
+        return _validate_rows(CLOSET_ITEM_RECORDS_ADAPTER, rows)
+
+    @staticmethod
+    def _closet_item_insert_values(user_id: str, payload: ClosetItemCreate) -> dict[str, object]:
+        return {
             "user_id": user_id,
             "name": payload.name,
             "category": payload.category.value,
@@ -171,19 +559,8 @@ class SupabaseService:
             "tags": payload.tags,
             "notes": payload.notes,
         }
-        rows = self._request_rest(
-            "POST",
-            "closet_items",
-            json=insert_payload,
-            headers={"Prefer": "return=representation"},
-            access_token=access_token,
-        )
-        return self._attach_signed_urls(
-            [self._row_to_closet_item_record(rows[0])],
-            access_token=access_token,
-        )[0]
 
-    def update_closet_item(
+    async def update_closet_item(
         self,
         *,
         user_id: str,
@@ -214,48 +591,71 @@ class SupabaseService:
         if not update_payload:
             raise SupabaseServiceError("No fields provided for closet item update.")
 
-        rows = self._request_rest(
-            "PATCH",
-            "closet_items",
-            params={
-                "id": f"eq.{item_id}",
-                "user_id": f"eq.{user_id}",
-                "select": "*",
-            },
-            json=update_payload,
-            headers={"Prefer": "return=representation"},
+        row = await self.repository.update_closet_item(
+            user_id=user_id,
+            item_id=item_id,
+            values=update_payload,
             access_token=access_token,
         )
-        if not rows:
+        if row is None:
             raise SupabaseNotFoundError("Closet item not found.")
-        return self._attach_signed_urls(
-            [self._row_to_closet_item_record(rows[0])],
+        self.invalidate_closet_cache(user_id)
+        return await self._sign_closet_item(
+            self._row_to_closet_item_record(row),
             access_token=access_token,
-        )[0]
+        )
 
-    def delete_closet_item(
+    async def delete_closet_item(
         self,
         *,
         user_id: str,
         item_id: str,
         access_token: str | None = None,
     ) -> None:
-        item = self.get_closet_item(user_id=user_id, item_id=item_id, access_token=access_token)
-        self._request_rest(
-            "DELETE",
-            "closet_items",
-            params={
-                "id": f"eq.{item_id}",
-                "user_id": f"eq.{user_id}",
-                "select": "id",
-            },
-            headers={"Prefer": "return=representation"},
+        row = await self.repository.delete_closet_item(
+            user_id=user_id,
+            item_id=item_id,
+            access_token=access_token,
+        )
+        if row is None:
+            raise SupabaseNotFoundError("Closet item not found.")
+        self.invalidate_closet_cache(user_id)
+
+        image_path = row.get("image_path")
+        if image_path:
+            self.invalidate_signed_url(image_path)
+            self._schedule_storage_cleanup([image_path], access_token=access_token)
+
+    async def delete_closet_items(
+        self,
+        *,
+        user_id: str,
+        item_ids: list[str],
+        access_token: str | None = None,
+    ) -> list[str]:
+        """Delete the caller's items among `item_ids`; returns the ids that were actually deleted."""
+
+        # A malformed id can never match a row, and would make Postgres reject the whole
+        # `uuid` filter, so drop it here and let it fall out of the result like a missing id.
+        candidate_ids = [item_id for item_id in dict.fromkeys(item_ids) if _is_uuid(item_id)]
+        if not candidate_ids:
+            return []
+        rows = await self.repository.delete_closet_items(
+            user_id=user_id,
+            item_ids=candidate_ids,
             access_token=access_token,
         )
-        if item.image_path:
-            self.delete_storage_object(path=item.image_path, access_token=access_token)
 
-    def set_closet_item_image(
+        if rows:
+            self.invalidate_closet_cache(user_id)
+        image_paths = [row["image_path"] for row in rows if row.get("image_path")]
+        for image_path in image_paths:
+            self.invalidate_signed_url(image_path)
+        if image_paths:
+            self._schedule_storage_cleanup(image_paths, access_token=access_token)
+        return [str(row["id"]) for row in rows]
+
+    async def set_closet_item_image(
         self,
         *,
         user_id: str,
@@ -264,105 +664,121 @@ class SupabaseService:
         content: bytes,
         access_token: str | None = None,
     ) -> ClosetItemRecord:
-        item = self.get_closet_item(
-            user_id=user_id,
-            item_id=item_id,
-            access_token=access_token,
-        )
+        if not _is_uuid(item_id):
+            # Checked before uploading: the id becomes part of the object path.
+            raise SupabaseNotFoundError("Closet item not found.")
+
         extension = mimetypes.guess_extension(content_type) or ".jpg"
-        image_path = f"{user_id}/{item_id}/primary{extension}"
-        self.upload_storage_object(
+        # A fresh name per upload means a path queued for cleanup is never reused by a
+        # later upload, so the cleanup can never delete an image that is live again.
+        image_path = f"{user_id}/{item_id}/{uuid.uuid4().hex}{extension}"
+
+        await self.upload_storage_object(
             path=image_path,
             content=content,
             content_type=content_type,
             access_token=access_token,
         )
 
-        rows = self._request_rest(
-            "PATCH",
-            "closet_items",
-            params={
-                "id": f"eq.{item_id}",
-                "user_id": f"eq.{user_id}",
-                "select": "*",
-            },
-            json={"image_path": image_path, "image_mime_type": content_type},
-            headers={"Prefer": "return=representation"},
-            access_token=access_token,
+        # The new object already exists, so it can be signed while the row is swapped.
+        replaced, signed_urls = await asyncio.gather(
+            self.repository.replace_closet_item_image(
+                user_id=user_id,
+                item_id=item_id,
+                image_path=image_path,
+                image_mime_type=content_type,
+                access_token=access_token,
+            ),
+            self.create_signed_storage_urls(paths=[image_path], access_token=access_token),
+            return_exceptions=True,
         )
-        if not rows:
+        if isinstance(replaced, BaseException) or replaced is None:
+            # No row references the freshly uploaded object, so it would be orphaned.
+            await self._discard_uploaded_object(image_path, access_token=access_token)
+            if isinstance(replaced, BaseException):
+                raise replaced
             raise SupabaseNotFoundError("Closet item not found.")
 
-        if item.image_path and item.image_path != image_path:
-            self.delete_storage_object(path=item.image_path, access_token=access_token)
-        return self._attach_signed_urls(
-            [self._row_to_closet_item_record(rows[0])],
-            access_token=access_token,
-        )[0]
+        # Generation ignores image columns, but the row did change; keep the rule simple.
+        self.invalidate_closet_cache(user_id)
+        old_image_path, row = replaced
+        if old_image_path and old_image_path != image_path:
+            self.invalidate_signed_url(old_image_path)
+            self._schedule_storage_cleanup([old_image_path], access_token=access_token)
+        if isinstance(signed_urls, BaseException):
+            # The row already points at the new object, so it must stay.
+            raise signed_urls
+        record = self._row_to_closet_item_record(row)
+        record.image_url = signed_urls.get(image_path)
+        return record
+
+    async def _discard_uploaded_object(self, path: str, *, access_token: str | None = None) -> None:
+        self.invalidate_signed_url(path)
+        try:
+            await self.delete_storage_object(path=path, access_token=access_token)
+        except Exception:
+            # Leave it to the reconcile_storage job rather than mask the original error.
+            logger.warning("Failed to delete unreferenced upload %s.", path, exc_info=True)
 
-    def clear_closet_item_image(
+    async def clear_closet_item_image(
         self,
         *,
         user_id: str,
         item_id: str,
         access_token: str | None = None,
     ) -> ClosetItemRecord:
-        item = self.get_closet_item(
+        replaced = await self.repository.replace_closet_item_image(
             user_id=user_id,
             item_id=item_id,
+            image_path=None,
+            image_mime_type=None,
             access_token=access_token,
         )
-        if item.image_path:
-            self.delete_storage_object(path=item.image_path, access_token=access_token)
-
-        rows = self._request_rest(
-            "PATCH",
-            "closet_items",
-            params={
-                "id": f"eq.{item_id}",
-                "user_id": f"eq.{user_id}",
-                "select": "*",
-            },
-            json={"image_path": None, "image_mime_type": None},
-            headers={"Prefer": "return=representation"},
-            access_token=access_token,
-        )
-        if not rows:
+        if replaced is None:
             raise SupabaseNotFoundError("Closet item not found.")
-        return self._attach_signed_urls(
-            [self._row_to_closet_item_record(rows[0])],
-            access_token=access_token,
-        )[0]
 
-    def list_saved_outfits(
+        self.invalidate_closet_cache(user_id)
+        old_image_path, row = replaced
+        if old_image_path:
+            self.invalidate_signed_url(old_image_path)
+            self._schedule_storage_cleanup([old_image_path], access_token=access_token)
+        return self._row_to_closet_item_record(row)
+
+    async def list_saved_outfits(
         self,
         *,
         user_id: str,
         access_token: str | None = None,
     ) -> list[SavedOutfitRecord]:
-        rows = self._request_rest(
-            "GET",
-            "saved_outfits",
-            params={
-                "select": "*",
-                "user_id": f"eq.{user_id}",
-                "order": "created_at.desc",
-            },
+        page = await self.list_saved_outfits_page(user_id=user_id, access_token=access_token)
+        return page.items
+
+    async def list_saved_outfits_page(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> Page[SavedOutfitRecord]:
+        rows = await self.repository.list_saved_outfits(
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
             access_token=access_token,
         )
-        return [SavedOutfitRecord.model_validate(row) for row in (rows or [])]
+        records = [SavedOutfitRecord.model_validate(row) for row in rows]
+        return self._to_page(records, limit)
 
-    def create_saved_outfit(
+    async def create_saved_outfit(
         self,
         *,
         user_id: str,
         payload: SavedOutfitCreate,
         access_token: str | None = None,
     ) -> SavedOutfitRecord:
-        rows = self._request_rest(
-            "POST",
-            "saved_outfits",
-            json={
+        row = await self.repository.insert_saved_outfit(
+            values={
                 "user_id": user_id,
                 "title": payload.title,
                 "occasion": payload.occasion,
@@ -370,51 +786,35 @@ class SupabaseService:
                 "outfit_snapshot": payload.outfit_snapshot.model_dump(mode="json"),
                 "global_tips": payload.global_tips,
             },
-            headers={"Prefer": "return=representation"},
             access_token=access_token,
         )
-        return SavedOutfitRecord.model_validate(rows[0])
+        return SavedOutfitRecord.model_validate(row)
 
-    def delete_saved_outfit(
+    async def delete_saved_outfit(
         self,
         *,
         user_id: str,
         saved_outfit_id: str,
         access_token: str | None = None,
     ) -> None:
-        rows = self._request_rest(
-            "DELETE",
-            "saved_outfits",
-            params={
-                "id": f"eq.{saved_outfit_id}",
-                "user_id": f"eq.{user_id}",
-                "select": "id",
-            },
-            headers={"Prefer": "return=representation"},
+        row = await self.repository.delete_saved_outfit(
+            user_id=user_id,
+            saved_outfit_id=saved_outfit_id,
             access_token=access_token,
         )
-        if not rows:
+        if row is None:
             raise SupabaseNotFoundError("Saved outfit not found.")
 
     @staticmethod
-    def to_generation_closet_items(items: list[ClosetItemRecord]) -> list[ClosetItem]:
-        return [
-            ClosetItem(
-                id=item.id,
-                name=item.name,
-                category=item.category,
-                color=item.color,
-                material=item.material,
-                pattern=item.pattern,
-                formality=item.formality,
-                seasonality=item.seasonality,
-                tags=item.tags,
-                notes=item.notes,
-            )
-            for item in items
-        ]
+    def _to_page(records: list[PagedRecord], limit: int | None) -> Page[PagedRecord]:
+        # Rows are fetched with limit + 1, so an extra row means another page exists.
+        if limit is None or len(records) <= limit:
+            return Page(items=records)
+        items = records[:limit]
+        last = items[-1]
+        return Page(items=items, next_cursor=encode_cursor(last.created_at, last.id))
 
-    def upload_storage_object(
+    async def upload_storage_object(
         self,
         *,
         path: str,
@@ -422,7 +822,7 @@ class SupabaseService:
         content_type: str,
         access_token: str | None = None,
     ) -> None:
-        response = self._client.post(
+        response = await self._client.post(
             f"{self.supabase_url}/storage/v1/object/{self.storage_bucket}/{quote(path, safe='/')}",
             headers={
                 **self._data_headers(access_token=access_token),
@@ -436,8 +836,8 @@ class SupabaseService:
                 f"Supabase storage upload failed ({response.status_code}): {response.text}"
             )
 
-    def delete_storage_object(self, *, path: str, access_token: str | None = None) -> None:
-        response = self._client.delete(
+    async def delete_storage_object(self, *, path: str, access_token: str | None = None) -> None:
+        response = await self._client.delete(
             f"{self.supabase_url}/storage/v1/object/{self.storage_bucket}/{quote(path, safe='/')}",
             headers=self._data_headers(access_token=access_token),
         )
@@ -447,90 +847,260 @@ class SupabaseService:
                 f"Supabase storage delete failed ({response.status_code}): {response.text}"
             )
 
-    def create_signed_storage_url(
+    async def delete_storage_objects(
         self,
         *,
-        path: str,
-        expires_in: int = 3600,
+        paths: list[str],
+        bucket: str | None = None,
         access_token: str | None = None,
-    ) -> str:
-        response = self._client.post(
-            f"{self.supabase_url}/storage/v1/object/sign/{self.storage_bucket}/{quote(path, safe='/')}",
+    ) -> None:
+        """Remove many objects with one call to the Storage bulk-remove endpoint."""
+
+        if not paths:
+            return
+        response = await self._client.request(
+            "DELETE",
+            f"{self.supabase_url}/storage/v1/object/{bucket or self.storage_bucket}",
             headers={
                 **self._data_headers(access_token=access_token),
                 "Content-Type": "application/json",
             },
-            json={"expiresIn": expires_in},
+            json={"prefixes": list(dict.fromkeys(paths))},
         )
+        # Missing objects are simply absent from the response, so only real failures raise.
         if response.status_code >= 400:
             raise SupabaseServiceError(
-                f"Supabase signed URL generation failed ({response.status_code}): {response.text}"
+                f"Supabase storage delete failed ({response.status_code}): {response.text}"
             )
-        data = response.json()
-        signed_url = data.get("signedURL") or data.get("signedUrl")
-        if not signed_url:
-            raise SupabaseServiceError("Supabase signed URL response missing signedURL.")
-        if signed_url.startswith("http"):
-            return signed_url
-        return f"{self.supabase_url}{signed_url}"
 
-    def _attach_signed_urls(
+    async def list_storage_objects(
         self,
-        items: list[ClosetItemRecord],
         *,
+        prefix: str,
+        limit: int,
+        offset: int = 0,
         access_token: str | None = None,
-    ) -> list[ClosetItemRecord]:
-        records: list[ClosetItemRecord] = []
-        for item in items:
-            if item.image_path:
-                image_url = self.create_signed_storage_url(
-                    path=item.image_path,
-                    access_token=access_token,
-                )
-                records.append(item.model_copy(update={"image_url": image_url}))
-            else:
-                records.append(item)
-        return records
+    ) -> list[dict]:
+        """One page of a folder listing; folders come back with a null `id`."""
 
-    @staticmethod
-    def _row_to_closet_item_record(row: dict) -> ClosetItemRecord:
-        return ClosetItemRecord.model_validate(
-            {
-                **row,
-                "tags": row.get("tags") or [],
-                "seasonality": row.get("seasonality") or [],
-            }
+        response = await self._client.post(
+            f"{self.supabase_url}/storage/v1/object/list/{self.storage_bucket}",
+            headers={
+                **self._data_headers(access_token=access_token),
+                "Content-Type": "application/json",
+            },
+            json={
+                "prefix": prefix,
+                "limit": limit,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            },
         )
+        if response.status_code >= 400:
+            raise SupabaseServiceError(
+                f"Supabase storage list failed ({response.status_code}): {response.text}"
+            )
+        return response.json() or []
+
+    async def list_storage_object_page(
+        self,
+        *,
+        prefix: str,
+        limit: int,
+        after: str | None = None,
+    ) -> list[dict]:
+        """Objects (`name`, `updated_at`) under `prefix` at any depth, by name after `after`.
+
+        Reads storage.objects through a service-role RPC, so it needs SUPABASE_SERVICE_ROLE_KEY.
+        """
+
+        rows = await self.rest.request(
+            "POST",
+            "rpc/list_storage_object_page",
+            json={
+                "p_bucket_id": self.storage_bucket,
+                "p_prefix": prefix,
+                "p_after": after,
+                "p_limit": limit,
+            },
+        )
+        return rows or []
 
-    def _request_rest(
+    def _schedule_storage_cleanup(
         self,
-        method: str,
-        table: str,
+        paths: list[str],
         *,
-        params: dict[str, str] | None = None,
-        json: dict | None = None,
-        headers: dict[str, str] | None = None,
         access_token: str | None = None,
-    ):
-        request_headers = dict(self._data_headers(access_token=access_token))
-        if headers:
-            request_headers.update(headers)
+    ) -> None:
+        """Delete unreferenced objects in the background so the request does not wait on them."""
+
+        if self.durable_storage_cleanup:
+            # The closet_items trigger already queued these in the row's own transaction.
+            return
+        task = asyncio.create_task(self._cleanup_storage_objects(paths, access_token=access_token))
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
+
+    async def _cleanup_storage_objects(
+        self,
+        paths: list[str],
+        *,
+        access_token: str | None = None,
+    ) -> None:
+        try:
+            await self.delete_storage_objects(paths=paths, access_token=access_token)
+            # The closet_items trigger queues these paths even when no worker drains the
+            # queue; drop the entries now that the objects are gone.
+            await self.rest.request(
+                "DELETE",
+                "storage_cleanup_queue",
+                params={"object_path": in_filter(paths)},
+                access_token=access_token,
+            )
+        except Exception:
+            logger.warning("Failed to delete storage objects %s.", paths, exc_info=True)
+
+    async def create_signed_storage_urls(
+        self,
+        *,
+        paths: list[str],
+        access_token: str | None = None,
+    ) -> dict[str, str]:
+        """Sign many object paths with the bulk endpoint; returns signed URLs keyed by path."""
+
+        signed: dict[str, str] = {}
+        unsigned_paths: list[str] = []
+        for path in dict.fromkeys(paths):
+            cached = self.signed_url_cache.get(self._signed_url_cache_key(path))
+            if cached is not None:
+                signed[path] = cached
+            else:
+                unsigned_paths.append(path)
+        if not unsigned_paths:
+            return signed
 
-        response = self._client.request(
-            method,
-            f"{self.supabase_url}/rest/v1/{table}",
-            params=params,
-            json=json,
-            headers=request_headers,
+        expires_in = self.settings.supabase_signed_url_expires_seconds
+        issued_at = time.time()
+
+        chunk_size = max(1, self.settings.supabase_sign_batch_size)
+        chunks = [
+            unsigned_paths[start : start + chunk_size]
+            for start in range(0, len(unsigned_paths), chunk_size)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._sign_storage_chunk(chunk, expires_in=expires_in, access_token=access_token)
+                for chunk in chunks
+            )
+        )
+
+        for chunk_result in results:
+            for path, signed_url in chunk_result.items():
+                self._cache_signed_url(path, signed_url, issued_at=issued_at, expires_in=expires_in)
+                signed[path] = signed_url
+        return signed
+
+    def invalidate_signed_url(self, path: str) -> None:
+        self.signed_url_cache.pop(self._signed_url_cache_key(path))
+
+    def _signed_url_cache_key(self, path: str) -> str:
+        return f"{self.storage_bucket}:{path}"
+
+    def _cache_signed_url(
+        self,
+        path: str,
+        signed_url: str,
+        *,
+        issued_at: float,
+        expires_in: int,
+    ) -> None:
+        margin = self.settings.supabase_signed_url_refresh_margin_seconds
+        self.signed_url_cache.set(
+            self._signed_url_cache_key(path),
+            signed_url,
+            expires_at=issued_at + expires_in - margin,
+        )
+
+    async def _sign_storage_chunk(
+        self,
+        paths: list[str],
+        *,
+        expires_in: int,
+        access_token: str | None,
+    ) -> dict[str, str]:
+        response = await self._client.post(
+            f"{self.supabase_url}/storage/v1/object/sign/{self.storage_bucket}",
+            headers={
+                **self._data_headers(access_token=access_token),
+                "Content-Type": "application/json",
+            },
+            json={"expiresIn": expires_in, "paths": paths},
         )
         if response.status_code >= 400:
             raise SupabaseServiceError(
-                f"Supabase REST request failed ({response.status_code}): {response.text}"
+                f"Supabase signed URL generation failed ({response.status_code}): {response.text}"
             )
-        if not response.text:
-            return None
-        return response.json()
 
+        signed: dict[str, str] = {}
+        for entry in response.json() or []:
+            # Per-path failures (e.g. a missing object) leave that item without an image_url.
+            path = entry.get("path")
+            signed_url = entry.get("signedURL") or entry.get("signedUrl")
+            if path and signed_url and not entry.get("error"):
+                signed[path] = self._absolute_signed_url(signed_url)
+        return signed
 
-def get_supabase_service(settings: Settings = Depends(get_settings)) -> SupabaseService:
-    return SupabaseService(settings)
+    def _absolute_signed_url(self, signed_url: str) -> str:
+        if signed_url.startswith("http"):
+            return signed_url
+        if signed_url.startswith("/storage/v1/"):
+            return f"{self.supabase_url}{signed_url}"
+        # Storage returns paths relative to the storage API root, e.g. /object/sign/...
+        return f"{self.supabase_url}/storage/v1{signed_url}"
+
+    async def _attach_signed_urls(
+        self,
+        items: list[SignableRecord],
+        *,
+        access_token: str | None = None,
+    ) -> list[SignableRecord]:
+        """Fill in `image_url` in place; callers pass records they just decoded and own."""
+
+        signed_urls = await self.create_signed_storage_urls(
+            paths=[item.image_path for item in items if item.image_path],
+            access_token=access_token,
+        )
+        for item in items:
+            if item.image_path:
+                item.image_url = signed_urls.get(item.image_path)
+        return items
+
+    async def _sign_closet_item(
+        self,
+        item: ClosetItemRecord,
+        *,
+        access_token: str | None = None,
+    ) -> ClosetItemRecord:
+        return (await self._attach_signed_urls([item], access_token=access_token))[0]
+
+    @staticmethod
+    def _row_to_closet_item_record(row: dict) -> ClosetItemRecord:
+        return ClosetItemRecord.model_validate(row)
+
+
+async def get_supabase_service(
+    request: Request,
+    settings: Settings = Depends(get_settings),
+) -> SupabaseService:
+    """Return the process-wide service bound to the lifespan-owned HTTP client."""
+
+    state = request.app.state
+    service = getattr(state, "supabase_service", None)
+    if service is None:
+        # Runs on the event loop, so check-and-set cannot interleave with another request.
+        service = SupabaseService(
+            settings,
+            client=getattr(state, "supabase_http_client", None),
+        )
+        state.supabase_service = service
+    return service
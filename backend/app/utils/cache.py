@@ -0,0 +1,307 @@
+"""Small caches shared by the service layer.
+
+`TTLCache` lives in process memory. `SQLiteTTLCache` keeps the same interface in a local
+SQLite file, so several workers on one host share entries and invalidations.
+`TieredTTLCache` puts a memory LRU in front of a SQLite tier for values that are expensive
+to recompute but cheap to share.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Generic, Literal, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache whose entries also expire at a per-entry deadline."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: V, *, expires_at: float | None = None) -> None:
+        """Store a value until `expires_at` (epoch seconds), capped by the cache TTL."""
+
+        if not self.enabled:
+            return
+
+        deadline = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if deadline <= time.time():
+            return
+
+        with self._lock:
+            self._entries[key] = (deadline, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        return None
+
+    def stats(self) -> dict[str, float | int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteTTLCache(Generic[V]):
+    """`TTLCache` stored in a SQLite file; values go through `dumps`/`loads` as text.
+
+    Eviction keeps the entries with the latest deadlines, which approximates LRU because
+    every `set` pushes its deadline out. Hit and miss counters are per process.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        namespace: str,
+        max_entries: int,
+        ttl_seconds: float,
+        dumps: Callable[[V], str] = json.dumps,
+        loads: Callable[[str], V] = json.loads,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._dumps = dumps
+        self._loads = loads
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; WAL lets readers in other processes proceed during writes.
+        self._connection = sqlite3.connect(
+            str(path),
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        with self._lock:
+            self._connection.execute("pragma journal_mode=wal")
+            self._connection.execute(
+                "create table if not exists cache_entries ("
+                "namespace text not null, key text not null, value text not null, "
+                "expires_at real not null, primary key (namespace, key))"
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> V | None:
+        with self._lock:
+            row = self._connection.execute(
+                "select value from cache_entries where namespace = ? and key = ? and expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._loads(row[0])
+
+    def set(self, key: str, value: V, *, expires_at: float | None = None) -> None:
+        """Store a value until `expires_at` (epoch seconds), capped by the cache TTL."""
+
+        if not self.enabled:
+            return
+
+        now = time.time()
+        deadline = now + self.ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if deadline <= now:
+            return
+
+        encoded = self._dumps(value)
+        with self._lock:
+            self._connection.execute(
+                "insert or replace into cache_entries (namespace, key, value, expires_at) "
+                "values (?, ?, ?, ?)",
+                (self.namespace, key, encoded, deadline),
+            )
+            self._connection.execute(
+                "delete from cache_entries where namespace = ? and (expires_at <= ? or key in ("
+                "select key from cache_entries where namespace = ? "
+                "order by expires_at desc limit -1 offset ?))",
+                (self.namespace, now, self.namespace, self.max_entries),
+            )
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "delete from cache_entries where namespace = ? and key = ?",
+                (self.namespace, key),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute(
+                "delete from cache_entries where namespace = ?",
+                (self.namespace,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                "select count(*) from cache_entries where namespace = ? and expires_at > ?",
+                (self.namespace, time.time()),
+            ).fetchone()
+        return int(row[0])
+
+    def stats(self) -> dict[str, float | int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class TieredTTLCache(Generic[V]):
+    """Memory LRU in front of a `SQLiteTTLCache`; SQLite hits are promoted into memory.
+
+    Counters cover the tiers together, so `hit_ratio` reflects lookups that avoided a
+    recompute regardless of which tier answered.
+    """
+
+    def __init__(self, front: TTLCache[V], back: SQLiteTTLCache[V]):
+        self.front = front
+        self.back = back
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.back.enabled
+
+    def get(self, key: str) -> V | None:
+        value = self.front.get(key)
+        if value is None:
+            value = self.back.get(key)
+            if value is not None:
+                self.front.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: V, *, expires_at: float | None = None) -> None:
+        self.front.set(key, value, expires_at=expires_at)
+        self.back.set(key, value, expires_at=expires_at)
+
+    def pop(self, key: str) -> None:
+        self.front.pop(key)
+        self.back.pop(key)
+
+    def clear(self) -> None:
+        self.front.clear()
+        self.back.clear()
+
+    def __len__(self) -> int:
+        return len(self.back)
+
+    def close(self) -> None:
+        self.back.close()
+
+    def stats(self) -> dict[str, float | int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_hits": self.front.hits,
+        }
+
+
+def build_cache(
+    backend: Literal["memory", "sqlite"],
+    *,
+    namespace: str,
+    max_entries: int,
+    ttl_seconds: float,
+    sqlite_path: str | Path,
+    dumps: Callable[[Any], str] = json.dumps,
+    loads: Callable[[str], Any] = json.loads,
+    memory_front: bool = False,
+) -> TTLCache[Any] | SQLiteTTLCache[Any] | TieredTTLCache[Any]:
+    """Cache for the configured CACHE_BACKEND; `dumps`/`loads` only matter for SQLite.
+
+    With `memory_front`, the SQLite backend also keeps hot entries in a process-local LRU.
+    """
+
+    if backend == "sqlite":
+        stored: SQLiteTTLCache[Any] = SQLiteTTLCache(
+            sqlite_path,
+            namespace=namespace,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            dumps=dumps,
+            loads=loads,
+        )
+        if memory_front:
+            return TieredTTLCache(
+                TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds),
+                stored,
+            )
+        return stored
+    return TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
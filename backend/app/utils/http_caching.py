@@ -0,0 +1,28 @@
+"""Helpers for conditional GETs (ETag / If-None-Match)."""
+
+from __future__ import annotations
+
+import hashlib
+
+ETAG_HEADER = "ETag"
+
+
+def build_etag(*parts: object) -> str:
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    # Weak: equal tags mean equivalent data, not byte-identical bodies (signed URLs may differ).
+    return f'W/"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    candidates = [candidate for candidate in if_none_match.split(",") if candidate.strip()]
+    return any(
+        candidate.strip() == "*" or opaque(candidate) == opaque(etag)
+        for candidate in candidates
+    )
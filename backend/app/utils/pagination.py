@@ -0,0 +1,75 @@
+"""Opaque cursors for keyset-paginated listings and closet delta sync."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client-supplied cursor cannot be decoded."""
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        datetime.fromisoformat(created_at)
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor.") from exc
+
+    if not isinstance(row_id, str) or not row_id:
+        raise InvalidCursorError("Invalid pagination cursor.")
+    return created_at, row_id
+
+
+def encode_sync_cursor(changed_at: datetime) -> str:
+    raw = json.dumps({"since": changed_at.isoformat()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> datetime:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        since = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["since"]
+        since_at = datetime.fromisoformat(since)
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError("Invalid sync cursor.") from exc
+
+    if since_at.tzinfo is None:
+        raise InvalidCursorError("Invalid sync cursor.")
+    return since_at
+
+
+def keyset_params(cursor: str | None, limit: int | None) -> dict[str, str]:
+    """PostgREST params for the page after `cursor`, fetching one extra row to detect more."""
+
+    params = {"order": "created_at.desc,id.desc"}
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        params["or"] = (
+            f'(created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+        )
+    if limit is not None:
+        params["limit"] = str(limit + 1)
+    return params
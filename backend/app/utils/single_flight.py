@@ -0,0 +1,59 @@
+"""Coalesce concurrent identical async calls into one.
+
+Callers awaiting the same key share a single task: they all receive its result or its
+exception. A caller that is cancelled only stops waiting; the shared call is cancelled
+once no caller is left waiting for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class _Call(Generic[V]):
+    def __init__(self, task: asyncio.Future[V]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[V]):
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call[V]] = {}
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[V]]) -> V:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.started += 1
+        else:
+            self.joined += 1
+
+        call.waiters += 1
+        try:
+            # Shielded so one caller's cancellation does not cancel the call for the rest.
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to use the result. Forget the call first so a new
+                # caller starts a fresh one instead of joining the cancelled one.
+                self._forget(key, call)
+                call.task.cancel()
+
+    def stats(self) -> dict[str, float | int]:
+        return {"in_flight": len(self._calls), "started": self.started, "joined": self.joined}
+
+    def _forget(self, key: str, call: _Call[V]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
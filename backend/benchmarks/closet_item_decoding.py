@@ -0,0 +1,131 @@
+"""Rows per second for turning a closet listing body into signed `ClosetItemRecord`s.
+
+    cd backend && python -m benchmarks.closet_item_decoding --rows 5000
+
+"before" replays the previous per-row path (json.loads, a merged dict and
+`model_validate` per row, then `model_copy` per signed item, and a field-by-field
+`ClosetItem` copy per generation row); "after" is the bulk `TypeAdapter` path the
+service uses now.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from app.models.schemas import ClosetItem, ClosetItemRecord
+from app.services.supabase_service import CLOSET_ITEM_RECORDS_ADAPTER, GENERATION_CLOSET_ADAPTER
+
+
+def build_body(rows: int) -> bytes:
+    return json.dumps(
+        [
+            {
+                "id": f"00000000-0000-4000-8000-{index:012d}",
+                "user_id": "00000000-0000-4000-8000-000000000000",
+                "name": f"Item {index}",
+                "category": "top",
+                "color": "white",
+                "material": "cotton",
+                "pattern": None,
+                "formality": "casual",
+                "seasonality": ["spring", "summer"],
+                "tags": ["basic", "layering"],
+                "notes": None,
+                "image_path": f"user/{index}/image.png" if index % 2 else None,
+                "image_mime_type": "image/png" if index % 2 else None,
+                "created_at": "2026-02-21T12:00:00+00:00",
+                "updated_at": "2026-02-21T12:00:00.123456+00:00",
+            }
+            for index in range(rows)
+        ]
+    ).encode("utf-8")
+
+
+def decode_before(body: bytes, signed_urls: dict[str, str]) -> list[ClosetItemRecord]:
+    records = [
+        ClosetItemRecord.model_validate(
+            {**row, "tags": row.get("tags") or [], "seasonality": row.get("seasonality") or []}
+        )
+        for row in json.loads(body)
+    ]
+    return [
+        record.model_copy(update={"image_url": signed_urls.get(record.image_path)})
+        if record.image_path
+        else record
+        for record in records
+    ]
+
+
+def decode_after(body: bytes, signed_urls: dict[str, str]) -> list[ClosetItemRecord]:
+    records = CLOSET_ITEM_RECORDS_ADAPTER.validate_json(body)
+    for record in records:
+        if record.image_path:
+            record.image_url = signed_urls.get(record.image_path)
+    return records
+
+
+def generation_before(body: bytes) -> list:
+    records = [ClosetItemRecord.model_validate(row) for row in json.loads(body)]
+    return [
+        ClosetItem(
+            id=record.id,
+            name=record.name,
+            category=record.category,
+            color=record.color,
+            material=record.material,
+            pattern=record.pattern,
+            formality=record.formality,
+            seasonality=record.seasonality,
+            tags=record.tags,
+            notes=record.notes,
+        )
+        for record in records
+    ]
+
+
+def generation_after(body: bytes) -> list:
+    return GENERATION_CLOSET_ADAPTER.validate_json(body)
+
+
+def rows_per_second(decode: Callable[[], object], rows: int, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        decode()
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    body = build_body(args.rows)
+    signed_urls = {
+        row["image_path"]: f"https://example.supabase.co/storage/v1/{row['image_path']}?token=t"
+        for row in json.loads(body)
+        if row["image_path"]
+    }
+    cases = {
+        "closet listing": (
+            lambda: decode_before(body, signed_urls),
+            lambda: decode_after(body, signed_urls),
+        ),
+        "generation closet": (lambda: generation_before(body), lambda: generation_after(body)),
+    }
+    for name, (before, after) in cases.items():
+        before_rate = rows_per_second(before, args.rows, args.repeats)
+        after_rate = rows_per_second(after, args.rows, args.repeats)
+        print(
+            f"{name:18} before {before_rate:>10,.0f} rows/s  "
+            f"after {after_rate:>10,.0f} rows/s  ({after_rate / before_rate:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -112,10 +112,10 @@ def test_cors_preflight_allows_configured_origin() -> None:
 
 def test_generate_outfits_maps_service_errors_to_502() -> None:
     class BrokenGeminiService:
-        def analyze_closet(self, *, manual_clothes_text: str | None, images: list) -> None:
+        async def analyze_closet(self, *, manual_clothes_text: str | None, images: list) -> None:
             raise AssertionError("Not used in this test")
 
-        def generate_outfits(self, request):  # noqa: ANN001 - simple test double
+        async def generate_outfits(self, request):  # noqa: ANN001 - simple test double
             raise GeminiServiceError("Gemini upstream timeout.")
 
     app.dependency_overrides[get_gemini_service] = lambda: BrokenGeminiService()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+
+from app.utils.cache import SQLiteTTLCache, TieredTTLCache, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used_entry() -> None:
+    cache: TTLCache[int] = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_respects_explicit_expiry_and_counts_lookups() -> None:
+    cache: TTLCache[str] = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.set("expired", "value", expires_at=time.time() - 1)
+    cache.set("fresh", "value", expires_at=time.time() + 30)
+
+    assert cache.get("expired") is None
+    assert cache.get("fresh") == "value"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_ttl_cache_with_zero_ttl_is_disabled() -> None:
+    cache: TTLCache[str] = TTLCache(max_entries=10, ttl_seconds=0)
+    cache.set("key", "value")
+
+    assert cache.get("key") is None
+
+
+def test_sqlite_cache_is_shared_between_instances_on_one_file(tmp_path) -> None:  # noqa: ANN001
+    path = tmp_path / "cache.sqlite3"
+    writer: SQLiteTTLCache[dict] = SQLiteTTLCache(path, namespace="closet", max_entries=10, ttl_seconds=60)
+    reader: SQLiteTTLCache[dict] = SQLiteTTLCache(path, namespace="closet", max_entries=10, ttl_seconds=60)
+    other: SQLiteTTLCache[dict] = SQLiteTTLCache(path, namespace="profiles", max_entries=10, ttl_seconds=60)
+
+    writer.set("user-1", {"items": [1, 2]})
+
+    assert reader.get("user-1") == {"items": [1, 2]}
+    assert other.get("user-1") is None
+
+    writer.pop("user-1")
+    assert reader.get("user-1") is None
+    assert reader.stats() == {"entries": 0, "hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_sqlite_cache_keeps_newest_entries_and_drops_expired(tmp_path) -> None:  # noqa: ANN001
+    cache: SQLiteTTLCache[int] = SQLiteTTLCache(
+        tmp_path / "cache.sqlite3", namespace="n", max_entries=2, ttl_seconds=60
+    )
+    cache.set("expired", 0, expires_at=time.time() - 1)
+    cache.set("a", 1, expires_at=time.time() + 10)
+    cache.set("b", 2, expires_at=time.time() + 20)
+    cache.set("c", 3, expires_at=time.time() + 30)
+
+    assert cache.get("expired") is None
+    assert cache.get("a") is None
+    assert (cache.get("b"), cache.get("c")) == (2, 3)
+    assert len(cache) == 2
+
+
+def test_tiered_cache_promotes_sqlite_hits_into_memory(tmp_path) -> None:  # noqa: ANN001
+    path = tmp_path / "cache.sqlite3"
+    writer: TieredTTLCache[int] = TieredTTLCache(
+        TTLCache(max_entries=10, ttl_seconds=60),
+        SQLiteTTLCache(path, namespace="n", max_entries=10, ttl_seconds=60),
+    )
+    reader: TieredTTLCache[int] = TieredTTLCache(
+        TTLCache(max_entries=10, ttl_seconds=60),
+        SQLiteTTLCache(path, namespace="n", max_entries=10, ttl_seconds=60),
+    )
+
+    writer.set("key", 1)
+
+    assert reader.get("missing") is None
+    assert reader.get("key") == 1
+    assert reader.get("key") == 1
+    assert reader.stats() == {"entries": 1, "hits": 2, "misses": 1, "hit_ratio": 0.6667, "memory_hits": 1}
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+from types import SimpleNamespace
+
 import pytest
+from pydantic import BaseModel
 
 from app.core.config import Settings
-from app.models.schemas import AnalyzeClosetLLMResponse
+from app.models.schemas import (
+    AnalyzeClosetLLMResponse,
+    ClosetItem,
+    GenerateOutfitsLLMResponse,
+    GenerateOutfitsRequest,
+)
 from app.services.gemini_service import (
     GeminiResponseFormatError,
     GeminiService,
     GeminiServiceError,
+    get_gemini_service,
 )
+from app.utils.file_validation import ImagePayload
 
 
 def build_service() -> GeminiService:
@@ -16,12 +28,74 @@ def build_service() -> GeminiService:
     return GeminiService(settings)
 
 
+def build_live_service(**overrides: object) -> GeminiService:
+    settings = Settings(_env_file=None, GEMINI_MOCK_MODE=False, GEMINI_API_KEY="test-key", **overrides)
+    return GeminiService(settings)
+
+
+def closet_item(item_id: str, name: str) -> ClosetItem:
+    return ClosetItem(
+        id=item_id,
+        name=name,
+        category="top",
+        color="white",
+        formality="casual",
+        seasonality=["summer"],
+    )
+
+
+def generate_request(**overrides: object) -> GenerateOutfitsRequest:
+    values: dict[str, object] = {
+        "closet_items": [closet_item("a", "White Tee"), closet_item("b", "Linen Shirt")],
+        "occasion": "Weekend trip",
+        "itinerary": "Museum then dinner",
+        "preferences": None,
+    }
+    values.update(overrides)
+    return GenerateOutfitsRequest(**values)
+
+
+def generated_outfits() -> GenerateOutfitsLLMResponse:
+    return build_service()._mock_generate_outfits(generate_request())
+
+
+def record_generations(
+    monkeypatch: pytest.MonkeyPatch,
+    service: GeminiService,
+    *results: BaseModel | Exception,
+) -> list[tuple[str, list[ImagePayload]]]:
+    calls: list[tuple[str, list[ImagePayload]]] = []
+    remaining = list(results)
+
+    async def fake_generate_json_with_retry(*, prompt: str, images: list, schema_model):  # noqa: ANN001
+        calls.append((prompt, images))
+        result = remaining.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(service, "_generate_json_with_retry", fake_generate_json_with_retry)
+    return calls
+
+
+def image(data: bytes) -> ImagePayload:
+    return ImagePayload(filename="photo.jpg", content_type="image/jpeg", data=data)
+
+
+def analysis(*names: str, warnings: list[str] | None = None) -> AnalyzeClosetLLMResponse:
+    return AnalyzeClosetLLMResponse(
+        summary="ok",
+        items=[closet_item(f"item-{idx}", name) for idx, name in enumerate(names, start=1)],
+        warnings=warnings or [],
+    )
+
+
 def test_generate_json_with_retry_recovers_after_format_error(monkeypatch: pytest.MonkeyPatch) -> None:
     service = build_service()
     expected = AnalyzeClosetLLMResponse(summary="ok", items=[], warnings=[])
     calls = {"count": 0}
 
-    def fake_generate_json_once(*, prompt: str, images: list, schema_model):  # noqa: ANN001
+    async def fake_generate_json_once(*, prompt: str, images: list, schema_model):  # noqa: ANN001
         calls["count"] += 1
         if calls["count"] == 1:
             raise GeminiResponseFormatError("invalid JSON")
@@ -29,10 +103,12 @@ def test_generate_json_with_retry_recovers_after_format_error(monkeypatch: pytes
 
     monkeypatch.setattr(service, "_generate_json_once", fake_generate_json_once)
 
-    parsed = service._generate_json_with_retry(
-        prompt="test prompt",
-        images=[],
-        schema_model=AnalyzeClosetLLMResponse,
+    parsed = asyncio.run(
+        service._generate_json_with_retry(
+            prompt="test prompt",
+            images=[],
+            schema_model=AnalyzeClosetLLMResponse,
+        )
     )
 
     assert parsed == expected
@@ -45,20 +121,72 @@ def test_generate_json_with_retry_does_not_retry_service_errors(
     service = build_service()
     calls = {"count": 0}
 
-    def fake_generate_json_once(*, prompt: str, images: list, schema_model):  # noqa: ANN001
+    async def fake_generate_json_once(*, prompt: str, images: list, schema_model):  # noqa: ANN001
         calls["count"] += 1
         raise GeminiServiceError("network failure")
 
     monkeypatch.setattr(service, "_generate_json_once", fake_generate_json_once)
 
     with pytest.raises(GeminiServiceError):
-        service._generate_json_with_retry(
+        asyncio.run(
+            service._generate_json_with_retry(
+                prompt="test prompt",
+                images=[],
+                schema_model=AnalyzeClosetLLMResponse,
+            )
+        )
+
+    assert calls["count"] == 1
+
+
+def test_generate_json_once_awaits_the_async_client() -> None:
+    service = build_service()
+    calls: list[dict] = []
+
+    async def generate_content(**kwargs):  # noqa: ANN003
+        calls.append(kwargs)
+        return SimpleNamespace(text='{"summary":"ok","items":[],"warnings":[]}')
+
+    def blocking_generate_content(**kwargs):  # noqa: ANN003
+        raise AssertionError("The blocking client must not be used when client.aio exists.")
+
+    service._client = SimpleNamespace(
+        models=SimpleNamespace(generate_content=blocking_generate_content),
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)),
+    )
+
+    parsed = asyncio.run(
+        service._generate_json_once(
             prompt="test prompt",
             images=[],
             schema_model=AnalyzeClosetLLMResponse,
         )
+    )
 
-    assert calls["count"] == 1
+    assert parsed.summary == "ok"
+    assert calls[0]["model"] == service.settings.gemini_model
+
+
+def test_generate_json_once_offloads_sync_client_to_a_thread() -> None:
+    service = build_service()
+    threads: list[threading.Thread] = []
+
+    def generate_content(**kwargs):  # noqa: ANN003
+        threads.append(threading.current_thread())
+        return SimpleNamespace(text='{"summary":"ok","items":[],"warnings":[]}')
+
+    service._client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+    parsed = asyncio.run(
+        service._generate_json_once(
+            prompt="test prompt",
+            images=[],
+            schema_model=AnalyzeClosetLLMResponse,
+        )
+    )
+
+    assert parsed.summary == "ok"
+    assert threads and threads[0] is not threading.main_thread()
 
 
 def test_parse_json_payload_accepts_fenced_json() -> None:
@@ -77,3 +205,282 @@ def test_parse_json_payload_rejects_invalid_json() -> None:
 
     with pytest.raises(GeminiResponseFormatError):
         service._parse_json_payload("not-json")
+
+
+def test_generate_outfits_reuses_responses_for_equivalent_requests(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = build_live_service()
+    expected = generated_outfits()
+    prompts = record_generations(monkeypatch, service, expected)
+
+    first = asyncio.run(service.generate_outfits(generate_request()))
+    second = asyncio.run(
+        service.generate_outfits(
+            generate_request(
+                closet_items=[closet_item("b", "Linen Shirt"), closet_item("a", "White Tee")],
+                occasion="  Weekend trip ",
+                preferences="  ",
+            )
+        )
+    )
+
+    assert first == second == expected
+    assert len(prompts) == 1
+    assert service.cache_stats()["generate_outfits_responses"]["hit_ratio"] == 0.5
+
+
+def test_generate_outfits_cache_key_covers_model_and_request() -> None:
+    service = build_live_service()
+    other_model = build_live_service(GEMINI_MODEL="gemini-other")
+    request = service._normalize_generate_request(generate_request())
+
+    key = service._generate_outfits_cache_key(request)
+
+    assert key == service._generate_outfits_cache_key(request.model_copy())
+    assert key != other_model._generate_outfits_cache_key(request)
+    assert key != service._generate_outfits_cache_key(
+        request.model_copy(update={"itinerary": "Beach"})
+    )
+
+
+def test_generate_outfits_does_not_cache_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    service = build_live_service()
+    expected = generated_outfits()
+    prompts = record_generations(
+        monkeypatch,
+        service,
+        GeminiResponseFormatError("invalid JSON"),
+        expected,
+    )
+
+    with pytest.raises(GeminiResponseFormatError):
+        asyncio.run(service.generate_outfits(generate_request()))
+    assert asyncio.run(service.generate_outfits(generate_request())) == expected
+    assert len(prompts) == 2
+
+
+def test_generate_outfits_cache_is_shared_through_sqlite(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path,  # noqa: ANN001
+) -> None:
+    overrides = {"CACHE_BACKEND": "sqlite", "CACHE_SQLITE_PATH": str(tmp_path / "cache.sqlite3")}
+    writer = build_live_service(**overrides)
+    reader = build_live_service(**overrides)
+    expected = generated_outfits()
+    record_generations(monkeypatch, writer, expected)
+    reader_prompts = record_generations(monkeypatch, reader)
+
+    asyncio.run(writer.generate_outfits(generate_request()))
+
+    assert asyncio.run(reader.generate_outfits(generate_request())) == expected
+    assert reader_prompts == []
+    writer.close()
+    reader.close()
+
+
+def test_analyze_closet_sends_only_unseen_images_to_the_model(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = build_live_service()
+    calls = record_generations(
+        monkeypatch,
+        service,
+        analysis("White Tee", warnings=["Blurry photo."]),
+        analysis("Navy Chinos", warnings=["Blurry photo."]),
+        analysis("Brown Loafers"),
+    )
+
+    first = asyncio.run(
+        service.analyze_closet(manual_clothes_text=None, images=[image(b"tee"), image(b"tee")])
+    )
+    merged = asyncio.run(
+        service.analyze_closet(
+            manual_clothes_text="brown loafers",
+            images=[image(b"tee"), image(b"chinos")],
+        )
+    )
+    repeated = asyncio.run(
+        service.analyze_closet(
+            manual_clothes_text="brown loafers",
+            images=[image(b"chinos"), image(b"tee")],
+        )
+    )
+
+    assert [item.name for item in first.items] == ["White Tee"]
+    assert [[payload.data for payload in images] for _, images in calls] == [[b"tee"], [b"chinos"], []]
+    assert "brown loafers" in calls[2][0]
+    assert [item.name for item in merged.items] == ["White Tee", "Navy Chinos", "Brown Loafers"]
+    assert [item.id for item in merged.items] == ["item-1", "item-2", "item-3"]
+    assert merged.warnings == ["Blurry photo."]
+    assert merged.summary == "Parsed 3 clothing items from 2 images and manual notes."
+    assert len(repeated.items) == 3
+    assert len(calls) == 3
+
+
+def test_analysis_cache_key_covers_model_and_content() -> None:
+    service = build_live_service()
+    other_model = build_live_service(GEMINI_MODEL="gemini-other")
+
+    key = service._analysis_cache_key("image", "abc")
+
+    assert key != other_model._analysis_cache_key("image", "abc")
+    assert key != service._analysis_cache_key("text", "abc")
+    assert key != service._analysis_cache_key("image", "abd")
+
+
+def test_analyze_closet_fans_out_images_under_the_concurrency_limit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = build_live_service(GEMINI_ANALYZE_CONCURRENCY=2)
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_generate_json_with_retry(*, prompt: str, images: list, schema_model):  # noqa: ANN001
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return analysis(images[0].data.decode())
+
+    monkeypatch.setattr(service, "_generate_json_with_retry", fake_generate_json_with_retry)
+
+    merged = asyncio.run(
+        service.analyze_closet(
+            manual_clothes_text=None,
+            images=[image(name.encode()) for name in ["Tee", "Chinos", "Loafers", "Blazer", "Watch"]],
+        )
+    )
+
+    assert in_flight["max"] == 2
+    assert [item.name for item in merged.items] == ["Tee", "Chinos", "Loafers", "Blazer", "Watch"]
+
+
+def test_analyze_closet_concurrency_limit_is_shared_across_requests(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = build_live_service(GEMINI_ANALYZE_CONCURRENCY=2)
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_generate_json_with_retry(*, prompt: str, images: list, schema_model):  # noqa: ANN001
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return analysis(images[0].data.decode())
+
+    monkeypatch.setattr(service, "_generate_json_with_retry", fake_generate_json_with_retry)
+
+    async def upload_concurrently() -> list:
+        return await asyncio.gather(
+            *(
+                service.analyze_closet(
+                    manual_clothes_text=None,
+                    images=[image(f"{name} {n}".encode()) for n in range(3)],
+                )
+                for name in ["Tee", "Chinos", "Loafers"]
+            )
+        )
+
+    merged = asyncio.run(upload_concurrently())
+
+    assert in_flight["max"] == 2
+    assert [len(result.items) for result in merged] == [3, 3, 3]
+
+
+def test_analyze_closet_keeps_successful_analyses_when_one_image_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = build_live_service()
+    calls = record_generations(
+        monkeypatch,
+        service,
+        analysis("White Tee"),
+        GeminiResponseFormatError("invalid JSON"),
+        analysis("Navy Chinos"),
+    )
+    images = [image(b"tee"), image(b"chinos")]
+
+    with pytest.raises(GeminiResponseFormatError):
+        asyncio.run(service.analyze_closet(manual_clothes_text=None, images=images))
+    merged = asyncio.run(service.analyze_closet(manual_clothes_text=None, images=images))
+
+    assert [[payload.data for payload in sent] for _, sent in calls] == [[b"tee"], [b"chinos"], [b"chinos"]]
+    assert [item.name for item in merged.items] == ["White Tee", "Navy Chinos"]
+
+
+def test_merge_analyses_dedupes_items_across_images_and_manual_text() -> None:
+    photo = analysis("White  Tee", "Navy Chinos")
+    manual_tee = ClosetItem(
+        id="item-1",
+        name="white tee",
+        category="top",
+        color="White",
+        material="cotton",
+        formality="casual",
+        seasonality=["spring"],
+        tags=["manual-input"],
+    )
+    manual = AnalyzeClosetLLMResponse(summary="ok", items=[manual_tee], warnings=[])
+
+    merged = GeminiService._merge_analyses([photo, manual], image_count=1)
+
+    assert [item.id for item in merged.items] == ["item-1", "item-2"]
+    tee = merged.items[0]
+    assert (tee.name, tee.material, tee.tags) == ("White  Tee", "cotton", ["manual-input"])
+    assert [season.value for season in tee.seasonality] == ["summer", "spring"]
+    assert merged.summary == "Parsed 2 clothing items from 1 image and manual notes."
+
+
+def test_concurrent_identical_generations_share_one_model_call(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = build_live_service()
+    expected = generated_outfits()
+    calls = {"count": 0}
+
+    async def fake_generate_json_once(*, prompt: str, images: list, schema_model):  # noqa: ANN001
+        calls["count"] += 1
+        await asyncio.sleep(0.01)
+        return expected
+
+    monkeypatch.setattr(service, "_generate_json_once", fake_generate_json_once)
+
+    async def scenario() -> list[GenerateOutfitsLLMResponse]:
+        return await asyncio.gather(
+            service.generate_outfits(generate_request()),
+            service.generate_outfits(generate_request(occasion=" Weekend trip")),
+            service.generate_outfits(generate_request(itinerary="Beach")),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert results[0] == results[1] == results[2] == expected
+    assert calls["count"] == 2
+    assert service.cache_stats()["gemini_requests"] == {"in_flight": 0, "started": 2, "joined": 1}
+
+
+def test_flight_key_covers_prompt_images_and_schema() -> None:
+    service = build_live_service()
+
+    key = service._flight_key(prompt="p", images=[image(b"a")], schema_model=AnalyzeClosetLLMResponse)
+
+    assert key == service._flight_key(prompt="p", images=[image(b"a")], schema_model=AnalyzeClosetLLMResponse)
+    assert key != service._flight_key(prompt="p", images=[image(b"b")], schema_model=AnalyzeClosetLLMResponse)
+    assert key != service._flight_key(prompt="q", images=[image(b"a")], schema_model=AnalyzeClosetLLMResponse)
+    assert key != service._flight_key(
+        prompt="p",
+        images=[image(b"a")],
+        schema_model=GenerateOutfitsLLMResponse,
+    )
+
+
+def test_get_gemini_service_builds_one_service_for_concurrent_first_requests() -> None:
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+    settings = Settings(_env_file=None, GEMINI_MOCK_MODE=True)
+
+    async def scenario() -> list[GeminiService]:
+        return await asyncio.gather(*(get_gemini_service(request, settings) for _ in range(5)))
+
+    services = asyncio.run(scenario())
+
+    assert all(service is request.app.state.gemini_service for service in services)
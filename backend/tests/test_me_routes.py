@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+import httpx
 from fastapi.testclient import TestClient
 
+from app.core.config import Settings
 from app.main import app
 from app.models.schemas import (
+    ClosetItem,
     ClosetItemRecord,
     ClothingCategory,
     Formality,
@@ -16,7 +19,9 @@ from app.models.schemas import (
     Season,
 )
 from app.services.gemini_service import get_gemini_service
-from app.services.supabase_service import SupabaseAuthError, get_supabase_service
+from app.services.supabase_service import SupabaseAuthError, SupabaseService, get_supabase_service
+from app.utils.http_caching import build_etag
+from app.utils.pagination import Page, encode_sync_cursor
 
 
 client = TestClient(app)
@@ -26,8 +31,9 @@ class FakeSupabaseService:
     def __init__(self) -> None:
         self.items: dict[str, ClosetItemRecord] = {}
         self.saved: dict[str, SavedOutfitRecord] = {}
+        self.invalidated_tokens: list[str] = []
 
-    def validate_access_token(self, access_token: str):  # noqa: ANN001
+    async def validate_access_token(self, access_token: str):  # noqa: ANN001
         if access_token != "good-token":
             raise SupabaseAuthError("Invalid or expired Supabase session token.")
         from app.models.schemas import AuthenticatedUser
@@ -39,7 +45,10 @@ class FakeSupabaseService:
             access_token=access_token,
         )
 
-    def upsert_profile(
+    def invalidate_access_token(self, access_token: str) -> None:
+        self.invalidated_tokens.append(access_token)
+
+    async def upsert_profile(
         self,
         *,
         user_id: str,
@@ -48,7 +57,7 @@ class FakeSupabaseService:
     ) -> None:
         return None
 
-    def list_closet_items(
+    async def list_closet_items(
         self,
         *,
         user_id: str,
@@ -56,7 +65,61 @@ class FakeSupabaseService:
     ) -> list[ClosetItemRecord]:
         return [item for item in self.items.values() if item.user_id == user_id]
 
-    def create_closet_item(
+    async def list_generation_closet_items(
+        self,
+        *,
+        user_id: str,
+        access_token: str | None = None,
+    ):
+        return [
+            ClosetItem.model_validate(item.model_dump(include=set(ClosetItem.model_fields)))
+            for item in self.items.values()
+            if item.user_id == user_id
+        ]
+
+    async def closet_items_etag(
+        self,
+        *,
+        user_id: str,
+        variant: str = "",
+        access_token: str | None = None,
+    ) -> str:
+        versions = sorted((item.id, item.updated_at.isoformat()) for item in self.items.values())
+        return build_etag(user_id, versions, variant)
+
+    async def saved_outfits_etag(
+        self,
+        *,
+        user_id: str,
+        variant: str = "",
+        access_token: str | None = None,
+    ) -> str:
+        return build_etag(user_id, sorted(self.saved), variant)
+
+    async def list_closet_items_page(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> Page[ClosetItemRecord]:
+        items = await self.list_closet_items(user_id=user_id, access_token=access_token)
+        return Page(items=items)
+
+    async def list_closet_item_fields_page(
+        self,
+        *,
+        user_id: str,
+        fields: list[str],
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> Page[dict]:
+        items = await self.list_closet_items(user_id=user_id, access_token=access_token)
+        return Page(items=[item.model_dump(mode="json", include=set(fields)) for item in items])
+
+    async def create_closet_item(
         self,
         *,
         user_id: str,
@@ -85,7 +148,32 @@ class FakeSupabaseService:
         self.items[record.id] = record
         return record
 
-    def update_closet_item(
+    async def create_closet_items(
+        self,
+        *,
+        user_id: str,
+        payloads,  # noqa: ANN001
+        access_token: str | None = None,
+    ):
+        records = []
+        for index, payload in enumerate(payloads):
+            record = await self.create_closet_item(user_id=user_id, payload=payload)
+            record = record.model_copy(update={"id": f"bulk-{index}"})
+            self.items.pop("item-1", None)
+            self.items[record.id] = record
+            records.append(record)
+        return records
+
+    async def delete_closet_items(
+        self,
+        *,
+        user_id: str,
+        item_ids: list[str],
+        access_token: str | None = None,
+    ) -> list[str]:
+        return [item_id for item_id in item_ids if self.items.pop(item_id, None) is not None]
+
+    async def update_closet_item(
         self,
         *,
         user_id: str,
@@ -99,7 +187,7 @@ class FakeSupabaseService:
         self.items[item_id] = updated
         return updated
 
-    def delete_closet_item(
+    async def delete_closet_item(
         self,
         *,
         user_id: str,
@@ -108,7 +196,7 @@ class FakeSupabaseService:
     ) -> None:
         self.items.pop(item_id, None)
 
-    def set_closet_item_image(
+    async def set_closet_item_image(
         self,
         *,
         user_id: str,
@@ -129,7 +217,7 @@ class FakeSupabaseService:
         self.items[item_id] = updated
         return updated
 
-    def clear_closet_item_image(
+    async def clear_closet_item_image(
         self,
         *,
         user_id: str,
@@ -148,7 +236,7 @@ class FakeSupabaseService:
         self.items[item_id] = updated
         return updated
 
-    def list_saved_outfits(
+    async def list_saved_outfits(
         self,
         *,
         user_id: str,
@@ -156,7 +244,18 @@ class FakeSupabaseService:
     ) -> list[SavedOutfitRecord]:
         return [item for item in self.saved.values() if item.user_id == user_id]
 
-    def create_saved_outfit(
+    async def list_saved_outfits_page(
+        self,
+        *,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        access_token: str | None = None,
+    ) -> Page[SavedOutfitRecord]:
+        items = await self.list_saved_outfits(user_id=user_id, access_token=access_token)
+        return Page(items=items)
+
+    async def create_saved_outfit(
         self,
         *,
         user_id: str,
@@ -176,7 +275,7 @@ class FakeSupabaseService:
         self.saved[record.id] = record
         return record
 
-    def delete_saved_outfit(
+    async def delete_saved_outfit(
         self,
         *,
         user_id: str,
@@ -185,15 +284,9 @@ class FakeSupabaseService:
     ) -> None:
         self.saved.pop(saved_outfit_id, None)
 
-    @staticmethod
-    def to_generation_closet_items(items: list[ClosetItemRecord]):  # noqa: ANN001
-        from app.services.supabase_service import SupabaseService
-
-        return SupabaseService.to_generation_closet_items(items)
-
 
 class FakeGeminiService:
-    def generate_outfits(self, request):  # noqa: ANN001
+    async def generate_outfits(self, request):  # noqa: ANN001
         outfit_1 = OutfitSuggestion(
             outfit_id="outfit-1",
             title="Primary",
@@ -259,6 +352,18 @@ def test_me_endpoint_returns_user() -> None:
     assert response.json()["user_id"] == "user-1"
 
 
+def test_logout_invalidates_cached_token() -> None:
+    fake_supabase = setup_overrides()
+    try:
+        response = client.post("/api/me/logout", headers=auth_headers())
+    finally:
+        teardown_overrides()
+
+    assert response.status_code == 200
+    assert response.json() == {"logged_out": True}
+    assert fake_supabase.invalidated_tokens == ["good-token"]
+
+
 def test_closet_item_create_update_delete_flow() -> None:
     fake_supabase = setup_overrides()
     payload = {
@@ -297,6 +402,199 @@ def test_closet_item_create_update_delete_flow() -> None:
     assert fake_supabase.items == {}
 
 
+def test_bulk_create_closet_items_reports_each_item() -> None:
+    fake_supabase = setup_overrides()
+    valid_item = {
+        "name": "White Tee",
+        "category": "top",
+        "color": "white",
+        "formality": "casual",
+        "seasonality": ["summer"],
+    }
+    try:
+        response = client.post(
+            "/api/me/closet-items:bulk",
+            headers=auth_headers(),
+            json={"items": [valid_item, {"name": "No category"}, {**valid_item, "name": "Grey Tee"}]},
+        )
+        too_many = client.post(
+            "/api/me/closet-items:bulk",
+            headers=auth_headers(),
+            json={"items": [valid_item] * 101},
+        )
+    finally:
+        teardown_overrides()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created_count"] == 2
+    assert body["failed_count"] == 1
+    assert [result["created"] for result in body["results"]] == [True, False, True]
+    assert body["results"][2]["item"]["name"] == "Grey Tee"
+    assert "category" in body["results"][1]["error"]
+    assert len(fake_supabase.items) == 2
+    assert too_many.status_code == 400
+
+
+def test_bulk_delete_closet_items_returns_deleted_ids() -> None:
+    fake_supabase = setup_overrides()
+    try:
+        client.post(
+            "/api/me/closet-items",
+            headers=auth_headers(),
+            json={
+                "name": "White Tee",
+                "category": "top",
+                "color": "white",
+                "formality": "casual",
+                "seasonality": ["summer"],
+            },
+        )
+        response = client.post(
+            "/api/me/closet-items:bulk-delete",
+            headers=auth_headers(),
+            json={"ids": ["item-1", "item-404"]},
+        )
+    finally:
+        teardown_overrides()
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted_ids": ["item-1"]}
+    assert fake_supabase.items == {}
+
+
+def test_bulk_delete_ignores_malformed_ids_instead_of_failing_the_batch() -> None:
+    item_id = "00000000-0000-4000-8000-000000000001"
+    filters: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/v1/user":
+            return httpx.Response(200, json={"id": "user-1", "email": "owner@example.com"})
+        filters.append(request.url.params["id"])
+        if "not-a-uuid" in request.url.params["id"]:
+            # What PostgREST returns when any value in a uuid filter fails to parse.
+            return httpx.Response(
+                400,
+                json={"code": "22P02", "message": "invalid input syntax for type uuid"},
+            )
+        return httpx.Response(200, json=[{"id": item_id, "image_path": None}])
+
+    service = SupabaseService(
+        Settings(
+            _env_file=None,
+            SUPABASE_URL="https://project.supabase.co",
+            SUPABASE_PUBLISHABLE_KEY="sb_publishable_test",
+            SUPABASE_JWT_LOCAL_VERIFICATION=False,
+        ),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    app.dependency_overrides[get_supabase_service] = lambda: service
+    try:
+        response = client.post(
+            "/api/me/closet-items:bulk-delete",
+            headers=auth_headers(),
+            json={"ids": [item_id, "not-a-uuid"]},
+        )
+    finally:
+        teardown_overrides()
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted_ids": [item_id]}
+    assert filters == [f'in.("{item_id}")']
+
+
+def test_closet_item_changes_returns_410_for_expired_cursors() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/v1/user":
+            return httpx.Response(200, json={"id": "user-1", "email": "owner@example.com"})
+        return httpx.Response(
+            200,
+            json={"items": [], "deletions": [], "server_time": "2026-03-31T12:00:00+00:00"},
+        )
+
+    service = SupabaseService(
+        Settings(
+            _env_file=None,
+            SUPABASE_URL="https://project.supabase.co",
+            SUPABASE_PUBLISHABLE_KEY="sb_publishable_test",
+            SUPABASE_JWT_LOCAL_VERIFICATION=False,
+        ),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    app.dependency_overrides[get_supabase_service] = lambda: service
+    try:
+        response = client.get(
+            "/api/me/closet-items/changes",
+            headers=auth_headers(),
+            params={"since": encode_sync_cursor(datetime(2025, 1, 1, tzinfo=timezone.utc))},
+        )
+    finally:
+        teardown_overrides()
+
+    assert response.status_code == 410
+
+
+def test_closet_items_list_returns_sparse_fieldsets() -> None:
+    setup_overrides()
+    try:
+        client.post(
+            "/api/me/closet-items",
+            headers=auth_headers(),
+            json={
+                "name": "White Tee",
+                "category": "top",
+                "color": "white",
+                "formality": "casual",
+                "seasonality": ["summer"],
+            },
+        )
+        sparse = client.get("/api/me/closet-items?fields=id,name", headers=auth_headers())
+        full = client.get("/api/me/closet-items", headers=auth_headers())
+        unknown = client.get("/api/me/closet-items?fields=id,secret", headers=auth_headers())
+    finally:
+        teardown_overrides()
+
+    assert sparse.status_code == 200
+    assert sparse.json() == [{"id": "item-1", "name": "White Tee"}]
+    assert sparse.headers["etag"] != full.headers["etag"]
+    assert unknown.status_code == 400
+    assert "secret" in unknown.json()["detail"]
+
+
+def test_closet_items_list_honours_if_none_match() -> None:
+    fake_supabase = setup_overrides()
+    payload = {
+        "name": "White Tee",
+        "category": "top",
+        "color": "white",
+        "formality": "casual",
+        "seasonality": ["spring"],
+    }
+    try:
+        client.post("/api/me/closet-items", headers=auth_headers(), json=payload)
+        first = client.get("/api/me/closet-items", headers=auth_headers())
+        etag = first.headers["etag"]
+
+        unchanged = client.get(
+            "/api/me/closet-items",
+            headers={**auth_headers(), "If-None-Match": etag},
+        )
+        assert unchanged.status_code == 304
+        assert unchanged.headers["etag"] == etag
+
+        client.patch("/api/me/closet-items/item-1", headers=auth_headers(), json={"color": "black"})
+        changed = client.get(
+            "/api/me/closet-items",
+            headers={**auth_headers(), "If-None-Match": etag},
+        )
+    finally:
+        teardown_overrides()
+
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert fake_supabase.items["item-1"].color == "black"
+
+
 def test_generate_outfits_from_saved_closet() -> None:
     fake_supabase = setup_overrides()
     now = datetime.now(timezone.utc)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import Settings
+from app.services.postgres_repository import bulk_insert_query, keyset_query, update_query
+from app.services.supabase_service import SupabaseService, SupabaseServiceError
+from app.utils.pagination import InvalidCursorError, encode_cursor
+
+
+def test_keyset_query_continues_after_cursor_row() -> None:
+    created_at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, "item-9")
+
+    query, args = keyset_query("closet_items", user_id="user-1", cursor=cursor, limit=20)
+
+    assert query == (
+        "select * from public.closet_items where user_id = $1"
+        " and (created_at, id) < ($2, $3)"
+        " order by created_at desc, id desc limit $4"
+    )
+    assert args == ["user-1", created_at, "item-9", 21]
+
+
+def test_keyset_query_without_cursor_or_limit_lists_everything() -> None:
+    query, args = keyset_query("saved_outfits", user_id="user-1", cursor=None, limit=None)
+
+    assert query == (
+        "select * from public.saved_outfits where user_id = $1 order by created_at desc, id desc"
+    )
+    assert args == ["user-1"]
+
+
+def test_keyset_query_projects_only_known_columns() -> None:
+    query, _ = keyset_query(
+        "closet_items",
+        user_id="user-1",
+        cursor=None,
+        limit=None,
+        columns=["id", "name"],
+    )
+
+    assert query.startswith("select id,name from public.closet_items where user_id = $1")
+    with pytest.raises(SupabaseServiceError):
+        keyset_query(
+            "closet_items",
+            user_id="user-1",
+            cursor=None,
+            limit=None,
+            columns=["id", "name; drop table closet_items"],
+        )
+
+
+def test_keyset_query_rejects_malformed_cursor() -> None:
+    with pytest.raises(InvalidCursorError):
+        keyset_query("closet_items", user_id="user-1", cursor="not-a-cursor", limit=10)
+
+
+def test_update_query_scopes_to_owner_and_rejects_unknown_columns() -> None:
+    query, args = update_query(
+        "closet_items",
+        row_id="item-1",
+        user_id="user-1",
+        values={"name": "Coat", "color": "black"},
+    )
+
+    assert query == (
+        "update public.closet_items set color = $3, name = $4"
+        " where id = $1 and user_id = $2 returning *"
+    )
+    assert args == ["item-1", "user-1", "black", "Coat"]
+
+    with pytest.raises(SupabaseServiceError, match="Unknown closet_items columns: id"):
+        update_query("closet_items", row_id="item-1", user_id="user-1", values={"id": "x"})
+
+
+def test_bulk_insert_query_expands_one_jsonb_parameter() -> None:
+    rows = [{"user_id": "user-1", "name": "Tee"}, {"user_id": "user-1", "name": "Shirt"}]
+
+    query, args = bulk_insert_query("closet_items", rows)
+
+    assert query == (
+        "insert into public.closet_items (name, user_id) select name, user_id"
+        " from jsonb_populate_recordset(null::public.closet_items, $1::jsonb) returning *"
+    )
+    assert args == [rows]
+
+
+def test_postgres_backend_requires_db_url() -> None:
+    settings = Settings(
+        _env_file=None,
+        SUPABASE_URL="https://project.supabase.co",
+        SUPABASE_PUBLISHABLE_KEY="sb_publishable_test",
+        SUPABASE_DATA_BACKEND="postgres",
+    )
+
+    with pytest.raises(SupabaseServiceError, match="SUPABASE_DB_URL"):
+        SupabaseService(settings)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.jobs.reconcile_storage import StorageReconciler, StoredObject, find_orphans
+from app.services.supabase_service import SupabaseService, SupabaseServiceError
+
+NOW = datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+
+def test_find_orphans_skips_referenced_and_recent_objects() -> None:
+    old = NOW - timedelta(days=3)
+    objects = [
+        StoredObject("user-1/item-1/primary.png", old),
+        StoredObject("user-1/item-1/primary.jpg", old),
+        StoredObject("user-1/item-2/primary.png", NOW - timedelta(minutes=5)),
+        StoredObject("user-1/item-3/primary.png", None),
+    ]
+
+    orphans = find_orphans(
+        objects,
+        {"user-1/item-1/primary.png"},
+        older_than=NOW - timedelta(hours=24),
+    )
+
+    assert [orphan.path for orphan in orphans] == ["user-1/item-1/primary.jpg"]
+
+
+def build_service(handler, **overrides) -> SupabaseService:  # noqa: ANN001, ANN003
+    values = {
+        "SUPABASE_URL": "https://project.supabase.co",
+        "SUPABASE_PUBLISHABLE_KEY": "sb_publishable_test",
+        "SUPABASE_SERVICE_ROLE_KEY": "service-role",
+    }
+    values.update(overrides)
+    return SupabaseService(
+        Settings(_env_file=None, **values),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+def storage_handler(objects: dict[str, str], removed: list[list[str]], calls: list[str]):  # noqa: ANN201
+    """Serve the root folder listing and the keyset object RPC from `objects` (path -> updated_at)."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/storage/v1/object/list/closet-item-images":
+            body = json.loads(request.content)
+            assert body["prefix"] == ""
+            users = sorted({path.split("/")[0] for path in objects})
+            page = users[body["offset"] : body["offset"] + body["limit"]]
+            return httpx.Response(200, json=[{"name": user, "id": None} for user in page])
+        if request.url.path == "/rest/v1/rpc/list_storage_object_page":
+            body = json.loads(request.content)
+            names = sorted(
+                path
+                for path in objects
+                if path.startswith(body["p_prefix"]) and (body["p_after"] is None or path > body["p_after"])
+            )
+            return httpx.Response(
+                200,
+                json=[{"name": name, "updated_at": objects[name]} for name in names[: body["p_limit"]]],
+            )
+        if request.url.path == "/rest/v1/closet_items":
+            if "id" in request.url.params:
+                return httpx.Response(200, json=[])
+            return httpx.Response(200, json=[{"id": "item-1", "image_path": "user-1/item-1/primary.png"}])
+        if request.method == "DELETE":
+            removed.append(json.loads(request.content)["prefixes"])
+            return httpx.Response(200, json=[])
+        raise AssertionError(f"unexpected request {request.method} {request.url}")
+
+    return handler
+
+
+def test_reconciler_walks_user_folders_and_deletes_orphans_in_batches() -> None:
+    written = "2026-01-01T00:00:00Z"
+    objects = {
+        "user-1/item-1/primary.png": written,
+        "user-1/item-1/primary.jpg": written,
+        "user-1/item-2/primary.webp": written,
+    }
+    removed: list[list[str]] = []
+    handler = storage_handler(objects, removed, [])
+
+    stats = asyncio.run(
+        StorageReconciler(build_service(handler), page_size=1, delete_batch_size=1).run()
+    )
+
+    assert removed == [["user-1/item-1/primary.jpg"], ["user-1/item-2/primary.webp"]]
+    assert (stats.users, stats.objects_scanned, stats.orphans_found, stats.orphans_deleted) == (1, 3, 2, 2)
+
+    removed.clear()
+    dry_run = asyncio.run(StorageReconciler(build_service(handler), dry_run=True).run())
+    assert removed == []
+    assert (dry_run.orphans_found, dry_run.orphans_deleted) == (2, 0)
+
+
+def test_reconciler_lists_a_user_in_pages_not_per_item_folder() -> None:
+    objects = {f"user-1/item-{index:03d}/primary.png": "2026-01-01T00:00:00Z" for index in range(250)}
+    calls: list[str] = []
+    handler = storage_handler(objects, [], calls)
+
+    stats = asyncio.run(StorageReconciler(build_service(handler), page_size=100, dry_run=True).run())
+
+    assert stats.objects_scanned == 250
+    assert calls.count("/rest/v1/rpc/list_storage_object_page") == 3
+    assert calls.count("/storage/v1/object/list/closet-item-images") == 1
+
+
+def test_reconciler_refuses_to_run_without_service_role() -> None:
+    service = build_service(lambda request: httpx.Response(200, json=[]), SUPABASE_SERVICE_ROLE_KEY="")
+
+    with pytest.raises(SupabaseServiceError, match="SUPABASE_SERVICE_ROLE_KEY"):
+        asyncio.run(StorageReconciler(service).run())
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    calls = {"count": 0}
+
+    async def fetch() -> str:
+        calls["count"] += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario() -> list[str]:
+        return await asyncio.gather(*(flight.run("key", fetch) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["result"] * 3
+    assert calls["count"] == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "joined": 2}
+
+
+def test_single_flight_propagates_errors_to_every_caller_and_forgets_the_call() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    calls = {"count": 0}
+
+    async def fetch() -> str:
+        calls["count"] += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def scenario() -> list[object]:
+        return await asyncio.gather(
+            *(flight.run("key", fetch) for _ in range(2)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [str(result) for result in results] == ["upstream failed"] * 2
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.run("key", fetch))
+    assert calls["count"] == 2
+
+
+def test_single_flight_cancelled_caller_does_not_cancel_the_others() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def fetch() -> str:
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def scenario() -> str:
+        first = asyncio.create_task(flight.run("key", fetch))
+        second = asyncio.create_task(flight.run("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "result"
+
+
+def test_single_flight_cancels_the_call_when_every_caller_gives_up() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    upstream: dict[str, bool] = {"cancelled": False}
+
+    async def fetch() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream["cancelled"] = True
+            raise
+        return "stale"
+
+    async def fresh() -> str:
+        return "fresh"
+
+    async def scenario() -> str:
+        caller = asyncio.create_task(flight.run("key", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        # A new caller starts over instead of joining the cancelled call.
+        result = await flight.run("key", fresh)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == "fresh"
+    assert upstream["cancelled"] is True
+    assert len(flight) == 0
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.jobs.storage_cleanup import StorageCleanupWorker
+from app.services.supabase_service import SupabaseService
+
+
+def build_settings(**overrides) -> Settings:  # noqa: ANN003
+    values = {
+        "SUPABASE_URL": "https://project.supabase.co",
+        "SUPABASE_PUBLISHABLE_KEY": "sb_publishable_test",
+        "SUPABASE_SERVICE_ROLE_KEY": "service-role",
+    }
+    values.update(overrides)
+    return Settings(_env_file=None, **values)
+
+
+def test_drain_once_removes_batches_per_bucket_and_keeps_failures_queued() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/rest/v1/rpc/claim_storage_cleanup_batch":
+            return httpx.Response(
+                200,
+                json=[
+                    {"id": 1, "bucket_id": "closet-item-images", "object_path": "user-1/a/primary.png"},
+                    {"id": 2, "bucket_id": "closet-item-images", "object_path": "user-1/b/primary.png"},
+                    {"id": 3, "bucket_id": "legacy-images", "object_path": "user-1/c/primary.png"},
+                ],
+            )
+        if request.url.path == "/storage/v1/object/legacy-images":
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200, json=[])
+
+    settings = build_settings(STORAGE_CLEANUP_BATCH_SIZE="50")
+    service = SupabaseService(
+        settings,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    claimed = asyncio.run(StorageCleanupWorker(service, settings).drain_once())
+
+    assert claimed == 3
+    claim = requests[0]
+    assert json.loads(claim.content)["p_limit"] == 50
+    assert claim.headers["Authorization"] == "Bearer service-role"
+
+    removals = {
+        request.url.path: json.loads(request.content)
+        for request in requests
+        if request.url.path.startswith("/storage/v1/object/")
+    }
+    assert removals["/storage/v1/object/closet-item-images"] == {
+        "prefixes": ["user-1/a/primary.png", "user-1/b/primary.png"]
+    }
+
+    assert set(removals) == {"/storage/v1/object/closet-item-images", "/storage/v1/object/legacy-images"}
+    completed = [request for request in requests if request.url.path.startswith("/rest/v1/storage_")]
+    assert len(completed) == 1
+    completed = completed[0]
+    assert completed.method == "DELETE"
+    assert completed.url.path == "/rest/v1/storage_cleanup_queue"
+    assert completed.url.params["id"] == 'in.("1","2")'
+
+
+def test_durable_queue_replaces_in_process_cleanup_only_with_service_role() -> None:
+    durable = SupabaseService(build_settings())
+    in_process = SupabaseService(build_settings(SUPABASE_SERVICE_ROLE_KEY=""))
+    disabled = SupabaseService(build_settings(STORAGE_CLEANUP_QUEUE="false"))
+
+    assert durable.durable_storage_cleanup
+    assert not in_process.durable_storage_cleanup
+    assert not disabled.durable_storage_cleanup
+
+
+def test_drain_once_uses_configured_bucket_and_reports_exhausted_entries(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    removal_paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rest/v1/rpc/claim_storage_cleanup_batch":
+            return httpx.Response(
+                200,
+                json=[
+                    {"id": 1, "bucket_id": None, "object_path": "user-1/a/old.png", "attempts": 3},
+                    {"id": 2, "bucket_id": None, "object_path": "user-1/b/old.png", "attempts": 1},
+                ],
+            )
+        removal_paths.append(request.url.path)
+        return httpx.Response(503, text="unavailable")
+
+    settings = build_settings(SUPABASE_STORAGE_BUCKET="wardrobe", STORAGE_CLEANUP_MAX_ATTEMPTS="3")
+    service = SupabaseService(
+        settings,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    with caplog.at_level(logging.ERROR, logger="app.jobs.storage_cleanup"):
+        asyncio.run(StorageCleanupWorker(service, settings).drain_once())
+
+    assert removal_paths == ["/storage/v1/object/wardrobe"]
+    [record] = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert "user-1/a/old.png" in record.getMessage()
+    assert "user-1/b/old.png" not in record.getMessage()
@@ -0,0 +1,993 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings
+from app.models.schemas import ClosetItemCreate, ClosetItemUpdate
+from app.main import app
+from app.services.repository import in_filter
+from app.services.supabase_service import (
+    CLOSET_ITEM_RECORDS_ADAPTER,
+    SupabaseAuthError,
+    SupabaseNotFoundError,
+    SupabaseService,
+    SupabaseServiceError,
+    SyncCursorExpiredError,
+    _validate_rows,
+    build_supabase_http_client,
+    get_supabase_service,
+)
+from app.utils.pagination import InvalidCursorError, decode_sync_cursor, encode_sync_cursor
+
+
+ITEM_1 = "00000000-0000-4000-8000-000000000001"
+ITEM_2 = "00000000-0000-4000-8000-000000000002"
+ITEM_3 = "00000000-0000-4000-8000-000000000003"
+ITEM_MISSING = "00000000-0000-4000-8000-0000000000ff"
+
+
+def build_settings(**overrides) -> Settings:  # noqa: ANN003
+    values = {
+        "SUPABASE_URL": "https://project.supabase.co",
+        "SUPABASE_PUBLISHABLE_KEY": "sb_publishable_test",
+    }
+    values.update(overrides)
+    return Settings(_env_file=None, **values)
+
+
+def test_build_supabase_http_client_applies_pool_limits() -> None:
+    client = build_supabase_http_client(
+        build_settings(
+            SUPABASE_HTTP_MAX_CONNECTIONS=7,
+            SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS=3,
+        )
+    )
+    try:
+        pool = client._transport._pool
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+    finally:
+        asyncio.run(client.aclose())
+
+
+def test_service_does_not_close_shared_client() -> None:
+    shared = httpx.AsyncClient()
+    service = SupabaseService(build_settings(), client=shared)
+
+    asyncio.run(service.aclose())
+
+    assert not shared.is_closed
+    asyncio.run(shared.aclose())
+
+
+def test_get_supabase_service_is_process_wide_and_closed_at_shutdown() -> None:
+    settings = build_settings()
+
+    class FakeRequest:
+        def __init__(self) -> None:
+            self.app = app
+
+    with TestClient(app):
+        shared = app.state.supabase_http_client
+        first = asyncio.run(get_supabase_service(FakeRequest(), settings))
+        second = asyncio.run(get_supabase_service(FakeRequest(), settings))
+
+        assert first is second
+        assert first._client is shared
+
+    assert shared.is_closed
+    assert app.state.supabase_service is None
+
+
+def build_service_with_handler(handler, **overrides) -> SupabaseService:  # noqa: ANN001, ANN003
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return SupabaseService(build_settings(**overrides), client=client)
+
+
+def test_set_closet_item_image_removes_upload_when_item_is_missing() -> None:
+    calls: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.url.path == "/rest/v1/rpc/replace_closet_item_image":
+            return httpx.Response(200, json=None)
+        if request.url.path == "/storage/v1/object/sign/closet-item-images":
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json={})
+
+    service = build_service_with_handler(handler)
+
+    with pytest.raises(SupabaseNotFoundError):
+        asyncio.run(
+            service.set_closet_item_image(
+                user_id="user-1",
+                item_id=ITEM_1,
+                content_type="image/png",
+                content=b"png",
+                access_token="token",
+            )
+        )
+
+    uploads = [
+        path for method, path in calls if method == "POST" and "/object/closet-item-images/" in path
+    ]
+    assert len(uploads) == 1
+    assert uploads[0].startswith(f"/storage/v1/object/closet-item-images/user-1/{ITEM_1}/")
+    assert uploads[0].endswith(".png")
+    assert ("DELETE", uploads[0]) in calls
+
+
+def test_set_closet_item_image_rejects_malformed_ids_before_uploading() -> None:
+    calls: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        return httpx.Response(200, json={})
+
+    service = build_service_with_handler(handler)
+
+    for item_id in ["..", "item-1", f"{ITEM_1}/../x"]:
+        with pytest.raises(SupabaseNotFoundError):
+            asyncio.run(
+                service.set_closet_item_image(
+                    user_id="user-1",
+                    item_id=item_id,
+                    content_type="image/png",
+                    content=b"png",
+                    access_token="token",
+                )
+            )
+
+    assert calls == []
+
+
+def test_set_closet_item_image_removes_upload_when_the_swap_fails() -> None:
+    calls: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.url.path == "/rest/v1/rpc/replace_closet_item_image":
+            return httpx.Response(500, json={"message": "boom"})
+        if request.url.path == "/storage/v1/object/sign/closet-item-images":
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json={})
+
+    service = build_service_with_handler(handler)
+
+    with pytest.raises(SupabaseServiceError):
+        asyncio.run(
+            service.set_closet_item_image(
+                user_id="user-1",
+                item_id=ITEM_1,
+                content_type="image/png",
+                content=b"png",
+                access_token="token",
+            )
+        )
+
+    uploads = [
+        path for method, path in calls if method == "POST" and "/object/closet-item-images/" in path
+    ]
+    assert len(uploads) == 1
+    assert ("DELETE", uploads[0]) in calls
+
+
+def test_set_closet_item_image_swaps_row_in_one_call_and_cleans_up_off_path() -> None:
+    calls: list[tuple[str, str]] = []
+    old_row = build_closet_row(ITEM_1, f"user-1/{ITEM_1}/primary.jpg")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.url.path == "/rest/v1/rpc/replace_closet_item_image":
+            body = json.loads(request.content)
+            assert body == {
+                "p_item_id": ITEM_1,
+                "p_user_id": "user-1",
+                "p_image_path": body["p_image_path"],
+                "p_image_mime_type": "image/png",
+            }
+            assert body["p_image_path"].startswith(f"user-1/{ITEM_1}/")
+            new_row = {**old_row, "image_path": body["p_image_path"], "image_mime_type": "image/png"}
+            return httpx.Response(200, json={"old_image_path": old_row["image_path"], "item": new_row})
+        if request.url.path == "/storage/v1/object/sign/closet-item-images":
+            paths = json.loads(request.content)["paths"]
+            return httpx.Response(
+                200,
+                json=[{"error": None, "path": path, "signedURL": f"/object/sign/{path}?token=t"} for path in paths],
+            )
+        return httpx.Response(200, json={})
+
+    service = build_service_with_handler(handler)
+
+    async def run() -> object:
+        record = await service.set_closet_item_image(
+            user_id="user-1",
+            item_id=ITEM_1,
+            content_type="image/png",
+            content=b"png",
+            access_token="token",
+        )
+        await service.aclose()
+        return record
+
+    record = asyncio.run(run())
+
+    assert record.image_path.startswith(f"user-1/{ITEM_1}/") and record.image_path.endswith(".png")
+    assert record.image_url == (
+        f"https://project.supabase.co/storage/v1/object/sign/{record.image_path}?token=t"
+    )
+    assert not any(path == "/rest/v1/closet_items" for _, path in calls)
+    assert ("DELETE", "/storage/v1/object/closet-item-images") in calls
+
+
+def test_reuploading_the_same_type_never_reuses_a_path_queued_for_cleanup() -> None:
+    # jpg -> png -> jpg used to land on primary.jpg again while the first primary.jpg was
+    # still queued for removal, so the cleanup deleted the live image.
+    current = {"path": None}
+    cleaned: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rest/v1/rpc/replace_closet_item_image":
+            body = json.loads(request.content)
+            old_path, current["path"] = current["path"], body["p_image_path"]
+            row = build_closet_row(ITEM_1, body["p_image_path"])
+            return httpx.Response(200, json={"old_image_path": old_path, "item": row})
+        if request.url.path == "/storage/v1/object/sign/closet-item-images":
+            return httpx.Response(200, json=[])
+        if request.method == "DELETE" and request.url.path == "/storage/v1/object/closet-item-images":
+            cleaned.extend(json.loads(request.content)["prefixes"])
+        return httpx.Response(200, json=[])
+
+    service = build_service_with_handler(handler)
+
+    async def run() -> list[str]:
+        paths = []
+        for content_type in ["image/jpeg", "image/png", "image/jpeg"]:
+            record = await service.set_closet_item_image(
+                user_id="user-1",
+                item_id=ITEM_1,
+                content_type=content_type,
+                content=b"img",
+                access_token="token",
+            )
+            paths.append(record.image_path)
+        await service.aclose()
+        return paths
+
+    paths = asyncio.run(run())
+
+    assert len(set(paths)) == 3
+    assert sorted(cleaned) == sorted(paths[:2])
+    assert current["path"] not in cleaned
+
+
+def test_delete_closet_item_uses_one_delete_and_never_signs() -> None:
+    calls: list[tuple[str, str]] = []
+    deleted_rows = [{"id": "item-1", "image_path": "user-1/item-1/primary.png"}]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.method == "DELETE" and request.url.path == "/rest/v1/closet_items":
+            assert request.url.params["select"] == "id,image_path"
+            assert request.headers["Prefer"] == "return=representation"
+            return httpx.Response(200, json=deleted_rows)
+        return httpx.Response(200, json={})
+
+    service = build_service_with_handler(handler)
+
+    async def run() -> None:
+        await service.delete_closet_item(user_id="user-1", item_id="item-1", access_token="token")
+        await service.aclose()
+
+    asyncio.run(run())
+
+    assert calls == [
+        ("DELETE", "/rest/v1/closet_items"),
+        ("DELETE", "/storage/v1/object/closet-item-images"),
+        ("DELETE", "/rest/v1/storage_cleanup_queue"),
+    ]
+
+    deleted_rows.clear()
+    with pytest.raises(SupabaseNotFoundError):
+        asyncio.run(service.delete_closet_item(user_id="user-1", item_id="item-1", access_token="token"))
+
+
+def test_create_closet_items_uses_one_array_insert() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = json.loads(request.content)
+        return httpx.Response(
+            201,
+            json=[
+                {**build_closet_row(f"item-{index}", None), "name": row["name"]}
+                for index, row in enumerate(body)
+            ],
+        )
+
+    service = build_service_with_handler(handler)
+    payloads = [
+        ClosetItemCreate(
+            name=name,
+            category="top",
+            color="white",
+            formality="casual",
+            seasonality=["summer"],
+        )
+        for name in ("Tee", "Shirt", "Polo")
+    ]
+
+    records = asyncio.run(
+        service.create_closet_items(user_id="user-1", payloads=payloads, access_token="token")
+    )
+
+    assert len(requests) == 1
+    assert requests[0].url.path == "/rest/v1/closet_items"
+    assert [row["user_id"] for row in json.loads(requests[0].content)] == ["user-1"] * 3
+    assert [record.name for record in records] == ["Tee", "Shirt", "Polo"]
+
+
+def test_delete_closet_items_filters_ids_and_removes_images_in_one_call() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/rest/v1/closet_items":
+            return httpx.Response(
+                200,
+                json=[
+                    {"id": ITEM_1, "image_path": "user-1/item-1/primary.png"},
+                    {"id": ITEM_2, "image_path": None},
+                    {"id": ITEM_3, "image_path": "user-1/item-3/primary.jpg"},
+                ],
+            )
+        return httpx.Response(200, json=[])
+
+    service = build_service_with_handler(handler)
+
+    async def run() -> list[str]:
+        deleted = await service.delete_closet_items(
+            user_id="user-1",
+            item_ids=[ITEM_1, ITEM_2, ITEM_3, ITEM_MISSING, ITEM_1, "not-a-uuid"],
+            access_token="token",
+        )
+        await service.aclose()
+        return deleted
+
+    deleted_ids = asyncio.run(run())
+
+    assert deleted_ids == [ITEM_1, ITEM_2, ITEM_3]
+    assert len(requests) == 3
+    delete_rows, remove_objects, purge_queue = requests
+    assert delete_rows.url.params["id"] == in_filter([ITEM_1, ITEM_2, ITEM_3, ITEM_MISSING])
+    assert delete_rows.url.params["user_id"] == "eq.user-1"
+    assert remove_objects.method == "DELETE"
+    assert remove_objects.url.path == "/storage/v1/object/closet-item-images"
+    assert json.loads(remove_objects.content) == {
+        "prefixes": ["user-1/item-1/primary.png", "user-1/item-3/primary.jpg"]
+    }
+    assert purge_queue.url.path == "/rest/v1/storage_cleanup_queue"
+    assert purge_queue.url.params["object_path"] == in_filter(
+        ["user-1/item-1/primary.png", "user-1/item-3/primary.jpg"]
+    )
+
+
+def build_claims(**overrides) -> dict:  # noqa: ANN003
+    claims = {
+        "sub": "user-1",
+        "aud": "authenticated",
+        "iss": "https://project.supabase.co/auth/v1",
+        "exp": int(time.time()) + 3600,
+        "email": "owner@example.com",
+        "user_metadata": {"full_name": "Owner"},
+    }
+    claims.update(overrides)
+    return claims
+
+
+def test_validate_access_token_verifies_shared_secret_tokens_locally() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError(f"Unexpected network call: {request.url}")
+
+    service = build_service_with_handler(handler, SUPABASE_JWT_SECRET="secret")
+    token = jwt.encode(build_claims(), "secret", algorithm="HS256")
+
+    user = asyncio.run(service.validate_access_token(token))
+
+    assert user.user_id == "user-1"
+    assert user.email == "owner@example.com"
+    assert user.display_name == "Owner"
+
+
+def test_validate_access_token_rejects_expired_tokens_without_fallback() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError(f"Unexpected network call: {request.url}")
+
+    service = build_service_with_handler(handler, SUPABASE_JWT_SECRET="secret")
+    token = jwt.encode(build_claims(exp=int(time.time()) - 10), "secret", algorithm="HS256")
+
+    with pytest.raises(SupabaseAuthError, match="expired"):
+        asyncio.run(service.validate_access_token(token))
+
+
+def test_validate_access_token_uses_cached_jwks_for_asymmetric_tokens() -> None:
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public_jwk = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key()))
+    public_jwk.update({"kid": "key-1", "alg": "ES256"})
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        assert request.url.path == "/auth/v1/.well-known/jwks.json"
+        return httpx.Response(200, json={"keys": [public_jwk]})
+
+    service = build_service_with_handler(handler)
+    token = jwt.encode(build_claims(), private_key, algorithm="ES256", headers={"kid": "key-1"})
+
+    asyncio.run(service.validate_access_token(token))
+    asyncio.run(service.validate_access_token(token))
+
+    assert calls == ["/auth/v1/.well-known/jwks.json"]
+
+
+def test_validate_access_token_falls_back_to_remote_when_key_is_unknown() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/auth/v1/user":
+            return httpx.Response(200, json={"id": "user-1", "email": "owner@example.com"})
+        return httpx.Response(503)
+
+    service = build_service_with_handler(handler)
+    token = jwt.encode(build_claims(), "secret", algorithm="HS256")
+
+    user = asyncio.run(service.validate_access_token(token))
+
+    assert user.user_id == "user-1"
+
+
+def test_validate_access_token_checks_unexpected_issuer_remotely() -> None:
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"id": "user-1", "email": "owner@example.com"})
+
+    service = build_service_with_handler(handler, SUPABASE_JWT_SECRET="secret")
+    token = jwt.encode(build_claims(iss="https://auth.example.com/auth/v1"), "secret", algorithm="HS256")
+
+    user = asyncio.run(service.validate_access_token(token))
+
+    assert user.user_id == "user-1"
+    assert calls == ["/auth/v1/user"]
+
+
+def test_validate_access_token_accepts_configured_issuer_locally() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError(f"Unexpected network call: {request.url}")
+
+    service = build_service_with_handler(
+        handler,
+        SUPABASE_JWT_SECRET="secret",
+        SUPABASE_JWT_ISSUER="https://auth.example.com/auth/v1",
+    )
+    token = jwt.encode(build_claims(iss="https://auth.example.com/auth/v1"), "secret", algorithm="HS256")
+
+    assert asyncio.run(service.validate_access_token(token)).user_id == "user-1"
+
+
+def test_validate_access_token_can_disable_remote_fallback() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError(f"Unexpected network call: {request.url}")
+
+    service = build_service_with_handler(handler, SUPABASE_JWT_REMOTE_FALLBACK=False)
+    token = jwt.encode(build_claims(), "secret", algorithm="HS256")
+
+    with pytest.raises(SupabaseAuthError, match="could not be verified locally"):
+        asyncio.run(service.validate_access_token(token))
+
+
+def test_validate_access_token_caches_remote_result_until_invalidated() -> None:
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"id": "user-1", "email": "owner@example.com"})
+
+    service = build_service_with_handler(handler, SUPABASE_JWT_LOCAL_VERIFICATION=False)
+    token = jwt.encode(build_claims(), "secret", algorithm="HS256")
+
+    asyncio.run(service.validate_access_token(token))
+    asyncio.run(service.validate_access_token(token))
+    assert calls == ["/auth/v1/user"]
+    assert service.access_token_cache.hits == 1
+
+    service.invalidate_access_token(token)
+    asyncio.run(service.validate_access_token(token))
+    assert calls == ["/auth/v1/user", "/auth/v1/user"]
+
+
+def test_validate_access_token_does_not_cache_past_token_expiry() -> None:
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"id": "user-1"})
+
+    service = build_service_with_handler(handler, SUPABASE_JWT_LOCAL_VERIFICATION=False)
+    token = jwt.encode(build_claims(exp=int(time.time()) - 1), "secret", algorithm="HS256")
+
+    asyncio.run(service.validate_access_token(token))
+    asyncio.run(service.validate_access_token(token))
+
+    assert len(calls) == 2
+
+
+def build_closet_row(item_id: str, image_path: str | None) -> dict:
+    return {
+        "id": item_id,
+        "user_id": "user-1",
+        "name": f"Item {item_id}",
+        "category": "top",
+        "color": "white",
+        "material": None,
+        "pattern": None,
+        "formality": "casual",
+        "seasonality": ["spring"],
+        "tags": [],
+        "notes": None,
+        "image_path": image_path,
+        "image_mime_type": "image/png" if image_path else None,
+        "created_at": "2026-02-21T12:00:00+00:00",
+        "updated_at": "2026-02-21T12:00:00+00:00",
+    }
+
+
+def test_list_closet_items_signs_images_in_chunked_bulk_requests() -> None:
+    rows = [
+        build_closet_row(f"item-{index}", f"user-1/item-{index}/primary.png")
+        for index in range(5)
+    ] + [build_closet_row("item-bare", None)]
+    sign_batches: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rest/v1/closet_items":
+            return httpx.Response(200, json=rows)
+        assert request.url.path == "/storage/v1/object/sign/closet-item-images"
+        paths = json.loads(request.content)["paths"]
+        sign_batches.append(paths)
+        # Answer out of order to prove results are matched by path.
+        return httpx.Response(
+            200,
+            json=[
+                {"error": None, "path": path, "signedURL": f"/object/sign/closet-item-images/{path}?token=t"}
+                for path in reversed(paths)
+            ],
+        )
+
+    service = build_service_with_handler(handler, SUPABASE_SIGN_BATCH_SIZE=2)
+
+    records = asyncio.run(service.list_closet_items(user_id="user-1", access_token="token"))
+
+    assert sorted(len(batch) for batch in sign_batches) == [1, 2, 2]
+    for record in records:
+        if record.image_path:
+            assert record.image_url == (
+                "https://project.supabase.co/storage/v1/object/sign/closet-item-images/"
+                f"{record.image_path}?token=t"
+            )
+        else:
+            assert record.image_url is None
+
+
+def test_signed_urls_are_reused_until_the_item_image_changes() -> None:
+    rows = [build_closet_row(ITEM_1, f"user-1/{ITEM_1}/primary.png")]
+    sign_calls: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rest/v1/closet_items":
+            return httpx.Response(200, json=rows)
+        if request.url.path == "/rest/v1/rpc/replace_closet_item_image":
+            return httpx.Response(200, json={"old_image_path": rows[0]["image_path"], "item": rows[0]})
+        if request.url.path == "/storage/v1/object/sign/closet-item-images":
+            paths = json.loads(request.content)["paths"]
+            sign_calls.append(paths)
+            return httpx.Response(
+                200,
+                json=[
+                    {"error": None, "path": path, "signedURL": f"/object/sign/{path}?token={len(sign_calls)}"}
+                    for path in paths
+                ],
+            )
+        return httpx.Response(200, json={})
+
+    service = build_service_with_handler(handler)
+
+    first = asyncio.run(service.list_closet_items(user_id="user-1", access_token="token"))
+    second = asyncio.run(service.list_closet_items(user_id="user-1", access_token="token"))
+    assert len(sign_calls) == 1
+    assert first[0].image_url == second[0].image_url
+
+    asyncio.run(
+        service.set_closet_item_image(
+            user_id="user-1",
+            item_id=ITEM_1,
+            content_type="image/png",
+            content=b"png",
+            access_token="token",
+        )
+    )
+    third = asyncio.run(service.list_closet_items(user_id="user-1", access_token="token"))
+
+    assert third[0].image_url != first[0].image_url
+    assert service.signed_url_cache.hits >= 1
+
+
+def test_generation_closet_is_cached_unsigned_and_dropped_on_writes() -> None:
+    requests: list[tuple[str, str]] = []
+    row = build_closet_row("item-1", "user-1/item-1/primary.png")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        if request.method == "PATCH":
+            return httpx.Response(200, json=[row | {"name": "Renamed"}])
+        if request.url.path.startswith("/storage/v1/object/sign/"):
+            paths = json.loads(request.content)["paths"]
+            return httpx.Response(
+                200,
+                json=[{"error": None, "path": path, "signedURL": f"/object/sign/{path}?t=1"} for path in paths],
+            )
+        return httpx.Response(200, json=[row])
+
+    service = build_service_with_handler(handler)
+
+    async def run() -> list:
+        first = await service.list_generation_closet_items(user_id="user-1", access_token="token")
+        second = await service.list_generation_closet_items(user_id="user-1", access_token="token")
+        await service.update_closet_item(
+            user_id="user-1",
+            item_id="item-1",
+            payload=ClosetItemUpdate(name="Renamed"),
+            access_token="token",
+        )
+        third = await service.list_generation_closet_items(user_id="user-1", access_token="token")
+        return [first, second, third]
+
+    first, second, third = asyncio.run(run())
+
+    assert [item.id for item in first] == ["item-1"]
+    assert second == first
+    reads = [path for method, path in requests if method == "GET"]
+    assert reads == ["/rest/v1/closet_items", "/rest/v1/closet_items"]
+    # Only the update's response is signed; generation reads never are.
+    assert sum(path.startswith("/storage/v1/object/sign/") for _, path in requests) == 1
+    assert service.cache_stats()["closet_items"]["hits"] == 1
+
+
+def test_upsert_profile_skips_unchanged_display_names() -> None:
+    upserts: list[dict] = []
+    status = {"code": 201}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upserts.append(json.loads(request.content))
+        return httpx.Response(status["code"])
+
+    service = build_service_with_handler(handler)
+
+    async def upsert(display_name: str | None) -> None:
+        await service.upsert_profile(user_id="user-1", display_name=display_name, access_token="token")
+
+    asyncio.run(upsert("Owner"))
+    asyncio.run(upsert("Owner"))
+    assert len(upserts) == 1
+
+    asyncio.run(upsert("New Name"))
+    assert upserts[-1] == {"user_id": "user-1", "display_name": "New Name"}
+
+    status["code"] = 503
+    with pytest.raises(SupabaseServiceError):
+        asyncio.run(upsert(None))
+    status["code"] = 201
+    asyncio.run(upsert(None))
+    asyncio.run(upsert(None))
+    assert [body["display_name"] for body in upserts] == ["Owner", "New Name", None, None]
+
+
+def test_profile_cache_is_shared_by_workers_with_sqlite_backend(tmp_path) -> None:  # noqa: ANN001
+    upserts: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upserts.append(json.loads(request.content))
+        return httpx.Response(201)
+
+    workers = [
+        build_service_with_handler(
+            handler,
+            CACHE_BACKEND="sqlite",
+            CACHE_SQLITE_PATH=str(tmp_path / "cache.sqlite3"),
+        )
+        for _ in range(2)
+    ]
+
+    for worker in workers:
+        asyncio.run(worker.upsert_profile(user_id="user-1", display_name="Owner", access_token="token"))
+
+    assert len(upserts) == 1
+
+
+def test_generation_closet_read_does_not_cache_over_another_workers_write(tmp_path) -> None:  # noqa: ANN001
+    workers: list[SupabaseService] = []
+    reads = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        reads["count"] += 1
+        if reads["count"] == 1:
+            # The other worker writes while this read is still in flight.
+            workers[1].invalidate_closet_cache("user-1")
+        return httpx.Response(200, json=[build_closet_row("item-1", None)])
+
+    workers.extend(
+        build_service_with_handler(
+            handler,
+            CACHE_BACKEND="sqlite",
+            CACHE_SQLITE_PATH=str(tmp_path / "cache.sqlite3"),
+        )
+        for _ in range(2)
+    )
+
+    asyncio.run(workers[0].list_generation_closet_items(user_id="user-1", access_token="token"))
+    asyncio.run(workers[1].list_generation_closet_items(user_id="user-1", access_token="token"))
+
+    assert reads["count"] == 2
+
+
+def test_closet_rows_decode_the_same_from_rest_bytes_and_postgres_rows() -> None:
+    rows = [build_closet_row("item-1", "user-1/item-1/a.png"), build_closet_row("item-2", None)]
+
+    from_bytes = _validate_rows(CLOSET_ITEM_RECORDS_ADAPTER, json.dumps(rows).encode("utf-8"))
+    from_rows = _validate_rows(CLOSET_ITEM_RECORDS_ADAPTER, rows)
+
+    assert from_bytes == from_rows
+    assert from_bytes[0].category.value == "top"
+    assert from_bytes[0].updated_at.tzinfo is not None
+
+
+def test_list_closet_item_fields_page_projects_columns_and_signs_on_demand() -> None:
+    selects: list[str] = []
+    rows = [
+        {"id": "item-3", "created_at": "2026-02-21T12:00:00+00:00", "name": "C", "image_path": "u/3.png"},
+        {"id": "item-2", "created_at": "2026-02-21T11:00:00+00:00", "name": "B", "image_path": None},
+        {"id": "item-1", "created_at": "2026-02-21T10:00:00+00:00", "name": "A", "image_path": None},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rest/v1/closet_items":
+            selects.append(request.url.params["select"])
+            return httpx.Response(200, json=rows)
+        paths = json.loads(request.content)["paths"]
+        return httpx.Response(
+            200,
+            json=[{"error": None, "path": path, "signedURL": f"/object/sign/{path}?t=1"} for path in paths],
+        )
+
+    service = build_service_with_handler(handler)
+
+    page = asyncio.run(
+        service.list_closet_item_fields_page(
+            user_id="user-1",
+            fields=["name", "image_url"],
+            limit=2,
+            access_token="token",
+        )
+    )
+
+    assert selects == ["id,created_at,name,image_path"]
+    assert page.items == [
+        {"name": "C", "image_url": "https://project.supabase.co/storage/v1/object/sign/u/3.png?t=1"},
+        {"name": "B", "image_url": None},
+    ]
+    assert page.next_cursor is not None
+
+
+def test_generation_closet_only_selects_closet_item_columns() -> None:
+    selects: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        selects.append(request.url.params["select"])
+        return httpx.Response(200, json=[])
+
+    service = build_service_with_handler(handler)
+    asyncio.run(service.list_generation_closet_items(user_id="user-1", access_token="token"))
+
+    assert selects == ["id,name,category,color,material,pattern,formality,seasonality,tags,notes"]
+
+
+def test_list_closet_items_page_uses_keyset_cursor_and_signs_only_the_page() -> None:
+    rows = [
+        build_closet_row("item-3", "user-1/item-3/primary.png"),
+        build_closet_row("item-2", "user-1/item-2/primary.png"),
+        build_closet_row("item-1", "user-1/item-1/primary.png"),
+    ]
+    rest_params: list[httpx.QueryParams] = []
+    signed_paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rest/v1/closet_items":
+            rest_params.append(request.url.params)
+            return httpx.Response(200, json=rows[: int(request.url.params["limit"])])
+        paths = json.loads(request.content)["paths"]
+        signed_paths.extend(paths)
+        return httpx.Response(
+            200,
+            json=[{"error": None, "path": path, "signedURL": f"/object/sign/{path}"} for path in paths],
+        )
+
+    service = build_service_with_handler(handler)
+
+    page = asyncio.run(
+        service.list_closet_items_page(user_id="user-1", limit=2, access_token="token")
+    )
+    assert [item.id for item in page.items] == ["item-3", "item-2"]
+    assert signed_paths == ["user-1/item-3/primary.png", "user-1/item-2/primary.png"]
+    assert page.next_cursor is not None
+    assert rest_params[0]["limit"] == "3"
+    assert rest_params[0]["order"] == "created_at.desc,id.desc"
+
+    asyncio.run(
+        service.list_closet_items_page(
+            user_id="user-1",
+            limit=2,
+            cursor=page.next_cursor,
+            access_token="token",
+        )
+    )
+    assert rest_params[1]["or"] == (
+        '(created_at.lt."2026-02-21T12:00:00+00:00",'
+        'and(created_at.eq."2026-02-21T12:00:00+00:00",id.lt."item-2"))'
+    )
+
+
+def test_list_closet_items_page_rejects_malformed_cursor() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError(f"Unexpected network call: {request.url}")
+
+    service = build_service_with_handler(handler)
+
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(
+            service.list_closet_items_page(user_id="user-1", cursor="not-a-cursor", access_token="token")
+        )
+
+
+def test_list_closet_item_changes_reads_updates_and_tombstones_in_one_rpc() -> None:
+    changed = build_closet_row("item-2", None) | {"updated_at": "2026-02-22T09:00:00+00:00"}
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        assert request.url.path == "/rest/v1/rpc/closet_item_changes"
+        since = json.loads(request.content)["p_since"]
+        return httpx.Response(
+            200,
+            json={
+                "items": [changed],
+                "deletions": (
+                    [{"item_id": "item-1", "deleted_at": "2026-02-22T10:00:00+00:00"}] if since else []
+                ),
+                "server_time": "2026-02-22T12:00:00+00:00",
+            },
+        )
+
+    service = build_service_with_handler(handler)
+
+    # The first sync is a full listing: no tombstones are replayed.
+    initial = asyncio.run(service.list_closet_item_changes(user_id="user-1", access_token="token"))
+    assert [item.id for item in initial.items] == ["item-2"]
+    assert initial.deleted_ids == []
+    assert json.loads(requests[0].content) == {"p_user_id": "user-1", "p_since": None}
+
+    changes = asyncio.run(
+        service.list_closet_item_changes(
+            user_id="user-1",
+            since=initial.cursor,
+            access_token="token",
+        )
+    )
+    assert len(requests) == 2
+    assert json.loads(requests[1].content)["p_since"] == "2026-02-22T11:59:55+00:00"
+    assert changes.deleted_ids == ["item-1"]
+
+
+def test_list_closet_item_changes_rejects_cursors_older_than_tombstone_retention() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={"items": [], "deletions": [], "server_time": "2026-03-31T12:00:00+00:00"},
+        )
+
+    service = build_service_with_handler(handler, SYNC_TOMBSTONE_RETENTION_DAYS=30)
+
+    recent = asyncio.run(
+        service.list_closet_item_changes(
+            user_id="user-1",
+            since=encode_sync_cursor(datetime(2026, 3, 2, tzinfo=timezone.utc)),
+            access_token="token",
+        )
+    )
+    with pytest.raises(SyncCursorExpiredError):
+        asyncio.run(
+            service.list_closet_item_changes(
+                user_id="user-1",
+                since=encode_sync_cursor(datetime(2026, 2, 28, tzinfo=timezone.utc)),
+                access_token="token",
+            )
+        )
+
+    # Even with no changes the cursor moves up to the horizon, so idle clients stay valid.
+    assert decode_sync_cursor(recent.cursor) == datetime(2026, 3, 31, 11, 59, 55, tzinfo=timezone.utc)
+
+
+def test_list_closet_item_changes_holds_cursor_behind_uncommitted_writes() -> None:
+    # A row stamped just before server_time may sit beside an older, still-uncommitted
+    # write, so the cursor must not move past server_time minus the safety lag.
+    recent = build_closet_row("item-2", None) | {"updated_at": "2026-02-22T11:59:59+00:00"}
+    since_values: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        since_values.append(json.loads(request.content)["p_since"])
+        return httpx.Response(
+            200,
+            json={
+                "items": [recent] if len(since_values) == 1 else [],
+                "deletions": [],
+                "server_time": "2026-02-22T12:00:00+00:00",
+            },
+        )
+
+    service = build_service_with_handler(handler, SYNC_SAFETY_LAG_SECONDS=5)
+
+    first = asyncio.run(service.list_closet_item_changes(user_id="user-1", access_token="token"))
+    second = asyncio.run(
+        service.list_closet_item_changes(user_id="user-1", since=first.cursor, access_token="token")
+    )
+    asyncio.run(
+        service.list_closet_item_changes(user_id="user-1", since=second.cursor, access_token="token")
+    )
+
+    assert since_values[1] == "2026-02-22T11:59:55+00:00"
+    # The cursor never moves backwards when nothing new arrives.
+    assert since_values[2] == "2026-02-22T11:59:55+00:00"
+
+
+def test_closet_items_etag_uses_count_and_latest_update_only() -> None:
+    state = {"count": 2, "latest": "2026-02-21T12:00:00+00:00"}
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json=[{"updated_at": state["latest"]}],
+            headers={"Content-Range": f"0-0/{state['count']}"},
+        )
+
+    service = build_service_with_handler(handler)
+
+    first = asyncio.run(service.closet_items_etag(user_id="user-1", access_token="token"))
+    second = asyncio.run(service.closet_items_etag(user_id="user-1", access_token="token"))
+    state["count"] = 1
+    after_delete = asyncio.run(service.closet_items_etag(user_id="user-1", access_token="token"))
+
+    assert first == second
+    assert after_delete != first
+    assert requests[0].headers["Prefer"] == "count=exact"
+    assert requests[0].url.params["select"] == "updated_at"
+    assert requests[0].url.params["limit"] == "1"
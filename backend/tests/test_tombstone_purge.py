@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+
+from app.core.config import Settings
+from app.jobs.tombstone_purge import TombstonePurgeWorker
+from app.services.supabase_service import SupabaseService
+
+
+def test_purge_once_drops_tombstones_past_the_retention_window() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=7)
+
+    settings = Settings(
+        _env_file=None,
+        SUPABASE_URL="https://project.supabase.co",
+        SUPABASE_PUBLISHABLE_KEY="sb_publishable_test",
+        SUPABASE_SERVICE_ROLE_KEY="service-role",
+        SYNC_TOMBSTONE_RETENTION_DAYS=2,
+    )
+    service = SupabaseService(
+        settings,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    purged = asyncio.run(TombstonePurgeWorker(service, settings).purge_once())
+
+    assert purged == 7
+    assert requests[0].url.path == "/rest/v1/rpc/purge_closet_item_deletions"
+    assert json.loads(requests[0].content) == {"p_retention_seconds": 172800}
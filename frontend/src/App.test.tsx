@@ -15,6 +15,7 @@ const apiMocks = vi.hoisted(() => ({
   getMe: vi.fn(),
   listClosetItems: vi.fn(),
   listSavedOutfits: vi.fn(),
+  logout: vi.fn(),
   updateClosetItem: vi.fn(),
   uploadClosetItemImage: vi.fn(),
 }))
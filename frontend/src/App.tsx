@@ -29,6 +29,7 @@ import {
   getMe,
   listClosetItems,
   listSavedOutfits,
+  logout,
   updateClosetItem,
   uploadClosetItemImage,
 } from "@/lib/api"
@@ -335,6 +336,10 @@ function App() {
         onGoogle={() => runAuthAction(async () => signInWithGoogle().then(() => {}))}
         onSignOut={() =>
           runAuthAction(async () => {
+            if (accessToken) {
+              // Best effort: drop the backend's cached session before Supabase revokes it.
+              await logout(accessToken).catch(() => undefined)
+            }
             await signOut()
             setViewMode("guest")
           })
@@ -103,6 +103,16 @@ export async function getMe(accessToken: string): Promise<MeResponse> {
   return (await response.json()) as MeResponse
 }
 
+export async function logout(accessToken: string): Promise<void> {
+  const response = await fetch(`${API_BASE_URL}/api/me/logout`, {
+    method: "POST",
+    headers: buildAuthHeaders(accessToken),
+  })
+  if (!response.ok) {
+    throw new ApiError(await readErrorMessage(response), response.status)
+  }
+}
+
 export async function listClosetItems(accessToken: string): Promise<ClosetItemRecord[]> {
   const response = await fetch(`${API_BASE_URL}/api/me/closet-items`, {
     headers: buildAuthHeaders(accessToken),
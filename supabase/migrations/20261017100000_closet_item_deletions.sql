@@ -0,0 +1,43 @@
+-- Closet Planner AI v2.1: tombstones for closet item delta sync.
+
+create table if not exists public.closet_item_deletions (
+  item_id uuid primary key,
+  user_id uuid not null references auth.users(id) on delete cascade,
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists closet_item_deletions_user_deleted_idx
+on public.closet_item_deletions (user_id, deleted_at);
+
+create index if not exists closet_items_user_updated_idx
+on public.closet_items (user_id, updated_at);
+
+-- Security definer so owners do not need insert rights on the tombstone table.
+create or replace function public.record_closet_item_deletion()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.closet_item_deletions (item_id, user_id, deleted_at)
+  values (old.id, old.user_id, now())
+  on conflict (item_id) do update set deleted_at = excluded.deleted_at;
+  return old;
+end;
+$$;
+
+drop trigger if exists record_closet_item_deletion on public.closet_items;
+create trigger record_closet_item_deletion
+after delete on public.closet_items
+for each row execute procedure public.record_closet_item_deletion();
+
+alter table public.closet_item_deletions enable row level security;
+
+drop policy if exists closet_item_deletions_owner_select on public.closet_item_deletions;
+
+create policy closet_item_deletions_owner_select
+on public.closet_item_deletions
+for select
+to authenticated
+using (user_id = auth.uid());
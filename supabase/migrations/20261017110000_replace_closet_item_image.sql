@@ -0,0 +1,45 @@
+-- Closet Planner AI v2.2: swap a closet item's image in one round trip.
+
+-- Returns {"old_image_path": ..., "item": <updated row>}, or null when the item
+-- does not exist for this owner. Security invoker keeps the closet_items RLS policies in force.
+create or replace function public.replace_closet_item_image(
+  p_item_id uuid,
+  p_user_id uuid,
+  p_image_path text,
+  p_image_mime_type text
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  previous_path text;
+  updated_item public.closet_items;
+begin
+  select image_path
+  into previous_path
+  from public.closet_items
+  where id = p_item_id and user_id = p_user_id
+  for update;
+
+  if not found then
+    return null;
+  end if;
+
+  update public.closet_items
+  set image_path = p_image_path,
+      image_mime_type = p_image_mime_type
+  where id = p_item_id and user_id = p_user_id
+  returning * into updated_item;
+
+  return jsonb_build_object(
+    'old_image_path', previous_path,
+    'item', to_jsonb(updated_item)
+  );
+end;
+$$;
+
+revoke all on function public.replace_closet_item_image(uuid, uuid, text, text) from public;
+grant execute on function public.replace_closet_item_image(uuid, uuid, text, text)
+to authenticated, service_role;
@@ -0,0 +1,76 @@
+-- Closet Planner AI v2.3: durable queue of storage objects to delete.
+
+create table if not exists public.storage_cleanup_queue (
+  id bigint generated always as identity primary key,
+  bucket_id text not null,
+  object_path text not null,
+  attempts integer not null default 0,
+  available_at timestamptz not null default now(),
+  created_at timestamptz not null default now()
+);
+
+create index if not exists storage_cleanup_queue_available_idx
+on public.storage_cleanup_queue (available_at, id);
+
+-- No policies: only the service role (the cleanup worker) touches this table.
+alter table public.storage_cleanup_queue enable row level security;
+
+-- Queue the previous object whenever a row stops referencing it, in the same
+-- transaction as the row change, so a crash can never orphan it.
+create or replace function public.enqueue_closet_item_image_cleanup()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if old.image_path is not null
+     and (tg_op = 'DELETE' or new.image_path is distinct from old.image_path) then
+    insert into public.storage_cleanup_queue (bucket_id, object_path)
+    values (tg_argv[0], old.image_path);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists enqueue_closet_item_image_cleanup on public.closet_items;
+create trigger enqueue_closet_item_image_cleanup
+after update of image_path or delete on public.closet_items
+for each row execute procedure public.enqueue_closet_item_image_cleanup('closet-item-images');
+
+-- Claim up to p_limit due entries. Claiming pushes available_at out by an
+-- exponential backoff, so entries whose removal fails (or whose worker dies)
+-- are retried later without any extra bookkeeping. Skip locked lets several
+-- workers drain the queue without claiming the same rows.
+create or replace function public.claim_storage_cleanup_batch(
+  p_limit integer,
+  p_base_backoff_seconds integer,
+  p_max_backoff_seconds integer,
+  p_max_attempts integer
+)
+returns setof public.storage_cleanup_queue
+language sql
+security definer
+set search_path = public
+as $$
+  update public.storage_cleanup_queue as queue
+  set attempts = queue.attempts + 1,
+      available_at = now() + make_interval(
+        secs => least(p_max_backoff_seconds, p_base_backoff_seconds * power(2, queue.attempts))
+      )
+  from (
+    select id
+    from public.storage_cleanup_queue
+    where available_at <= now() and attempts < p_max_attempts
+    order by available_at, id
+    limit p_limit
+    for update skip locked
+  ) as due
+  where queue.id = due.id
+  returning queue.*;
+$$;
+
+revoke all on function public.claim_storage_cleanup_batch(integer, integer, integer, integer)
+from public, anon, authenticated;
+grant execute on function public.claim_storage_cleanup_batch(integer, integer, integer, integer)
+to service_role;
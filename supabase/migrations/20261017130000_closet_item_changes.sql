@@ -0,0 +1,43 @@
+-- Closet Planner AI v2.4: closet delta sync in one statement.
+
+-- Returns {"items": [...], "deletions": [{"item_id", "deleted_at"}], "server_time": now()}.
+-- Both reads share one snapshot, and server_time lets the API hold its cursor a
+-- safety lag behind transactions that have stamped updated_at but not yet committed.
+-- Security invoker keeps the closet_items and closet_item_deletions RLS policies in force.
+create or replace function public.closet_item_changes(
+  p_user_id uuid,
+  p_since timestamptz
+)
+returns jsonb
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+  select jsonb_build_object(
+    'items', coalesce(
+      (
+        select jsonb_agg(to_jsonb(item) order by item.updated_at)
+        from public.closet_items as item
+        where item.user_id = p_user_id and item.updated_at > p_since
+      ),
+      '[]'::jsonb
+    ),
+    'deletions', coalesce(
+      (
+        select jsonb_agg(
+          jsonb_build_object('item_id', deletion.item_id, 'deleted_at', deletion.deleted_at)
+          order by deletion.deleted_at
+        )
+        from public.closet_item_deletions as deletion
+        where deletion.user_id = p_user_id and deletion.deleted_at > p_since
+      ),
+      '[]'::jsonb
+    ),
+    'server_time', now()
+  );
+$$;
+
+revoke all on function public.closet_item_changes(uuid, timestamptz) from public;
+grant execute on function public.closet_item_changes(uuid, timestamptz)
+to authenticated, service_role;
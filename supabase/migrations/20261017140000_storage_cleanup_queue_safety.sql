@@ -0,0 +1,98 @@
+-- Closet Planner AI v2.5: storage cleanup queue safety fixes.
+
+-- 1. The trigger no longer hard-codes a bucket. A null bucket_id means the API's
+--    configured SUPABASE_STORAGE_BUCKET, which the worker fills in when draining.
+alter table public.storage_cleanup_queue alter column bucket_id drop not null;
+
+update public.storage_cleanup_queue
+set bucket_id = null
+where bucket_id = 'closet-item-images';
+
+create or replace function public.enqueue_closet_item_image_cleanup()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if old.image_path is not null
+     and (tg_op = 'DELETE' or new.image_path is distinct from old.image_path) then
+    insert into public.storage_cleanup_queue (object_path)
+    values (old.image_path);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists enqueue_closet_item_image_cleanup on public.closet_items;
+create trigger enqueue_closet_item_image_cleanup
+after update of image_path or delete on public.closet_items
+for each row execute procedure public.enqueue_closet_item_image_cleanup();
+
+-- 2. Owners may delete queue entries under their own folder. Without the worker,
+--    the API removes objects in-process with the caller's token and then purges
+--    the matching entries, so the queue does not grow without bound.
+drop policy if exists storage_cleanup_queue_owner_delete on public.storage_cleanup_queue;
+
+create policy storage_cleanup_queue_owner_delete
+on public.storage_cleanup_queue
+for delete
+to authenticated
+using ((storage.foldername(object_path))[1] = auth.uid()::text);
+
+create index if not exists storage_cleanup_queue_object_path_idx
+on public.storage_cleanup_queue (object_path);
+
+-- 3. A path can be referenced again after it was queued (older deployments reused
+--    `primary.<ext>` per item, so jpg -> png -> jpg brought the old path back).
+--    Claiming drops such entries instead of handing the live object to the worker.
+--    Entries at p_max_attempts are never claimed again; they stay in the table as
+--    dead letters for inspection (see the migration runbook).
+create index if not exists closet_items_image_path_idx
+on public.closet_items (image_path)
+where image_path is not null;
+
+create or replace function public.claim_storage_cleanup_batch(
+  p_limit integer,
+  p_base_backoff_seconds integer,
+  p_max_backoff_seconds integer,
+  p_max_attempts integer
+)
+returns setof public.storage_cleanup_queue
+language sql
+security definer
+set search_path = public
+as $$
+  with due as (
+    select
+      queue.id,
+      exists (
+        select 1
+        from public.closet_items as item
+        where item.image_path = queue.object_path
+      ) as referenced
+    from public.storage_cleanup_queue as queue
+    where queue.available_at <= now() and queue.attempts < p_max_attempts
+    order by queue.available_at, queue.id
+    limit p_limit
+    for update of queue skip locked
+  ),
+  dropped as (
+    delete from public.storage_cleanup_queue as queue
+    using due
+    where queue.id = due.id and due.referenced
+  )
+  update public.storage_cleanup_queue as queue
+  set attempts = queue.attempts + 1,
+      available_at = now() + make_interval(
+        secs => least(p_max_backoff_seconds, p_base_backoff_seconds * power(2, queue.attempts))
+      )
+  from due
+  where queue.id = due.id and not due.referenced
+  returning queue.*;
+$$;
+
+revoke all on function public.claim_storage_cleanup_batch(integer, integer, integer, integer)
+from public, anon, authenticated;
+grant execute on function public.claim_storage_cleanup_batch(integer, integer, integer, integer)
+to service_role;
@@ -0,0 +1,64 @@
+-- Closet Planner AI v2.6: bounded tombstone history for closet delta sync.
+
+-- Without a cursor, closet_item_changes is now a full listing: every item and no
+-- tombstones, instead of replaying every deletion since the epoch.
+create or replace function public.closet_item_changes(
+  p_user_id uuid,
+  p_since timestamptz
+)
+returns jsonb
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+  select jsonb_build_object(
+    'items', coalesce(
+      (
+        select jsonb_agg(to_jsonb(item) order by item.updated_at)
+        from public.closet_items as item
+        where item.user_id = p_user_id
+          and (p_since is null or item.updated_at > p_since)
+      ),
+      '[]'::jsonb
+    ),
+    'deletions', coalesce(
+      (
+        select jsonb_agg(
+          jsonb_build_object('item_id', deletion.item_id, 'deleted_at', deletion.deleted_at)
+          order by deletion.deleted_at
+        )
+        from public.closet_item_deletions as deletion
+        where p_since is not null
+          and deletion.user_id = p_user_id
+          and deletion.deleted_at > p_since
+      ),
+      '[]'::jsonb
+    ),
+    'server_time', now()
+  );
+$$;
+
+create index if not exists closet_item_deletions_deleted_idx
+on public.closet_item_deletions (deleted_at);
+
+-- Called periodically by the API with SYNC_TOMBSTONE_RETENTION_DAYS; cursors older than
+-- the window get 410 from the API, so these rows are never read again.
+create or replace function public.purge_closet_item_deletions(p_retention_seconds integer)
+returns integer
+language sql
+security definer
+set search_path = public
+as $$
+  with purged as (
+    delete from public.closet_item_deletions
+    where deleted_at < now() - make_interval(secs => p_retention_seconds)
+    returning 1
+  )
+  select count(*)::integer from purged;
+$$;
+
+revoke all on function public.purge_closet_item_deletions(integer)
+from public, anon, authenticated;
+grant execute on function public.purge_closet_item_deletions(integer)
+to service_role;
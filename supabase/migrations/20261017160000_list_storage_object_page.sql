@@ -0,0 +1,33 @@
+-- Closet Planner AI v2.7: keyset listing of storage objects under a prefix.
+
+-- Storage's /object/list endpoint is one folder deep, so walking a user's images took one
+-- request per closet item. This pages through every object under a prefix by name, so a
+-- user costs one call per page. The range bounds keep the scan on the
+-- (bucket_id, name) index; storage.objects.name uses the "C" collation, so bumping the
+-- prefix's last character gives the first name past the prefix.
+create or replace function public.list_storage_object_page(
+  p_bucket_id text,
+  p_prefix text,
+  p_after text,
+  p_limit integer
+)
+returns table (name text, updated_at timestamptz)
+language sql
+stable
+security definer
+set search_path = public, storage
+as $$
+  select object.name, coalesce(object.updated_at, object.created_at)
+  from storage.objects as object
+  where object.bucket_id = p_bucket_id
+    and object.name >= p_prefix
+    and object.name < left(p_prefix, -1) || chr(ascii(right(p_prefix, 1)) + 1)
+    and (p_after is null or object.name > p_after)
+  order by object.name
+  limit p_limit;
+$$;
+
+revoke all on function public.list_storage_object_page(text, text, text, integer)
+from public, anon, authenticated;
+grant execute on function public.list_storage_object_page(text, text, text, integer)
+to service_role;